@@ -1,4 +1,5 @@
 import asyncio
+import logging
 import os
 from os import close
 
@@ -6,18 +7,33 @@ from aiogram import Bot, Dispatcher, types
 from aiogram.client.default import Default, DefaultBotProperties
 from aiogram.enums import ParseMode
 
+from aiogram.webhook.aiohttp_server import setup_application
+from aiohttp import web
+
 from dotenv import find_dotenv, load_dotenv
 
 load_dotenv(find_dotenv())
 
 from middlewares.db import DataBaseSession
+from middlewares.scheduler import UpdateScheduler
+from middlewares.flood_control import FloodControl
+from middlewares.metrics import BotApiMetrics, HandlerMetrics, metrics, serve_metrics
+from middlewares.query_tracker import QueryTracker, track_queries
 
-from database.engine import create_db, drop_db, session_maker
+from database.engine import create_db, drop_db, engine, pool_stats, session_maker
+from database.fsm_storage import DataBaseStorage
+from database.orm_query import catalog_cache
 
 from handlers.user_private import user_private_router
 from handlers.user_group import user_group_router
 from handlers.admin_private import admin_router
 
+from utils.admin_registry import admin_registry
+from utils.image_pipeline import image_pipeline
+from utils.media_sync import default_banner, sync_banners
+from utils.webhook import BoundedRequestHandler
+from utils.workers import Supervisor, serve_worker
+
 # from common.bot_cmds_list import private
 
 
@@ -28,33 +44,226 @@ bot = Bot(
     default=DefaultBotProperties(parse_mode=ParseMode.HTML)
 )
 
-bot.my_admins_list = []
+# Багатопроцесний режим: BOT_WORKERS=4 - супервізор і 4 воркери (див. utils/workers.py)
+#from .env file:
+# BOT_WORKERS=1
+# WORKER_QUEUE_SIZE=1000
+# WORKER_HEALTH_INTERVAL=5
+# Кеш каталогу (CATALOG_CACHE_TTL) у кожного воркера свій; зміни банерів, товарів і категорій
+# доходять до інших воркерів через спільний лічильник інвалідацій (Supervisor.cache_version).
+# Ліміти Telegram діють на весь бот, тож глобальний ліміт і ліміт на групу воркери ділять порівну
+# (апдейти однієї групи від різних користувачів обробляють різні воркери).
+BOT_WORKERS = int(os.getenv('BOT_WORKERS', 1))
 
-dp = Dispatcher()
+# Усі вихідні виклики Bot API проходять через токен-бакети (глобальний і для кожного чату)
+flood_control = FloodControl(
+    global_rate=30 / BOT_WORKERS,
+    bulk_rate=20 / BOT_WORKERS,
+    group_rate=20 / 60 / BOT_WORKERS,
+)
+bot.session.middleware(flood_control)
+# Після flood control: час самого виклику Bot API, без очікування в черзі
+bot.session.middleware(BotApiMetrics())
+# file_id банера за замовчуванням з першої відправки - далі він не вантажиться знову
+bot.session.middleware(default_banner)
+
+# Стани FSM зберігаються в БД: переживають перезапуск і спільні для кількох процесів
+dp = Dispatcher(storage=DataBaseStorage(
+    session_pool=session_maker,
+    flush_interval=float(os.getenv('FSM_FLUSH_INTERVAL', 0.5)),
+    cache_ttl=float(os.getenv('FSM_CACHE_TTL', 300)),
+))
 
 dp.include_router(user_private_router)
 dp.include_router(user_group_router)
 dp.include_router(admin_router)
 
+# Планувальник - outer-middleware, тому сесія БД відкривається лише коли апдейт дочекався черги
+scheduler = UpdateScheduler(
+    max_concurrency=int(os.getenv('MAX_CONCURRENT_UPDATES', 50)),
+    max_pending=int(os.getenv('MAX_PENDING_UPDATES', 1000)),
+)
+db_session = DataBaseSession(session_pool=session_maker)
+
+# Запити до БД на апдейт: повільні запити і ймовірні N+1 - у лог
+#from .env file:
+# LOG_LEVEL=INFO                 (DEBUG - ще й JSON-рядок з кількістю запитів і часом у БД на кожен апдейт)
+# SLOW_QUERY_MS=100
+# N_PLUS_ONE_THRESHOLD=5
+query_tracker = QueryTracker(n_plus_one=int(os.getenv('N_PLUS_ONE_THRESHOLD', 5)))
+
+
+def setup_dispatcher():
+    dp.startup.register(on_startup)
+    dp.shutdown.register(on_shutdown)
+    dp.update.outer_middleware(scheduler)
+    dp.update.middleware(db_session)
+    # Inner-middleware батьківського роутера діє на хендлери всіх вкладених роутерів
+    for observer in (dp.message, dp.edited_message, dp.callback_query):
+        observer.middleware(HandlerMetrics())
+        observer.middleware(query_tracker)
+    track_queries(engine, slow_query_ms=float(os.getenv('SLOW_QUERY_MS', 100)))
+    metrics.collector(worker_stats)
+
 
-async def on_startup(bot):
+async def on_startup(bot, worker=None):
 
     # await drop_db()
 
-    await create_db()
+    # У багатопроцесному режимі БД готує супервізор, а не кожен воркер
+    if worker is None:
+        await create_db()
+        await sync_media(bot)
+
+    # Стиснута копія банера за замовчуванням (з кешу пайплайна, якщо вже готова)
+    await default_banner.prepare(image_pipeline)
+
+    # Адміни груп: швидкий старт з БД, далі фонове оновлення з Telegram
+    if not admin_registry.admin_chats:
+        logging.getLogger(__name__).warning("ADMIN_CHAT_IDS не задано - адмінка в приватному чаті нікому не доступна")
+    async with session_maker() as session:
+        await admin_registry.load(session)
+    bot.admin_registry_task = asyncio.create_task(admin_registry.run(bot, session_maker))
+
+    # Метрики Prometheus: GET http://METRICS_HOST:METRICS_PORT/metrics
+    # (у багатопроцесному режимі воркер N слухає METRICS_PORT + 1 + N)
+    bot.metrics_runner = None
+    if os.getenv('METRICS_PORT'):
+        port = int(os.getenv('METRICS_PORT')) + (0 if worker is None else 1 + worker)
+        bot.metrics_runner = await serve_metrics(metrics, os.getenv('METRICS_HOST', '127.0.0.1'), port)
+
+
+# Банери з папки banners/ вантажаться в чат MEDIA_CHAT_ID (лише нові або змінені файли),
+# далі меню використовує збережені file_id
+#from .env file:
+# MEDIA_CHAT_ID=-100...          (порожній - синхронізація вимкнена, меню без file_id показують банер за замовчуванням)
+
+async def sync_media(bot):
+    if not os.getenv('MEDIA_CHAT_ID'):
+        logging.getLogger(__name__).warning(
+            "MEDIA_CHAT_ID не задано - банери не синхронізуються, сторінки без зображення покажуть банер за замовчуванням"
+        )
+        return
+    try:
+        await sync_banners(bot, session_maker, os.getenv('MEDIA_CHAT_ID'), pipeline=image_pipeline)
+    except Exception:
+        logging.getLogger(__name__).exception("Синхронізація банерів не вдалася")
 
 
 async def on_shutdown(bot):
+    bot.admin_registry_task.cancel()
+    image_pipeline.close()
+    if bot.metrics_runner:
+        await bot.metrics_runner.cleanup()
     print("ЗАВЕРШЕНО РОБОТУ БОТа ")
 
 
+# Режим роботи: BOT_MODE=polling (за замовчуванням) або BOT_MODE=webhook
+#from .env file:
+# WEBHOOK_URL=https://example.com          (порожній - вебхук не реєструється, зручно для локальних тестів)
+# WEBHOOK_PATH=/webhook
+# WEBHOOK_HOST=0.0.0.0
+# WEBHOOK_PORT=8080
+# WEBHOOK_SECRET=...
+# WEBHOOK_MAX_IN_FLIGHT=100
+
+async def run_webhook(supervisor: Supervisor | None = None):
+    path = os.getenv('WEBHOOK_PATH', '/webhook')
+    secret = os.getenv('WEBHOOK_SECRET') or None
+    max_in_flight = int(os.getenv('WEBHOOK_MAX_IN_FLIGHT', 100))
+
+    app = web.Application()
+    if supervisor:
+        # Апдейти лише розкладаються по воркерах; стан воркерів - GET /health
+        supervisor.register_webhook(app, path=path, secret=secret)
+    else:
+        BoundedRequestHandler(
+            dispatcher=dp,
+            bot=bot,
+            max_in_flight=max_in_flight,
+            secret_token=secret,
+        ).register(app, path=path)
+        setup_application(app, dp, bot=bot)
+
+    if os.getenv('WEBHOOK_URL'):
+        await bot.set_webhook(
+            url=os.getenv('WEBHOOK_URL') + path,
+            secret_token=secret,
+            max_connections=min(max_in_flight, 100),
+            allowed_updates=dp.resolve_used_update_types(),
+            drop_pending_updates=True,
+        )
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host=os.getenv('WEBHOOK_HOST', '0.0.0.0'), port=int(os.getenv('WEBHOOK_PORT', 8080)))
+    await site.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+def worker_stats() -> dict:
+    return {
+        "scheduler": scheduler.stats(),
+        "db": db_session.stats(),
+        "db_pool": pool_stats(engine),
+        "fsm": dp.storage.stats(),
+        "flood_control": flood_control.stats(),
+        "queries": {"n_plus_one_suspects": query_tracker.suspects},
+    }
+
+
+def worker_main(index, inbox, outbox, cache_version):
+    logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO'))
+    catalog_cache.share(cache_version)
+    setup_dispatcher()
+    asyncio.run(serve_worker(
+        index,
+        inbox,
+        outbox,
+        dp,
+        bot,
+        max_in_flight=scheduler.max_pending,
+        health_interval=float(os.getenv('WORKER_HEALTH_INTERVAL', 5)),
+        stats=worker_stats,
+    ))
+
+
+async def run_supervisor(workers: int):
+    await create_db()
+    await sync_media(bot)
+
+    supervisor = Supervisor(
+        target=worker_main,
+        workers=workers,
+        queue_size=int(os.getenv('WORKER_QUEUE_SIZE', 1000)),
+        health_interval=float(os.getenv('WORKER_HEALTH_INTERVAL', 5)),
+    )
+    supervisor.start()
+    try:
+        if os.getenv('BOT_MODE', 'polling') == 'webhook':
+            await run_webhook(supervisor)
+        else:
+            await bot.delete_webhook(drop_pending_updates=True)
+            await supervisor.poll(bot, allowed_updates=dp.resolve_used_update_types())
+    finally:
+        await supervisor.stop()
+
+
 async def main():
+    logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO'))
     try:
-        dp.startup.register(on_startup)
-        dp.shutdown.register(on_shutdown)
+        if BOT_WORKERS > 1:
+            await run_supervisor(BOT_WORKERS)
+            return
 
-        dp.update.middleware(DataBaseSession(session_pool=session_maker))
+        setup_dispatcher()
 
+        if os.getenv('BOT_MODE', 'polling') == 'webhook':
+            await run_webhook()
+            return
 
         await bot.delete_webhook(drop_pending_updates=True)
         # await bot.delete_my_commands(scope=types.BotCommandScopeAllPrivateChats())
@@ -65,4 +274,6 @@ async def main():
     finally:
         await bot.session.close()
 
-asyncio.run(main())
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,56 @@
+# Скільки байтів економить підготовка зображень (utils/image_pipeline.py):
+# розмір оригіналу і оптимізованої копії для кожного файлу, час холодного
+# і теплого (з дискового кешу) проходу через пул процесів.
+#   python -m benchmarks.bench_images                      # папка banners/
+#   python -m benchmarks.bench_images photos/ --workers 4 --quality 80
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from utils.image_pipeline import ImagePipeline
+from utils.media_sync import BANNERS_DIR, IMAGE_SUFFIXES
+
+
+async def run(files: list[Path], pipeline: ImagePipeline) -> tuple[float, list[Path]]:
+    started = time.perf_counter()
+    results = await asyncio.gather(*(pipeline.optimize_file(path) for path in files))
+    return time.perf_counter() - started, results
+
+
+async def main(args):
+    files = sorted(path for path in Path(args.directory).iterdir() if path.suffix.lower() in IMAGE_SUFFIXES)
+    pipeline = ImagePipeline(
+        cache_dir=tempfile.mkdtemp(prefix="image_cache_"),
+        max_side=args.max_side,
+        quality=args.quality,
+        workers=args.workers,
+    )
+    try:
+        cold, results = await run(files, pipeline)
+        warm, _ = await run(files, pipeline)
+    finally:
+        pipeline.close()
+
+    print(f"Файлів: {len(files)}, воркерів: {args.workers}, до {args.max_side} px, якість {args.quality}")
+    print(f"{'файл':<24} {'було, КБ':>10} {'стало, КБ':>10} {'економія':>9}")
+    before = after = 0
+    for path, result in zip(files, results):
+        original, optimized = path.stat().st_size, os.path.getsize(result)
+        before += original
+        after += optimized
+        print(f"{path.name:<24} {original / 1024:>10.0f} {optimized / 1024:>10.0f} {1 - optimized / original:>8.1%}")
+    print(f"{'разом':<24} {before / 1024:>10.0f} {after / 1024:>10.0f} {1 - after / before:>8.1%}")
+    print(f"Зекономлено {(before - after) / 1024 / 1024:.1f} МБ; "
+          f"холодний прохід {cold:.2f} с, з кешу {warm * 1000:.0f} мс")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Економія байтів від підготовки зображень")
+    parser.add_argument("directory", nargs="?", default=str(BANNERS_DIR))
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--max-side", type=int, default=1280)
+    parser.add_argument("--quality", type=int, default=85)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,73 @@
+# Навантажувальний тест багатопроцесного режиму: ті самі апдейти (меню, каталог,
+# кошик) проганяються через супервізор з 1, 2, 4 ... воркерами на фейковому Bot API
+# і тимчасовій SQLite. Пропускна здатність має рости разом з кількістю ядер.
+#   python -m benchmarks.bench_workers --updates 5000 --users 300 --workers 1 2 4
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from benchmarks.fake_bot import fake_bot
+from benchmarks.seed import make_updates, seed_db
+
+
+def bench_worker(index, inbox, outbox):
+    # Справжні app.dp і middleware, але Bot із фейковою сесією
+    from app import dp, setup_dispatcher, worker_stats
+    from utils.workers import serve_worker
+
+    setup_dispatcher()
+    asyncio.run(serve_worker(index, inbox, outbox, dp, fake_bot(), health_interval=0.1, stats=worker_stats))
+
+
+def finished(supervisor) -> tuple[int, int]:
+    workers = supervisor.health()
+    return sum(w.get("processed", 0) for w in workers), sum(w.get("failed", 0) for w in workers)
+
+
+async def run(workers: int, updates: list[dict]) -> tuple[float, int]:
+    from utils.workers import Supervisor
+
+    supervisor = Supervisor(target=bench_worker, workers=workers, health_interval=0.1)
+    supervisor.start()
+    try:
+        while not all(worker.get("status") == "ok" for worker in supervisor.health()):
+            await asyncio.sleep(0.05)
+        started = time.perf_counter()
+        for update in updates:
+            await supervisor.dispatch(update)
+        while sum(finished(supervisor)) < len(updates):
+            await asyncio.sleep(0.01)
+        return time.perf_counter() - started, finished(supervisor)[1]
+    finally:
+        await supervisor.stop()
+
+
+async def main(args):
+    await seed_db(args.products)
+    updates = make_updates(args.updates, args.users, args.products)
+
+    print(f"Ядер: {os.cpu_count()}, апдейтів: {len(updates)}, користувачів: {args.users}")
+    baseline = None
+    for workers in args.workers:
+        elapsed, failed = await run(workers, updates)
+        rate = len(updates) / elapsed
+        baseline = baseline or rate
+        print(f"{workers:>2} воркер(и): {rate:8.0f} апдейтів/с  (x{rate / baseline:.2f}), помилок: {failed}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Масштабування бота за кількістю процесів-воркерів")
+    parser.add_argument("--updates", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=300)
+    parser.add_argument("--products", type=int, default=20)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    # БД і токен задаємо до імпорту database.engine / app (і до запуску воркерів)
+    os.environ["DB_LITE"] = f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/bench.db"
+    os.environ.setdefault("TOKEN", "42:TEST")
+    # SQLite - один записувач на всю БД: менше одночасних з'єднань на процес - менше "database is locked"
+    os.environ.setdefault("MAX_CONCURRENT_UPDATES", "4")
+    asyncio.run(main(args))
@@ -0,0 +1,115 @@
+# Фейкова сесія Bot API для бенчмарків і тестів без Telegram:
+# запити не йдуть у мережу, а лише рахуються, у відповідь - мінімальний валідний об'єкт.
+#   bot = Bot("42:TEST", session=FakeSession(latency=0.02))
+import asyncio
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, AsyncGenerator, Dict, Optional, Union, get_args, get_origin
+
+from aiogram import Bot
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import TelegramMethod
+from aiogram.types import Chat, Message, PhotoSize, User
+
+
+class FakeSession(BaseSession):
+    def __init__(self, latency: float = 0.0):
+        super().__init__()
+        # Імітація мережевої затримки Bot API
+        self.latency = latency
+        self.calls: Counter[str] = Counter()
+        self.requests: list[TelegramMethod] = []
+        self.keep_requests = False
+        self._message_id = 0
+
+    async def make_request(self, bot: Bot, method: TelegramMethod, timeout: Optional[int] = None) -> Any:
+        self.calls[type(method).__name__] += 1
+        if self.keep_requests:
+            self.requests.append(method)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._result(bot, method)
+
+    def _result(self, bot: Bot, method: TelegramMethod) -> Any:
+        returning = method.__returning__
+        if returning is bool or (get_origin(returning) is Union and bool in get_args(returning)):
+            return True
+        if returning is Message:
+            return self._message(bot, method)
+        if get_origin(returning) is list:
+            return [self._message(bot, method)] if get_args(returning)[0] is Message else []
+        if returning is User:
+            return User(id=bot.id, is_bot=True, first_name="Bot").as_(bot)
+        if returning in (int, str):
+            return returning()
+        raise NotImplementedError(f"FakeSession не вміє відповідати на {type(method).__name__}")
+
+    def _message(self, bot: Bot, method: TelegramMethod) -> Message:
+        self._message_id += 1
+        return Message(
+            message_id=self._message_id,
+            date=datetime.now(),
+            chat=Chat(id=int(getattr(method, "chat_id", 0) or 0), type="private"),
+            text=getattr(method, "text", None),
+            caption=getattr(method, "caption", None),
+            photo=[PhotoSize(
+                file_id=f"photo_{self._message_id}", file_unique_id=f"photo_{self._message_id}", width=1280, height=720,
+            )] if hasattr(method, "photo") else None,
+        ).as_(bot)
+
+    async def stream_content(
+        self,
+        url: str,
+        headers: Optional[Dict[str, Any]] = None,
+        timeout: int = 30,
+        chunk_size: int = 65536,
+        raise_for_status: bool = True,
+    ) -> AsyncGenerator[bytes, None]:
+        yield b""
+
+    async def close(self) -> None:
+        pass
+
+
+def fake_bot(latency: float = 0.0) -> Bot:
+    return Bot("42:TEST", session=FakeSession(latency=latency))
+
+
+############### Синтетичні апдейти (у форматі Bot API, як їх шле Telegram) ###############
+
+def user_json(user_id: int) -> dict:
+    return {"id": user_id, "is_bot": False, "first_name": f"User {user_id}"}
+
+
+def message_update(update_id: int, user_id: int, text: str) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": user_json(user_id),
+            "text": text,
+            **({"entities": [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]} if text.startswith("/") else {}),
+        },
+    }
+
+
+def callback_update(update_id: int, user_id: int, data: str) -> dict:
+    return {
+        "update_id": update_id,
+        "callback_query": {
+            "id": str(update_id),
+            "from": user_json(user_id),
+            "chat_instance": str(user_id),
+            "data": data,
+            "message": {
+                "message_id": 1,
+                "date": int(time.time()),
+                "chat": {"id": user_id, "type": "private"},
+                "from": {"id": 42, "is_bot": True, "first_name": "Bot"},
+                "photo": [{"file_id": "photo", "file_unique_id": "photo", "width": 1, "height": 1}],
+            },
+        },
+    }
@@ -0,0 +1,135 @@
+# Прогін записаних або синтетичних апдейтів через справжній Dispatcher (app.dp)
+# з фейковим Bot API і тимчасовою SQLite із тестовими даними.
+# Звіт: p50/p95/p99 затримки на хендлер і на MenuCallBack.level, апдейтів/с.
+#   python -m benchmarks.replay --synthetic 5000 --concurrency 50
+#   python -m benchmarks.replay updates.jsonl --concurrency 100 --api-latency 0.05
+# Формат файлу - як у utils/post_updates.py: по одному Update (або {"update": ...}) на рядок.
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+# Мітки поточного апдейту: хендлер, який його обробив
+current_labels: ContextVar[dict] = ContextVar("current_labels")
+
+
+class HandlerLabel(BaseMiddleware):
+    # Inner-middleware: до нього доходить лише апдейт, для якого знайшовся хендлер
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        labels = current_labels.get(None)
+        if labels is not None:
+            labels["handler"] = data["handler"].callback.__name__
+        return await handler(event, data)
+
+
+def update_level(update: Update) -> str:
+    from kbds.inline import MenuCallBack
+
+    data = update.callback_query.data if update.callback_query else None
+    if data and data.startswith(MenuCallBack.__prefix__ + MenuCallBack.__separator__):
+        return str(MenuCallBack.unpack(data).level)
+    return "-"
+
+
+def percentile(values: list[float], q: float) -> float:
+    # values - відсортовані
+    return values[min(len(values) - 1, round(q * (len(values) - 1)))]
+
+
+def print_table(title: str, groups: dict[str, list[float]]):
+    print(f"\n{title:<28} {'к-сть':>7} {'p50, мс':>9} {'p95, мс':>9} {'p99, мс':>9}")
+    for name, values in sorted(groups.items(), key=lambda item: -len(item[1])):
+        values.sort()
+        print(f"{name:<28} {len(values):>7} "
+              + " ".join(f"{percentile(values, q) * 1000:>9.2f}" for q in (0.5, 0.95, 0.99)))
+
+
+async def replay(updates: list[dict], concurrency: int, api_latency: float):
+    from app import dp, setup_dispatcher
+    from benchmarks.fake_bot import fake_bot
+
+    bot = fake_bot(latency=api_latency)
+    setup_dispatcher()
+    for router in dp.chain_tail:
+        for observer in (router.message, router.edited_message, router.callback_query):
+            observer.middleware(HandlerLabel())
+
+    by_handler: dict[str, list[float]] = defaultdict(list)
+    by_level: dict[str, list[float]] = defaultdict(list)
+    errors = 0
+    slots = asyncio.Semaphore(concurrency)
+
+    async def feed(raw: dict):
+        nonlocal errors
+        async with slots:
+            update = Update.model_validate(raw, context={"bot": bot})
+            labels = {"handler": "(без хендлера)"}
+            current_labels.set(labels)
+            started = time.perf_counter()
+            try:
+                await dp.feed_update(bot, update)
+            except Exception:
+                errors += 1
+                labels["handler"] += " [помилка]"
+            elapsed = time.perf_counter() - started
+            by_handler[labels["handler"]].append(elapsed)
+            by_level[update_level(update)].append(elapsed)
+
+    await dp.emit_startup(bot=bot, **dp.workflow_data)
+    started = time.perf_counter()
+    # Кожен апдейт - окрема задача, щоб ContextVar з мітками був своїм у кожного
+    await asyncio.gather(*(asyncio.create_task(feed(raw)) for raw in updates))
+    elapsed = time.perf_counter() - started
+    await dp.emit_shutdown(bot=bot, **dp.workflow_data)
+
+    print(f"Апдейтів: {len(updates)}, паралельно: {concurrency}, затримка Bot API: {api_latency * 1000:.0f} мс")
+    print(f"Час: {elapsed:.2f} с, {len(updates) / elapsed:.0f} апдейтів/с, помилок: {errors}")
+    print_table("Хендлер", by_handler)
+    print_table("MenuCallBack.level", by_level)
+    print("\nВиклики Bot API:", dict(bot.session.calls.most_common()))
+
+
+async def main(args):
+    from benchmarks.seed import make_updates, seed_db
+    from utils.post_updates import read_updates
+
+    await seed_db(args.products)
+    if args.path:
+        updates = list(read_updates(args.path))
+    else:
+        updates = make_updates(args.synthetic, args.users, args.products)
+        if args.save:
+            with open(args.save, "w", encoding="utf-8") as file:
+                file.writelines(json.dumps(update, ensure_ascii=False) + "\n" for update in updates)
+    await replay(updates, args.concurrency, args.api_latency)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Прогін апдейтів через бота без Telegram")
+    parser.add_argument("path", nargs="?", help="файл JSON Lines з апдейтами (без нього - синтетичні)")
+    parser.add_argument("--synthetic", type=int, default=5000, help="скільки синтетичних апдейтів згенерувати")
+    parser.add_argument("--users", type=int, default=300)
+    parser.add_argument("--products", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--api-latency", type=float, default=0.0, help="імітація затримки Bot API, с")
+    parser.add_argument("--db", default=None, help="файл SQLite (за замовчуванням - тимчасовий)")
+    parser.add_argument("--save", default=None, help="зберегти синтетичні апдейти в JSON Lines")
+    args = parser.parse_args()
+
+    # БД і токен задаємо до імпорту database.engine / app
+    os.environ["DB_LITE"] = f"sqlite+aiosqlite:///{args.db or os.path.join(tempfile.mkdtemp(), 'replay.db')}"
+    os.environ.setdefault("TOKEN", "42:TEST")
+    asyncio.run(main(args))
@@ -0,0 +1,47 @@
+# Тестова БД і синтетичний трафік для бенчмарків (bench_workers, replay).
+# БД береться з DB_LITE, тож задайте його до імпорту цього модуля.
+import random
+
+from benchmarks.fake_bot import callback_update, message_update
+
+
+def make_updates(count: int, users: int, products: int, seed: int = 1) -> list[dict]:
+    from kbds.inline import MenuCallBack
+
+    rnd = random.Random(seed)
+    updates = []
+    for update_id in range(1, count + 1):
+        user_id = 1000 + rnd.randrange(users)
+        kind = rnd.random()
+        if kind < 0.1:
+            updates.append(message_update(update_id, user_id, "/start"))
+            continue
+        if kind < 0.3:
+            data = MenuCallBack(level=1, menu_name="catalog")
+        elif kind < 0.65:
+            data = MenuCallBack(level=2, menu_name="catalog", category=1, page=rnd.randint(1, products))
+        elif kind < 0.8:
+            data = MenuCallBack(level=2, menu_name="add_to_cart", category=1, product_id=rnd.randint(1, products))
+        elif kind < 0.9:
+            data = MenuCallBack(level=3, menu_name="cart", page=1)
+        elif kind < 0.95:
+            data = MenuCallBack(level=4, menu_name="my_orders", page=1)
+        else:
+            data = MenuCallBack(level=4, menu_name="order")
+        updates.append(callback_update(update_id, user_id, data.pack()))
+    return updates
+
+
+async def seed_db(products: int):
+    from database.engine import create_db, session_maker
+    from database.models import Banner, Product
+    from sqlalchemy import update
+
+    await create_db()
+    async with session_maker() as session:
+        await session.execute(update(Banner).values(image="banner"))
+        session.add_all([
+            Product(name=f"Продукт {i}", price=10 + i, image=f"file_{i}", category_id=1)
+            for i in range(1, products + 1)
+        ])
+        await session.commit()
@@ -1 +1,4 @@
-restricted_words = {"свиня", "олень", "хрін"}
\ No newline at end of file
+restricted_words = {"свиня", "олень", "хрін"}
+
+# Слова (разом з їхніми формами), які не є порушенням, хоча мають основу зі списку вище
+allowed_words = {"олена", "свинина"}
\ No newline at end of file
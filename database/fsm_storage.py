@@ -0,0 +1,143 @@
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from contextlib import suppress
+from typing import Any, Dict, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from database.orm_query import orm_get_fsm_state, orm_save_fsm_states
+
+logger = logging.getLogger(__name__)
+
+
+# FSM-сховище в БД (таблиця fsm_state) замість MemoryStorage aiogram.
+#
+# Запис - write-behind: зміни одразу потрапляють у локальний кеш, а в БД
+# йдуть пачкою раз на flush_interval (і при зупинці бота через close()).
+# Читання - з локального кешу (LRU, з TTL), при промаху - з БД.
+# Кеш коректний, поки всі апдейти одного користувача обробляє один процес;
+# для кількох процесів без такого шардування зменшіть cache_ttl.
+# FSM у групах бот не використовує, а aiogram читає стан на кожен апдейт - тому
+# промах для групового чату (group_reads=False) не йде в БД і не займає місце в кеші.
+class DataBaseStorage(BaseStorage):
+    def __init__(
+        self,
+        session_pool: async_sessionmaker,
+        key_builder: Optional[KeyBuilder] = None,
+        flush_interval: float = 0.5,
+        cache_size: int = 10000,
+        cache_ttl: float = 300.0,
+        group_reads: bool = False,
+    ):
+        self.session_pool = session_pool
+        self.key_builder = key_builder or DefaultKeyBuilder(with_destiny=True)
+        self.flush_interval = flush_interval
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.group_reads = group_reads
+        # ключ -> (термін дії, стан, дані)
+        self._cache: OrderedDict[str, tuple[float, Optional[str], Dict[str, Any]]] = OrderedDict()
+        self._dirty: set[str] = set()
+        self._flush_task: asyncio.Task | None = None
+        self.reads = 0
+        self.writes = 0
+        self.flushes = 0
+
+    async def _load(self, key: StorageKey) -> tuple[str, Optional[str], Dict[str, Any]]:
+        k = self.key_builder.build(key)
+        entry = self._cache.get(k)
+        if entry is not None and (k in self._dirty or entry[0] > time.monotonic()):
+            self._cache.move_to_end(k)
+            return k, entry[1], entry[2]
+        if entry is None and key.chat_id < 0 and not self.group_reads:
+            return k, None, {}
+
+        self.reads += 1
+        async with self.session_pool() as session:
+            row = await orm_get_fsm_state(session, k)
+        # Поки читали з БД, хендлер цього ж користувача міг уже записати новіше значення
+        entry = self._cache.get(k)
+        if entry is not None and k in self._dirty:
+            return k, entry[1], entry[2]
+
+        state, data = (row.state, json.loads(row.data)) if row else (None, {})
+        self._store(k, state, data)
+        return k, state, data
+
+    def _store(self, k: str, state: Optional[str], data: Dict[str, Any], dirty: bool = False):
+        self._cache[k] = (time.monotonic() + self.cache_ttl, state, data)
+        self._cache.move_to_end(k)
+        if dirty:
+            self.writes += 1
+            self._dirty.add(k)
+            if self._flush_task is None or self._flush_task.done():
+                self._flush_task = asyncio.create_task(self._flush_later())
+
+        # Незаписані в БД зміни не витісняємо
+        for old in list(self._cache):
+            if len(self._cache) <= self.cache_size:
+                break
+            if old not in self._dirty:
+                del self._cache[old]
+
+    async def _flush_later(self):
+        # Зміни, що прийшли під час запису (або після помилки), йдуть наступною пачкою
+        while self._dirty:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self):
+        if not self._dirty:
+            return
+        keys, self._dirty = self._dirty, set()
+        records = [
+            {"key": k, "state": self._cache[k][1], "data": json.dumps(self._cache[k][2], ensure_ascii=False, default=str)}
+            for k in keys
+        ]
+        try:
+            async with self.session_pool() as session:
+                await orm_save_fsm_states(session, records)
+            self.flushes += 1
+        except asyncio.CancelledError:
+            self._dirty |= keys
+            raise
+        except Exception:
+            logger.exception("Не вдалося записати %d станів FSM, повторимо пізніше", len(records))
+            self._dirty |= keys
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        k, _, data = await self._load(key)
+        self._store(k, state.state if isinstance(state, State) else state, data, dirty=True)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        _, state, _ = await self._load(key)
+        return state
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        k, state, _ = await self._load(key)
+        self._store(k, state, data.copy(), dirty=True)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        _, _, data = await self._load(key)
+        return data.copy()
+
+    async def close(self) -> None:
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._flush_task
+        await self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "cached": len(self._cache),
+            "dirty": len(self._dirty),
+            "reads": self.reads,
+            "writes": self.writes,
+            "flushes": self.flushes,
+        }
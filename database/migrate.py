@@ -0,0 +1,83 @@
+import importlib
+import logging
+import pkgutil
+
+from sqlalchemy import func, insert, inspect, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+import database.migrations
+from database.models import Base, SchemaVersion
+
+logger = logging.getLogger(__name__)
+
+
+# Версійні міграції схеми.
+# Кожен файл database/migrations/vNNN_назва.py - одна міграція з функцією upgrade(conn),
+# вони застосовуються по черзі, а номер останньої записується в таблицю schema_version.
+# Міграції пишуться так, щоб повторний запуск нічого не ламав: перша (v001) створює
+# актуальну схему з нуля, наступні доводять до неї вже існуючі БД.
+
+
+def load_migrations() -> list[tuple[int, str, object]]:
+    migrations = []
+    for module in pkgutil.iter_modules(database.migrations.__path__):
+        if not module.name.startswith("v"):
+            continue
+        version = int(module.name[1:4])
+        migrations.append((version, module.name, importlib.import_module(f"database.migrations.{module.name}")))
+    return sorted(migrations, key=lambda migration: migration[0])
+
+
+def latest_version() -> int:
+    return MIGRATIONS[-1][0]
+
+
+def current_version(conn: Connection) -> int:
+    SchemaVersion.__table__.create(conn, checkfirst=True)
+    return conn.execute(select(func.max(SchemaVersion.version))).scalar() or 0
+
+
+def _migrate(conn: Connection) -> list[int]:
+    # Швидкий шлях при кожному старті: один запит, якщо схема вже актуальна
+    version = current_version(conn)
+    if version >= latest_version():
+        return []
+
+    applied = []
+    for number, name, module in MIGRATIONS:
+        if number <= version:
+            continue
+        logger.info("Міграція схеми %s", name)
+        module.upgrade(conn)
+        conn.execute(insert(SchemaVersion).values(version=number, name=name))
+        applied.append(number)
+    return applied
+
+
+async def migrate(engine: AsyncEngine) -> list[int]:
+    async with engine.begin() as conn:
+        return await conn.run_sync(_migrate)
+
+
+############ Допоміжні функції для самих міграцій ############
+
+def create_model_index(conn: Connection, table: str, name: str):
+    # Індекс, оголошений у database/models.py, якщо його ще немає
+    index = next(index for index in Base.metadata.tables[table].indexes if index.name == name)
+    index.create(conn, checkfirst=True)
+
+
+def has_unique(conn: Connection, table: str, columns: list[str]) -> bool:
+    inspector = inspect(conn)
+    uniques = [c["column_names"] for c in inspector.get_unique_constraints(table)]
+    uniques += [i["column_names"] for i in inspector.get_indexes(table) if i["unique"]]
+    return columns in uniques
+
+
+def has_column(conn: Connection, table: str, column: str) -> bool:
+    return column in {c["name"] for c in inspect(conn).get_columns(table)}
+
+
+# Після допоміжних функцій: самі міграції імпортують їх звідси
+MIGRATIONS = load_migrations()
@@ -0,0 +1,9 @@
+# Початкова схема: усі таблиці з database/models.py.
+# Для вже існуючої БД (до появи міграцій) створює лише відсутні таблиці.
+from sqlalchemy.engine import Connection
+
+from database.models import Base
+
+
+def upgrade(conn: Connection):
+    Base.metadata.create_all(conn)
@@ -0,0 +1,21 @@
+# Один рядок кошика на пару (user_id, product_id) - на цьому тримається upsert в orm_add_to_cart.
+# Старі БД могли накопичити дублікати: зводимо їх кількість у найперший рядок.
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from database.migrate import has_unique
+
+
+def upgrade(conn: Connection):
+    if has_unique(conn, "cart", ["user_id", "product_id"]):
+        return
+
+    conn.execute(text("""
+        UPDATE cart SET quantity = (
+            SELECT SUM(c.quantity) FROM cart c
+            WHERE c.user_id = cart.user_id AND c.product_id = cart.product_id
+        )
+        WHERE id IN (SELECT MIN(id) FROM cart GROUP BY user_id, product_id HAVING COUNT(*) > 1)
+    """))
+    conn.execute(text("DELETE FROM cart WHERE id NOT IN (SELECT MIN(id) FROM cart GROUP BY user_id, product_id)"))
+    conn.execute(text("CREATE UNIQUE INDEX uq_cart_user_product ON cart (user_id, product_id)"))
@@ -0,0 +1,13 @@
+# Ключ ідемпотентності оформлення замовлення (orm_transfer_cart_to_order)
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from database.migrate import has_column
+
+
+def upgrade(conn: Connection):
+    if has_column(conn, "orders", "idempotency_key"):
+        return
+
+    conn.execute(text("ALTER TABLE orders ADD COLUMN idempotency_key VARCHAR(64)"))
+    conn.execute(text("CREATE UNIQUE INDEX uq_orders_idempotency_key ON orders (idempotency_key)"))
@@ -0,0 +1,14 @@
+# Індекси для запитів меню:
+#   товари категорії посторінково     - product (category_id, id)
+#   історія замовлень, нові першими   - orders (user_id, created, id)
+#   рядки замовлень                   - order_items (order_id)
+# Кошик за user_id вже покриває унікальний індекс (user_id, product_id) з v002.
+from sqlalchemy.engine import Connection
+
+from database.migrate import create_model_index
+
+
+def upgrade(conn: Connection):
+    create_model_index(conn, "product", "ix_product_category")
+    create_model_index(conn, "orders", "ix_orders_user_created")
+    create_model_index(conn, "order_items", "ix_order_items_order")
@@ -0,0 +1,9 @@
+# Імпорт товарів (orm_upsert_products) шукає наявні товари за (category_id, name).
+# Індекс не унікальний: у старих БД можуть бути однакові назви в одній категорії.
+from sqlalchemy.engine import Connection
+
+from database.migrate import create_model_index
+
+
+def upgrade(conn: Connection):
+    create_model_index(conn, "product", "ix_product_category_name")
@@ -0,0 +1,8 @@
+# Кеш file_id завантажених у Telegram файлів за хешем вмісту (utils/media_sync.py)
+from sqlalchemy.engine import Connection
+
+from database.models import MediaCache
+
+
+def upgrade(conn: Connection):
+    MediaCache.__table__.create(conn, checkfirst=True)
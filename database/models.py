@@ -1,4 +1,4 @@
-from sqlalchemy import DateTime, ForeignKey, Numeric, Column, Integer, ForeignKey, String, Text, BigInteger, func
+from sqlalchemy import DateTime, ForeignKey, Index, Numeric, Column, Integer, ForeignKey, String, Text, BigInteger, UniqueConstraint, func
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -7,6 +7,14 @@ class Base(DeclarativeBase):
     updated: Mapped[DateTime] = mapped_column(DateTime, default=func.now(), onupdate=func.now())
 
 
+class SchemaVersion(Base):
+    __tablename__ = 'schema_version'
+
+    # Номер застосованої міграції (database/migrations)
+    version: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    name: Mapped[str] = mapped_column(String(100), nullable=False)
+
+
 class Banner(Base):
     __tablename__ = 'banner'
 
@@ -16,6 +24,41 @@ class Banner(Base):
     description: Mapped[str] = mapped_column(Text, nullable=True)
 
 
+class MediaCache(Base):
+    __tablename__ = 'media_cache'
+
+    # sha256 вмісту, завантаженого в Telegram (після ImagePipeline) -> file_id (див. utils/media_sync.py)
+    content_hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    file_id: Mapped[str] = mapped_column(String(255), nullable=False)
+    file_name: Mapped[str] = mapped_column(String(255), nullable=True)
+
+
+class ChatAdmin(Base):
+    __tablename__ = 'chat_admin'
+    __table_args__ = (UniqueConstraint('chat_id', 'user_id', name='uq_chat_admin'),)
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    chat_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    user_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+
+
+class FsmState(Base):
+    __tablename__ = 'fsm_state'
+
+    # Ключ aiogram: "fsm:<bot_id>:<chat_id>:<user_id>:default:state"
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    state: Mapped[str] = mapped_column(String(100), nullable=True)
+    data: Mapped[str] = mapped_column(Text, nullable=False, default='{}')
+
+
+class RestrictedWord(Base):
+    __tablename__ = 'restricted_word'
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    # "!слово" - виняток із фільтра (див. utils/word_filter.py)
+    word: Mapped[str] = mapped_column(String(50), unique=True)
+
+
 class Category(Base):
     __tablename__ = 'category'
 
@@ -25,6 +68,11 @@ class Category(Base):
 
 class Product(Base):
     __tablename__ = 'product'
+    # Сторінки товарів категорії (orm_get_products_page) і пошук за назвою при імпорті (orm_upsert_products)
+    __table_args__ = (
+        Index('ix_product_category', 'category_id', 'id'),
+        Index('ix_product_category_name', 'category_id', 'name'),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     name: Mapped[str] = mapped_column(String(150), nullable=False)
@@ -48,6 +96,7 @@ class User(Base):
 
 class Cart(Base):
     __tablename__ = 'cart'
+    __table_args__ = (UniqueConstraint('user_id', 'product_id', name='uq_cart_user_product'),)
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(ForeignKey('user.user_id', ondelete='CASCADE'), nullable=False)
@@ -60,14 +109,21 @@ class Cart(Base):
 
 class Orders(Base):
     __tablename__ = 'orders'
+    # Історія замовлень користувача гортається від нових до старих
+    __table_args__ = (Index('ix_orders_user_created', 'user_id', 'created', 'id'),)
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("user.user_id", ondelete="CASCADE"))
     total_price: Mapped[float] = mapped_column(Numeric(10, 2), nullable=False)
+    # Захист від подвійного оформлення (див. orm_transfer_cart_to_order)
+    idempotency_key: Mapped[str] = mapped_column(String(64), unique=True, nullable=True)
+
+    items: Mapped[list['OrderItems']] = relationship(back_populates='order', order_by='OrderItems.id')
 
 
 class OrderItems(Base):
     __tablename__ = 'order_items'
+    __table_args__ = (Index('ix_order_items_order', 'order_id'),)
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     order_id: Mapped[int] = mapped_column(ForeignKey("orders.id", ondelete="CASCADE"))
@@ -76,3 +132,6 @@ class OrderItems(Base):
     price: Mapped[float] = mapped_column(Numeric(10, 2), nullable=False)
     status: Mapped[str] = mapped_column(String(15), nullable=False, default="pending")
 
+    order: Mapped['Orders'] = relationship(back_populates='items')
+    product: Mapped['Product'] = relationship()
+
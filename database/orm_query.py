@@ -1,14 +1,38 @@
 import math
 import logging
-from sqlalchemy import func,select, update, delete
+import os
+from sqlalchemy import String, func, insert, literal, select, update, delete
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import contains_eager, joinedload, selectinload
 from sqlalchemy.util import ordered_column_set
 
-from database.models import Banner, Cart, Category, Product, User, Orders, OrderItems
+from database.models import Banner, Cart, Category, ChatAdmin, FsmState, MediaCache, Product, RestrictedWord, User, Orders, OrderItems
+from utils.cache import AsyncTTLCache, LRUSet
+from utils.paginator import QueryPaginator
 
 logger = logging.getLogger(__name__)
 
+# Кеш рідко змінюваних даних меню (банери, категорії).
+# Статистика влучань: catalog_cache.stats()
+catalog_cache = AsyncTTLCache(ttl=float(os.getenv('CATALOG_CACHE_TTL', 300)))
+
+# user_id користувачів, які точно є в таблиці user
+known_users = LRUSet(maxsize=int(os.getenv('KNOWN_USERS_CACHE_SIZE', 10000)))
+
+
+def invalidate_catalog_cache():
+    catalog_cache.invalidate("banner", "info_pages", "categories")
+
+
+def _insert(session: AsyncSession, model):
+    # INSERT ... ON CONFLICT є і в SQLite (DB_LITE), і в Postgres (DB_URL), але в різних діалектах
+    if session.bind.dialect.name == "postgresql":
+        return postgresql_insert(model)
+    return sqlite_insert(model)
+
 
 ############### Робота із банерами (інформаційними сторінками) ###############
 
@@ -27,27 +51,81 @@ async def orm_change_banner_image(session: AsyncSession, name: str, image: str):
     query = update(Banner).where(Banner.name == name).values(image=image)
     await session.execute(query)
     await session.commit()
+    catalog_cache.invalidate("banner", "info_pages")
 
 
 async def orm_get_banner(session: AsyncSession, page: str):
-    query = select(Banner).where(Banner.name == page)
-    result = await session.execute(query)
-    return result.scalar()
+    async def load():
+        query = select(Banner).where(Banner.name == page)
+        result = await session.execute(query)
+        banner = result.scalar()
+        # Від'єднуємо об'єкт від сесії, бо його будуть читати інші запити
+        if banner is not None:
+            session.expunge(banner)
+        return banner
+
+    return await catalog_cache.get_or_load(("banner", page), load)
 
 
 async def orm_get_info_pages(session: AsyncSession):
-    query = select(Banner)
-    result = await session.execute(query)
-    return result.scalars().all()
+    async def load():
+        query = select(Banner)
+        result = await session.execute(query)
+        banners = result.scalars().all()
+        for banner in banners:
+            session.expunge(banner)
+        return banners
+
+    return await catalog_cache.get_or_load(("info_pages",), load)
+
+
+async def orm_get_media_cache(session: AsyncSession, hashes) -> dict[str, str]:
+    query = select(MediaCache.content_hash, MediaCache.file_id).where(MediaCache.content_hash.in_(list(hashes)))
+    return dict((await session.execute(query)).all())
+
+
+async def orm_save_media(session: AsyncSession, content_hash: str, file_id: str, file_name: str | None = None):
+    query = (
+        _insert(session, MediaCache)
+        .values(content_hash=content_hash, file_id=file_id, file_name=file_name)
+        .on_conflict_do_update(index_elements=[MediaCache.content_hash], set_={"file_id": file_id})
+    )
+    await session.execute(query)
+    await session.commit()
+
+
+async def orm_set_synced_banner_images(session: AsyncSession, images: dict[str, str]) -> int:
+    # Банер отримує file_id з папки banners/, лише якщо його зображення ще не задане
+    # або було задане попередньою синхронізацією. Фото, надіслане адміном, не чіпаємо.
+    synced = select(MediaCache.file_id)
+    changed = 0
+    for name, file_id in images.items():
+        query = (
+            update(Banner)
+            .where(Banner.name == name, Banner.image.is_distinct_from(file_id))
+            .where((Banner.image.is_(None)) | Banner.image.in_(synced))
+            .values(image=file_id)
+        )
+        changed += (await session.execute(query)).rowcount
+    await session.commit()
+    if changed:
+        catalog_cache.invalidate("banner", "info_pages")
+    return changed
 
 
 ############################ Категорії ######################################
 
 
 async def orm_get_categories(session: AsyncSession):
-    query = select(Category)
-    result = await session.execute(query)
-    return result.scalars().all()
+    async def load():
+        query = select(Category)
+        result = await session.execute(query)
+        categories = result.scalars().all()
+        for category in categories:
+            session.expunge(category)
+        return categories
+
+    return await catalog_cache.get_or_load(("categories",), load)
 
 
 async def orm_create_categories(session: AsyncSession, categories: list):
@@ -59,6 +137,68 @@ async def orm_create_categories(session: AsyncSession, categories: list):
     await session.commit()
 
 
+##################### Адміни груп ###########################################
+
+
+async def orm_get_chat_admins(session: AsyncSession):
+    query = select(ChatAdmin.chat_id, ChatAdmin.user_id, ChatAdmin.updated)
+    result = await session.execute(query)
+    return result.all()
+
+
+async def orm_replace_chat_admins(session: AsyncSession, chat_id: int, user_ids, refreshed):
+    await session.execute(delete(ChatAdmin).where(ChatAdmin.chat_id == chat_id))
+    session.add_all([
+        ChatAdmin(chat_id=chat_id, user_id=user_id, created=refreshed, updated=refreshed)
+        for user_id in user_ids
+    ])
+    await session.commit()
+
+
+##################### Стани FSM (database/fsm_storage.py) ###################
+
+
+async def orm_get_fsm_state(session: AsyncSession, key: str):
+    query = select(FsmState).where(FsmState.key == key)
+    result = await session.execute(query)
+    return result.scalar()
+
+
+async def orm_save_fsm_states(session: AsyncSession, records: list[dict]):
+    # records: [{"key": ..., "state": ..., "data": "<json>"}]
+    # Порожні записи (без стану і даних) видаляємо, решту - одним upsert-ом (executemany)
+    empty = [r["key"] for r in records if r["state"] is None and r["data"] == "{}"]
+    filled = [r for r in records if r["key"] not in empty]
+    if empty:
+        await session.execute(delete(FsmState).where(FsmState.key.in_(empty)))
+    if filled:
+        query = _insert(session, FsmState)
+        query = query.on_conflict_do_update(
+            index_elements=[FsmState.key],
+            set_={"state": query.excluded.state, "data": query.excluded.data, "updated": func.now()},
+        )
+        await session.execute(query, filled)
+    await session.commit()
+
+
+##################### Фільтр слів у групах ###################################
+
+
+async def orm_add_restricted_words(session: AsyncSession, words: list):
+    query = select(RestrictedWord)
+    result = await session.execute(query)
+    if result.first():
+        return
+    session.add_all([RestrictedWord(word=word) for word in words])
+    await session.commit()
+
+
+async def orm_get_restricted_words(session: AsyncSession):
+    query = select(RestrictedWord.word)
+    result = await session.execute(query)
+    return result.scalars().all()
+
+
 ############ Адмінка: додати/змінити/видалити товар ########################
 
 
@@ -72,6 +212,7 @@ async def orm_add_product(session: AsyncSession, data: dict):
     )
     session.add(obj)
     await session.commit()
+    invalidate_catalog_cache()
 
 
 async def orm_get_products(session: AsyncSession, category_id):
@@ -80,6 +221,12 @@ async def orm_get_products(session: AsyncSession, category_id):
     return result.scalars().all()
 
 
+async def orm_get_products_page(session: AsyncSession, category_id, page: int = 1, per_page: int = 1):
+    # Лише одна сторінка товарів категорії: COUNT + LIMIT/OFFSET
+    query = select(Product).where(Product.category_id == int(category_id)).order_by(Product.id)
+    return await QueryPaginator.from_query(session, query, page=page, per_page=per_page)
+
+
 async def orm_get_product(session: AsyncSession, product_id: int):
     query = select(Product).where(Product.id == product_id)
     result = await session.execute(query)
@@ -100,12 +247,40 @@ async def orm_update_product(session: AsyncSession, product_id: int, data):
     )
     await session.execute(query)
     await session.commit()
+    invalidate_catalog_cache()
 
 
 async def orm_delete_product(session: AsyncSession, product_id: int):
     query = delete(Product).where(Product.id == product_id)
     await session.execute(query)
     await session.commit()
+    invalidate_catalog_cache()
+
+
+async def orm_upsert_products(session: AsyncSession, rows: list[dict]) -> tuple[int, int]:
+    # Одна пачка імпорту: rows - словники name, price, image, category_id.
+    # Товар з такою ж назвою в тій самій категорії оновлюється, решта додаються.
+    # Без commit і без інвалідації кешу - це робить імпорт один раз у кінці.
+    # Повтор назви в пачці - перемагає останній рядок
+    by_key = {(row["category_id"], row["name"]): row for row in rows}
+    # Два IN замість (category_id, name) IN (...): так SQLite шукає по індексу, а не перебирає його.
+    # Зайві пари (назва з іншої категорії) відсіюються нижче
+    query = select(Product.id, Product.category_id, Product.name).where(
+        Product.category_id.in_({category_id for category_id, _ in by_key}),
+        Product.name.in_({name for _, name in by_key}),
+    )
+    existing = {}
+    for id, category_id, name in await session.execute(query):
+        existing.setdefault((category_id, name), id)
+
+    updates = [{"id": existing[key], **row} for key, row in by_key.items() if key in existing]
+    inserts = [row for key, row in by_key.items() if key not in existing]
+    # executemany: UPDATE ... WHERE id = ? і INSERT однією пачкою
+    if updates:
+        await session.execute(update(Product), updates)
+    if inserts:
+        await session.execute(insert(Product), inserts)
+    return len(inserts), len(updates)
 
 
 ##################### Додаємо юзера в БД #####################################
@@ -118,29 +293,61 @@ async def orm_add_user(
     last_name: str | None = None,
     phone: str | None = None,
 ):
-    query = select(User).where(User.user_id == user_id)
+    # Повторні покупці взагалі не звертаються до таблиці user
+    if user_id in known_users:
+        return
+    query = (
+        _insert(session, User)
+        .values(user_id=user_id, first_name=first_name, last_name=last_name, phone=phone)
+        .on_conflict_do_nothing(index_elements=[User.user_id])
+    )
+    await session.execute(query)
+    await session.commit()
+    known_users.add(user_id)
+
+
+async def orm_warm_known_users(session: AsyncSession, limit: int = known_users.maxsize):
+    # Прогріваємо кеш при старті найактивнішими останнім часом користувачами
+    last_activity = func.coalesce(func.max(Cart.updated), func.max(User.updated))
+    query = (
+        select(User.user_id)
+        .outerjoin(Cart, Cart.user_id == User.user_id)
+        .group_by(User.user_id)
+        .order_by(last_activity.desc())
+        .limit(limit)
+    )
     result = await session.execute(query)
-    if result.first() is None:
-        session.add(
-            User(user_id=user_id, first_name=first_name, last_name=last_name, phone=phone)
-        )
-        await session.commit()
+    # Від найстаріших до найновіших, щоб найновіші витіснялися останніми
+    for user_id in reversed(result.scalars().all()):
+        known_users.add(user_id)
 
 
 ######################## Робота із кошиком #######################################
 
 
+async def _lock_user(session: AsyncSession, user_id: int):
+    # Зміни кошика й оформлення замовлення одного користувача йдуть по черзі:
+    # рядок user заблокований до кінця транзакції (SELECT ... FOR UPDATE у Postgres).
+    # SQLite ігнорує FOR UPDATE - там безпечно, бо записувач на всю БД один, а транзакція
+    # оформлення починається з першого INSERT і тримає блокування до commit
+    await session.execute(select(User.id).where(User.user_id == user_id).with_for_update())
+
+
 async def orm_add_to_cart(session: AsyncSession, user_id: int, product_id: int):
-    query = select(Cart).where(Cart.user_id == user_id, Cart.product_id == product_id)
-    cart = await session.execute(query)
-    cart = cart.scalar()
-    if cart:
-        cart.quantity += 1
-        await session.commit()
-        return cart
-    else:
-        session.add(Cart(user_id=user_id, product_id=product_id, quantity=1))
-        await session.commit()
+    # Один атомарний запит: новий рядок або quantity + 1 для існуючого.
+    # Без блокування товар, доданий під час оформлення, міг не потрапити в замовлення,
+    # але видалитись разом з кошиком
+    await _lock_user(session, user_id)
+    query = (
+        _insert(session, Cart)
+        .values(user_id=user_id, product_id=product_id, quantity=1)
+        .on_conflict_do_update(
+            index_elements=[Cart.user_id, Cart.product_id],
+            set_={"quantity": Cart.quantity + 1, "updated": func.now()},
+        )
+    )
+    await session.execute(query)
+    await session.commit()
 
 
 async def orm_get_user_cart(session: AsyncSession, user_id):
@@ -149,27 +356,57 @@ async def orm_get_user_cart(session: AsyncSession, user_id):
     return result.scalars().all()
 
 
+async def orm_get_user_cart_page(session: AsyncSession, user_id: int, page: int = 1):
+    # Для екрану кошика потрібні лише один рядок, кількість рядків і загальна сума -
+    # рахуємо їх у БД, не завантажуючи весь кошик
+    totals_query = (
+        select(func.count(Cart.id), func.coalesce(func.sum(Cart.quantity * Product.price), 0))
+        .join(Cart.product)
+        .where(Cart.user_id == user_id)
+    )
+    count, total_price = (await session.execute(totals_query)).one()
+    page = max(1, min(page, count))
+
+    query = (
+        select(Cart)
+        .join(Cart.product)
+        .options(contains_eager(Cart.product))
+        .where(Cart.user_id == user_id)
+        .order_by(Cart.id)
+        .offset(page - 1)
+        .limit(1)
+    )
+    result = await session.execute(query)
+    return QueryPaginator(result.scalars().all(), count, page=page), total_price
+
+
 async def orm_delete_from_cart(session: AsyncSession, user_id: int, product_id: int):
+    await _lock_user(session, user_id)
     query = delete(Cart).where(Cart.user_id == user_id, Cart.product_id == product_id)
     await session.execute(query)
     await session.commit()
 
 
 async def orm_reduce_product_in_cart(session: AsyncSession, user_id: int, product_id: int):
-    query = select(Cart).where(Cart.user_id == user_id, Cart.product_id == product_id)
-    cart = await session.execute(query)
-    cart = cart.scalar()
-
-    if not cart:
-        return
-    if cart.quantity > 1:
-        cart.quantity -= 1
-        await session.commit()
-        return True
-    else:
-        await orm_delete_from_cart(session, user_id, product_id)
-        await session.commit()
-        return False
+    # True - товар лишився в кошику, False - видалений, None - його там не було
+    in_cart = (Cart.user_id == user_id, Cart.product_id == product_id)
+    await _lock_user(session, user_id)
+    while True:
+        query = update(Cart).where(*in_cart, Cart.quantity > 1).values(quantity=Cart.quantity - 1)
+        if (await session.execute(query)).rowcount:
+            await session.commit()
+            return True
+
+        # Видаляємо лише останню одиницю: якщо між запитами кількість збільшили, рядок лишиться
+        query = delete(Cart).where(*in_cart, Cart.quantity <= 1)
+        if (await session.execute(query)).rowcount:
+            await session.commit()
+            return False
+
+        if await session.scalar(select(Cart.id).where(*in_cart)) is None:
+            await session.commit()
+            return None
+        # Рядок є, але кількість щойно змінилась - повторюємо
 
 
 ######################## Робота із замовленням (переробити)#######################################
@@ -213,67 +450,140 @@ async def orm_reduce_product_in_cart(session: AsyncSession, user_id: int, produc
 #     return orders
 
 
+def _with_items(query):
+    # Рядки замовлень і назви товарів - одним додатковим запитом на всю сторінку
+    return query.options(
+        selectinload(Orders.items).joinedload(OrderItems.product).load_only(Product.name)
+    )
+
+
 async def orm_get_order(session: AsyncSession, order_id: int):
     """ Отримати замовлення за його ID """
-    query = (
-        select(OrderItems)
-        .where(OrderItems.id == order_id)
-        .options(
-            # Завантаження пов'язаних елементів замовлення
-            joinedload(OrderItems.items).joinedload(OrderItem.product)
-        )
-    )
+    query = _with_items(select(Orders).where(Orders.id == order_id))
     result = await session.execute(query)
     order = result.scalar_one_or_none()  # Отримати одне замовлення або None
     return order
 
 
-async def orm_get_user_orders(session: AsyncSession, user_id: int):
-    """ Отримати всі замовлення користувача """
-    query = (
-        select(Order)
-        .where(Order.user_id == user_id)
-        .options(
-            joinedload(Order.items).joinedload(OrderItem.product)
-        )
-        .order_by(Order.created_at.desc())  # Сортування за датою
+async def orm_get_user_orders(session: AsyncSession, user_id: int, page: int = 1, per_page: int = 1):
+    """ Сторінка замовлень користувача, від нових до старих (індекс ix_orders_user_created) """
+    query = _with_items(
+        select(Orders)
+        .where(Orders.user_id == user_id)
+        .order_by(Orders.created.desc(), Orders.id.desc())
     )
-    result = await session.execute(query)
-    orders = result.scalars().all()  # Отримати всі замовлення
-    return orders
-
-
-async def orm_transfer_cart_to_order(session: AsyncSession, user_id: int):
-    # Отримати всі товари з кошика користувача
-    # query = select(Cart).where(Cart.user_id == user_id).options(joinedload(Cart.product))
-    # cart_items = (await session.execute(query)).scalars().all()
-    #
-    # if not cart_items:
-    #     return None  # Якщо кошик порожній, не створюємо замовлення
-    #
-    # # Розрахувати загальну суму замовлення
-    # total_price = sum(item.product.price * item.quantity for item in cart_items)
-
-    # Створити нове замовлення
-    new_order = Orders(user_id=user_id, total_price=total_price)
-    session.add(new_order)
-    await session.flush()  # Отримати згенерований ID замовлення
-
-    # Додати товари з кошика в таблицю order_items
-    for item in cart_items:
-        order_item = OrderItems(
-            order_id=new_order.id,
-            product_id=item.product_id,
-            quantity=item.quantity,
-            price=item.product.price,
-            status="pending"  # Встановіть статус за замовчуванням
+    return await QueryPaginator.from_query(session, query, page=page, per_page=per_page)
+
+
+async def orm_transfer_cart_to_order(session: AsyncSession, user_id: int, idempotency_key: str | None = None):
+    # Оформлення замовлення однією транзакцією:
+    # замовлення з сумою кошика -> рядки кошика в order_items -> очистка кошика.
+    # Повторний виклик з тим самим idempotency_key (подвійне натискання "Замовити")
+    # повертає вже створене замовлення. Порожній кошик - None.
+    if idempotency_key:
+        order = await orm_get_order_by_key(session, idempotency_key)
+        if order:
+            return order
+
+    try:
+        # Паралельні оформлення й зміни цього кошика чекають, доки не завершиться транзакція
+        await _lock_user(session, user_id)
+        # Поки чекали блокування, перше натискання могло вже оформити замовлення
+        if idempotency_key:
+            order = await orm_get_order_by_key(session, idempotency_key)
+            if order:
+                await session.commit()
+                return order
+
+        cart_total = (
+            select(
+                literal(user_id),
+                func.sum(Cart.quantity * Product.price),
+                literal(idempotency_key, String),
+            )
+            .join(Cart.product)
+            .where(Cart.user_id == user_id)
+            .having(func.count(Cart.id) > 0)
+        )
+        query = (
+            insert(Orders)
+            .from_select([Orders.user_id, Orders.total_price, Orders.idempotency_key], cart_total)
+            .returning(Orders.id)
+        )
+        order_id = (await session.execute(query)).scalar()
+        if order_id is None:
+            await session.rollback()
+            # Без блокування рядків (SQLite) кошик міг спорожніти щойно, після перевірки вище
+            if idempotency_key:
+                return await orm_get_order_by_key(session, idempotency_key)
+            return None
+
+        cart_items = (
+            select(literal(order_id), Cart.product_id, Cart.quantity, Product.price)
+            .join(Cart.product)
+            .where(Cart.user_id == user_id)
         )
-        session.add(order_item)
+        query = insert(OrderItems).from_select(
+            [OrderItems.order_id, OrderItems.product_id, OrderItems.quantity, OrderItems.price], cart_items
+        )
+        await session.execute(query)
+        await session.execute(delete(Cart).where(Cart.user_id == user_id))
+        await session.commit()
+    except IntegrityError:
+        # Інший запит з тим самим ключем встиг першим
+        await session.rollback()
+        if idempotency_key:
+            order = await orm_get_order_by_key(session, idempotency_key)
+            if order:
+                return order
+        raise
 
-    # Видалити товари з кошика
-    await session.execute(delete(Cart).where(Cart.user_id == user_id))
+    return await session.get(Orders, order_id)
 
-    # Підтвердити всі зміни
-    await session.commit()
 
-    return new_order
\ No newline at end of file
+async def orm_get_order_by_key(session: AsyncSession, idempotency_key: str):
+    query = select(Orders).where(Orders.idempotency_key == idempotency_key)
+    result = await session.execute(query)
+    return result.scalar()
+
+
+########################## Експорт для адміна ######################################
+# Серверний курсор (session.stream + yield_per): рядки приходять пачками,
+# у пам'яті ніколи не буває всієї таблиці. Повертають AsyncResult з кортежами.
+
+EXPORT_BATCH_SIZE = 1000
+
+PRODUCT_EXPORT_COLUMNS = ("id", "name", "price", "category", "image")
+ORDER_EXPORT_COLUMNS = (
+    "order_id", "created", "user_id", "total_price",
+    "product_id", "product_name", "quantity", "price", "status",
+)
+
+
+async def orm_stream_products(session: AsyncSession):
+    query = (
+        select(Product.id, Product.name, Product.price, Category.name, Product.image)
+        .join(Category, Product.category_id == Category.id)
+        .order_by(Product.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    return await session.stream(query)
+
+
+async def orm_stream_orders(session: AsyncSession, date_from=None, date_to=None):
+    # Рядок на кожну позицію замовлення; date_to - не включно
+    query = (
+        select(
+            Orders.id, Orders.created, Orders.user_id, Orders.total_price,
+            OrderItems.product_id, Product.name, OrderItems.quantity, OrderItems.price, OrderItems.status,
+        )
+        .join(OrderItems, OrderItems.order_id == Orders.id)
+        .outerjoin(Product, Product.id == OrderItems.product_id)
+        .order_by(Orders.id, OrderItems.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    if date_from:
+        query = query.where(Orders.created >= date_from)
+    if date_to:
+        query = query.where(Orders.created < date_to)
+    return await session.stream(query)
@@ -1,6 +1,8 @@
 from aiogram.filters import Filter
 from aiogram import Bot, types
 
+from utils.admin_registry import admin_registry
+
 
 class ChatTypeFilter(Filter):
     def __init__(self, chat_types: list[str]) -> None:
@@ -14,5 +16,5 @@ class IsAdmin(Filter):
     def __init__(self) -> None:
         pass
 
-    async def __call__(self, message: types.Message, bot: Bot) -> bool:
-        return message.from_user.id in bot.my_admins_list
\ No newline at end of file
+    async def __call__(self, event: types.Message | types.CallbackQuery) -> bool:
+        return admin_registry.is_admin(event.from_user.id)
\ No newline at end of file
@@ -1,5 +1,10 @@
-from aiogram import F, Router, types
-from aiogram.filters import Command, StateFilter, or_f
+import html
+import os
+import time
+from datetime import date
+
+from aiogram import Bot, F, Router, types
+from aiogram.filters import Command, CommandObject, StateFilter, or_f
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 
@@ -7,30 +12,44 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from common.texts_for_db import categories
 from database.orm_query import (
+    ORDER_EXPORT_COLUMNS,
+    PRODUCT_EXPORT_COLUMNS,
     orm_change_banner_image,
     orm_get_categories,
     orm_add_product,
     orm_delete_product,
     orm_get_info_pages,
     orm_get_product,
-    orm_get_products,
+    orm_get_products_page,
+    orm_stream_orders,
+    orm_stream_products,
     orm_update_product,
 )
 
 from filters.chat_types import ChatTypeFilter, IsAdmin
 
 from kbds.inline import get_callback_btns
+from middlewares.flood_control import bulk_sends
 from kbds.reply import get_keyboard
+from utils.export import MAX_DOCUMENT_SIZE, export_to_temp_file, parse_date_range
+from utils.image_pipeline import image_pipeline
+from utils.product_import import ImportReport, document_chunks, import_products, iter_lines, iter_records
 
 
-admin_router = Router()
+admin_router = Router(name="admin_router")
 admin_router.message.filter(ChatTypeFilter(["private"]), IsAdmin())
+admin_router.callback_query.filter(IsAdmin())
+
+
+# send_media_group приймає до 10 фото, тому й сторінка переліку - 10 товарів
+ADMIN_PAGE_SIZE = 10
 
 
 ADMIN_KB = get_keyboard(
     "Додати продукт",
     "Асортимент",
     "Додати/Змінити банер",
+    "Імпорт товарів",
     placeholder="Виберіть дію",
     sizes=(2,),
 )
@@ -48,24 +67,51 @@ async def admin_features(message: types.Message, session: AsyncSession):
     await message.answer("Виберіть категорію", reply_markup=get_callback_btns(btns=btns))
 
 
+# category_<id> - перша сторінка категорії, category_<id>_<page> - наступні
 @admin_router.callback_query(F.data.startswith('category_'))
 async def starring_at_product(callback: types.CallbackQuery, session: AsyncSession):
-    category_id = callback.data.split('_')[-1]
-    for product in await orm_get_products(session, int(category_id)):
-        await callback.message.answer_photo(
-            product.image,
-            caption=f"<strong>{product.name}\
-                    </strong>\n{product.description}\nВартість: {round(product.price, 2)}",
-            reply_markup=get_callback_btns(
-                btns={
-                    "Видалити": f"delete_{product.id}",
-                    "Змінити": f"change_{product.id}",
-                },
-                sizes=(2,)
-            ),
+    _, category_id, *page = callback.data.split('_')
+    page = int(page[0]) if page else 1
+
+    paginator = await orm_get_products_page(
+        session, int(category_id), page=page, per_page=ADMIN_PAGE_SIZE
+    )
+    products = paginator.get_page()
+    if not products:
+        await callback.answer("У цій категорії немає товарів", show_alert=True)
+        return
+
+    # Номери товарів наскрізні для всієї категорії
+    first = (paginator.page - 1) * paginator.per_page + 1
+    media = [
+        types.InputMediaPhoto(
+            media=product.image,
+            caption=f"{number}. <strong>{product.name}</strong>\nВартість: {round(product.price, 2)}",
         )
+        for number, product in enumerate(products, start=first)
+    ]
+
+    btns = {}
+    for number, product in enumerate(products, start=first):
+        btns[f"🗑 {number}"] = f"delete_{product.id}"
+        btns[f"✏️ {number}"] = f"change_{product.id}"
+    if paginator.has_previous():
+        btns["◀ Попер."] = f"category_{category_id}_{paginator.page - 1}"
+    if paginator.has_next():
+        btns["Слід. ▶"] = f"category_{category_id}_{paginator.page + 1}"
+
     await callback.answer()
-    await callback.message.answer("ОК, ось перелік товарів ⏫")
+    # Одна сторінка - один альбом і одне повідомлення з кнопками замість окремого фото на кожен товар
+    with bulk_sends():
+        # Альбом у Telegram - від 2 до 10 фото, одиночний товар на сторінці йде звичайним фото
+        if len(media) == 1:
+            await callback.message.answer_photo(photo=media[0].media, caption=media[0].caption)
+        else:
+            await callback.message.answer_media_group(media=media)
+        await callback.message.answer(
+            f"Товари {first}-{first + len(products) - 1} з {paginator.len}. Видалити 🗑 чи змінити ✏️:",
+            reply_markup=get_callback_btns(btns=btns, sizes=(2,)),
+        )
 
 
 @admin_router.callback_query(F.data.startswith("delete_"))
@@ -114,10 +160,113 @@ async def add_banner2(message: types.Message, state: FSMContext):
         await state.clear()
 
 
+######################### Масовий імпорт товарів з файлу ###############################
+
+# Bot API віддає боту файли до 20 МБ
+IMPORT_MAX_FILE_SIZE = 20 * 1024 * 1024
+
+
+@admin_router.message(StateFilter(None), F.text == "Імпорт товарів")
+async def import_help(message: types.Message):
+    await message.answer(
+        "Надішліть файл .csv або .jsonl з товарами.\n"
+        "CSV - рядок заголовка <code>name,price,category,image</code> і далі по товару на рядок.\n"
+        "JSONL - по об'єкту на рядок з тими самими полями.\n"
+        "category - назва або id категорії, image - file_id фото або URL.\n"
+        "Товар з такою ж назвою в тій самій категорії буде оновлено."
+    )
+
+
+@admin_router.message(StateFilter(None), F.document)
+async def import_products_file(message: types.Message, session: AsyncSession, bot: Bot):
+    document = message.document
+    file_name = (document.file_name or "").lower()
+    if file_name.endswith((".jsonl", ".json")):
+        fmt = "jsonl"
+    elif file_name.endswith(".csv"):
+        fmt = "csv"
+    else:
+        await message.answer("Для імпорту потрібен файл .csv або .jsonl")
+        return
+    if document.file_size and document.file_size > IMPORT_MAX_FILE_SIZE:
+        await message.answer("Файл більший за 20 МБ, розділіть його на частини")
+        return
+
+    status = await message.answer("Імпорт: читаємо файл...")
+    last_update = time.monotonic()
+
+    async def progress(report):
+        # Не частіше ніж раз на 2 секунди, щоб не впертися в ліміти на редагування
+        nonlocal last_update
+        if time.monotonic() - last_update >= 2:
+            last_update = time.monotonic()
+            await status.edit_text(f"Імпорт: оброблено {report.rows} рядків...")
+
+    records = iter_records(iter_lines(document_chunks(bot, document.file_id)), fmt)
+    report = ImportReport()
+    try:
+        await import_products(session, records, progress=progress, report=report)
+    except Exception as e:
+        await status.edit_text(
+            f"Імпорт перервано: {html.escape(str(e))}\n"
+            f"Збережено до помилки - додано: {report.inserted}, оновлено: {report.updated}"
+        )
+        return
+
+    await status.edit_text(f"Імпорт завершено.\n{report.summary()}")
+    if report.failed:
+        await message.answer_document(
+            types.BufferedInputFile(report.errors_csv(), filename="import_errors.csv"),
+            caption="Рядки з помилками не імпортовано",
+        )
+
+
 #########################################################################################
 
 
 
+############################ Експорт товарів і замовлень ###############################
+
+EXPORT_USAGE = (
+    "Використання:\n"
+    "/export products - усі товари\n"
+    "/export orders [з] [по] - замовлення, дати у форматі РРРР-ММ-ДД включно"
+)
+
+
+@admin_router.message(StateFilter(None), Command("export"))
+async def export_data(message: types.Message, command: CommandObject, session: AsyncSession):
+    what, *args = (command.args or "").split() or [""]
+    try:
+        if what == "products" and not args:
+            result = await orm_stream_products(session)
+            header = PRODUCT_EXPORT_COLUMNS
+        elif what == "orders":
+            date_from, date_to = parse_date_range(args)
+            result = await orm_stream_orders(session, date_from, date_to)
+            header = ORDER_EXPORT_COLUMNS
+        else:
+            await message.answer(EXPORT_USAGE)
+            return
+    except ValueError as e:
+        await message.answer(f"{e}\n\n{EXPORT_USAGE}")
+        return
+
+    status = await message.answer("Експорт: готуємо файл...")
+    path, rows = await export_to_temp_file(result, header)
+    try:
+        if os.path.getsize(path) > MAX_DOCUMENT_SIZE:
+            await status.edit_text("Файл більший за 50 МБ - звузьте діапазон дат")
+            return
+        await message.answer_document(
+            types.FSInputFile(path, filename=f"{what}_{date.today():%Y%m%d}.csv.gz"),
+            caption=f"Рядків: {rows}",
+        )
+        await status.delete()
+    finally:
+        os.remove(path)
+
+
 ######################### FSM для додовання/змінення товарів адміном ###################
 
 class AddProduct(StatesGroup):
@@ -128,8 +277,6 @@ class AddProduct(StatesGroup):
     price = State()
     image = State()
 
-    product_for_change = None
-
     texts = {
         "AddProduct:name": "Введіть назву заново:",
         # "AddProduct:description": "Введіть опис заново:",
@@ -146,9 +293,19 @@ async def change_product_callback(
 ):
     product_id = callback.data.split("_")[-1]
 
-    product_for_change = await orm_get_product(session, int(product_id))
+    product = await orm_get_product(session, int(product_id))
+    if product is None:
+        # Товар встиг видалити інший адмін
+        await callback.answer("Товар не знайдено", show_alert=True)
+        return
 
-    AddProduct.product_for_change = product_for_change
+    # Товар, що змінюється, зберігаємо в даних FSM цього адміна (сховище спільне для всіх процесів)
+    await state.update_data(product_for_change={
+        "id": product.id,
+        "name": product.name,
+        "price": str(product.price),
+        "image": product.image,
+    })
 
     await callback.answer()
     await callback.message.answer(
@@ -175,8 +332,6 @@ async def cancel_handler(message: types.Message, state: FSMContext) -> None:
     current_state = await state.get_state()
     if current_state is None:
         return
-    if AddProduct.product_for_change:
-        AddProduct.product_for_change = None
     await state.clear()
     await message.answer("Дії відмінено", reply_markup=ADMIN_KB)
 
@@ -207,8 +362,9 @@ async def back_step_handler(message: types.Message, state: FSMContext) -> None:
 # Ловимо дані для стану name і потім міняємо стан на description
 @admin_router.message(AddProduct.name, F.text)
 async def add_name(message: types.Message, state: FSMContext, session: AsyncSession):
-    if message.text == "." and AddProduct.product_for_change:
-        await state.update_data(name=AddProduct.product_for_change.name)
+    product_for_change = (await state.get_data()).get("product_for_change")
+    if message.text == "." and product_for_change:
+        await state.update_data(name=product_for_change["name"])
     else:
         # Тут можна зробити додаткову перевірку і вийти із стану хендлера
         # не змінюючи стан з відправкою відповідного повідомлення
@@ -235,8 +391,9 @@ async def add_name2(message: types.Message, state: FSMContext):
 # Ловимо дані для стану description і потім міняємо стан на price
 # @admin_router.message(AddProduct.description, F.text)
 # async def add_description(message: types.Message, state: FSMContext, session: AsyncSession):
-#     if message.text == "." and AddProduct.product_for_change:
-#         await state.update_data(description=AddProduct.product_for_change.description)
+#     product_for_change = (await state.get_data()).get("product_for_change")
+#     if message.text == "." and product_for_change:
+#         await state.update_data(description=product_for_change["description"])
 #     else:
 #         if 4 >= len(message.text):
 #             await message.answer(
@@ -277,8 +434,9 @@ async def category_choice2(message: types.Message, state: FSMContext):
 # Ловимо дані для стану price і потім міняємо стан на image
 @admin_router.message(AddProduct.price, F.text)
 async def add_price(message: types.Message, state: FSMContext):
-    if message.text == "." and AddProduct.product_for_change:
-        await state.update_data(price=AddProduct.product_for_change.price)
+    product_for_change = (await state.get_data()).get("product_for_change")
+    if message.text == "." and product_for_change:
+        await state.update_data(price=product_for_change["price"])
     else:
         try:
             float(message.text)
@@ -299,18 +457,42 @@ async def add_price2(message: types.Message, state: FSMContext):
 # Ловимо дані для сстану image і потім виходимо із станів
 @admin_router.message(AddProduct.image, or_f(F.photo, F.text == "."))
 async def add_image(message: types.Message, state: FSMContext, session: AsyncSession):
-    if message.text and message.text == "." and AddProduct.product_for_change:
-        await state.update_data(image=AddProduct.product_for_change.image)
+    product_for_change = (await state.get_data()).get("product_for_change")
+    if message.text and message.text == "." and product_for_change:
+        await state.update_data(image=product_for_change["image"])
 
     elif message.photo:
         await state.update_data(image=message.photo[-1].file_id)
     else:
         await message.answer("Надішліть фото їжі")
         return
+    await save_product(message, state, session)
+
+
+# Фото, надіслане файлом (без стиснення Telegram): зменшуємо і перестискаємо самі,
+# у товар іде file_id вже підготовленого фото
+@admin_router.message(AddProduct.image, F.document.mime_type.startswith("image/"))
+async def add_image_document(message: types.Message, state: FSMContext, session: AsyncSession, bot: Bot):
+    if message.document.file_size and message.document.file_size > IMPORT_MAX_FILE_SIZE:
+        await message.answer("Файл більший за 20 МБ, надішліть менше фото")
+        return
+    source = await bot.download(message.document)
+    try:
+        optimized = await image_pipeline.optimize_bytes(source.getvalue())
+    except Exception:
+        await message.answer("Не вдалося прочитати зображення, надішліть інше фото")
+        return
+    photo = await message.answer_photo(types.BufferedInputFile(optimized, filename="product.jpg"))
+    await state.update_data(image=photo.photo[-1].file_id)
+    await save_product(message, state, session)
+
+
+async def save_product(message: types.Message, state: FSMContext, session: AsyncSession):
     data = await state.get_data()
+    product_for_change = data.get("product_for_change")
     try:
-        if AddProduct.product_for_change:
-            await orm_update_product(session, AddProduct.product_for_change.id, data)
+        if product_for_change:
+            await orm_update_product(session, product_for_change["id"], data)
         else:
             await orm_add_product(session, data)
         await message.answer("Продукт доданий/змінений", reply_markup=ADMIN_KB)
@@ -323,8 +505,6 @@ async def add_image(message: types.Message, state: FSMContext, session: AsyncSes
         )
         await state.clear()
 
-    AddProduct.product_for_change = None
-
 # Ловимо всю іншу некоректну поведінку для цього стану
 @admin_router.message(AddProduct.image)
 async def add_image2(message: types.Message, state: FSMContext):
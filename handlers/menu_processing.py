@@ -1,18 +1,16 @@
-from idlelib.debugobj import myrepr
-
 from aiogram.types import InputMediaPhoto
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from database.get_menu_content import my_orders
 from database.orm_query import (
     orm_add_to_cart,
     orm_delete_from_cart,
     orm_get_banner,
     orm_get_categories,
-    orm_get_products,
-    orm_get_user_cart,
+    orm_get_products_page,
+    orm_get_user_cart_page,
+    orm_get_user_orders,
     orm_reduce_product_in_cart,
 )
 
@@ -24,12 +22,17 @@ from kbds.inline import (
     get_user_orders,
 )
 
-from utils.paginator import Paginator
+from utils.media_sync import banner_media
+from utils.paginator import Paginator, QueryPaginator
+
+# Скільки рядків замовлення показувати в підписі
+ORDER_ITEMS_SHOWN = 15
 
 
 async def main_menu(session, level, menu_name):
     banner = await orm_get_banner(session, menu_name)
-    image = InputMediaPhoto(media=banner.image, caption=banner.description)
+    caption = banner.description if banner else "Інформація недоступна"
+    image = InputMediaPhoto(media=banner_media(banner), caption=caption)
     kbds = get_user_main_btns(level=level)
 
     return image, kbds
@@ -37,10 +40,8 @@ async def main_menu(session, level, menu_name):
 
 async def catalog(session, level, menu_name):
     banner = await orm_get_banner(session, menu_name)
-    image = InputMediaPhoto(media=banner.image, caption=banner.description)
-    if not banner:
-        image = InputMediaPhoto(media=banner.image("default.jpg"), caption="Інформація недоступна")
-        return image
+    caption = banner.description if banner else "Інформація недоступна"
+    image = InputMediaPhoto(media=banner_media(banner), caption=caption)
 
     categories = await orm_get_categories(session)
     kbds = get_user_catalog_btns(level=level, categories=categories)
@@ -48,7 +49,7 @@ async def catalog(session, level, menu_name):
     return image, kbds
 
 
-def pages(paginator: Paginator):
+def pages(paginator: Paginator | QueryPaginator):
     btns = dict()
     if paginator.has_previous():
         btns["◀ Попер."] = "previous"
@@ -60,9 +61,23 @@ def pages(paginator: Paginator):
 
 
 async def products(session, level, category, page):
-    products = await orm_get_products(session, category_id=category)
+    paginator = await orm_get_products_page(session, category_id=category, page=page)
+
+    if not paginator.len:
+        # У категорії ще немає товарів (або всі видалили) - банер каталогу і кнопка "Назад"
+        banner = await orm_get_banner(session, "catalog")
+        image = InputMediaPhoto(
+            media=banner_media(banner), caption="<strong>У цій категорії поки немає товарів.</strong>"
+        )
+        kbds = get_products_btns(
+            level=level,
+            category=category,
+            page=1,
+            pagination_btns={},
+            product_id=None,
+        )
+        return image, kbds
 
-    paginator = Paginator(products, page=page)
     product = paginator.get_page()[0]
 
     image = InputMediaPhoto(
@@ -77,7 +92,7 @@ async def products(session, level, category, page):
     kbds = get_products_btns(
         level=level,
         category=category,
-        page=page,
+        page=paginator.page,
         pagination_btns=pagination_btns,
         product_id=product.id,
     )
@@ -97,13 +112,12 @@ async def cart(session, level, menu_name, page, user_id, product_id):
     elif menu_name == "increment":
         await orm_add_to_cart(session, user_id, product_id)
 
-    carts = await orm_get_user_cart(session, user_id)
+    paginator, total_price = await orm_get_user_cart_page(session, user_id, page=page)
 
-    if not carts:
+    if not paginator.len:
         banner = await orm_get_banner(session, "cart")
-        image = InputMediaPhoto(
-            media=banner.image, caption=f"<strong>{banner.description}</strong>"
-        )
+        caption = banner.description if banner else "Інформація недоступна"
+        image = InputMediaPhoto(media=banner_media(banner), caption=f"<strong>{caption}</strong>")
 
         kbds = get_user_cart(
             level=level,
@@ -113,14 +127,10 @@ async def cart(session, level, menu_name, page, user_id, product_id):
         )
 
     else:
-        paginator = Paginator(carts, page=page)
-
         cart = paginator.get_page()[0]
 
         cart_price = round(cart.quantity * cart.product.price, 2)
-        total_price = round(
-            sum(cart.quantity * cart.product.price for cart in carts), 2
-        )
+        total_price = round(total_price, 2)
         image = InputMediaPhoto(
             media=cart.product.image,
             caption=f"<strong>{cart.product.name}</strong>\n{cart.product.price}$ x {cart.quantity} = {cart_price} грн.\
@@ -131,7 +141,7 @@ async def cart(session, level, menu_name, page, user_id, product_id):
 
         kbds = get_user_cart(
             level=level,
-            page=page,
+            page=paginator.page,
             pagination_btns=pagination_btns,
             product_id=cart.product.id,
         )
@@ -139,36 +149,44 @@ async def cart(session, level, menu_name, page, user_id, product_id):
     return image, kbds
 
 
-async def orders(session, level, user_id, product_id, page: int = 1):
-    # Отримання замовлень із врахуванням сторінки
-    query = select(Orders).where(Orders.user_id == user_id).order_by(Orders.created.desc())
-    result = await session.execute(query)
-    orders_list = result.scalars().all()
+async def my_orders(session, level, menu_name, user_id, page):
+    # Одна сторінка = одне замовлення; у БД вибирається лише воно (LIMIT/OFFSET по індексу)
+    paginator = await orm_get_user_orders(session, user_id, page=page or 1)
+    banner = await orm_get_banner(session, "my_orders")
 
-    if not orders_list:
-        return None, "У вас немає замовлень.", InlineKeyboardMarkup(
-            inline_keyboard=[[InlineKeyboardButton(text="На головну", callback_data="main_menu")]]
+    if not paginator.len:
+        image = InputMediaPhoto(
+            media=banner_media(banner),
+            caption="<strong>У вас ще немає замовлень.</strong>\nОберіть щось у каталозі 🥗",
         )
+        kbds = get_user_orders(level=level, page=None, pagination_btns=None)
+        return image, kbds
 
-    # Підключення пагінації
-    paginator = Paginator(orders_list, page=page)
-    current_orders = paginator.get_page()
+    order = paginator.get_page()[0]
 
-    # Формування тексту та кнопок
-    message_text = "Ваші замовлення:\n\n"
-    for order in current_orders:
-        message_text += f"Замовлення №{order.id} - {order.total_price}$ ({order.created_at.strftime('%Y-%m-%d')})\n"
+    # Підпис до фото обмежений 1024 символами - довгі замовлення скорочуємо
+    lines = [
+        f"{item.product.name} x {item.quantity} = {round(item.price * item.quantity, 2)} грн."
+        for item in order.items[:ORDER_ITEMS_SHOWN]
+    ]
+    if len(order.items) > ORDER_ITEMS_SHOWN:
+        lines.append(f"... і ще {len(order.items) - ORDER_ITEMS_SHOWN} товар(ів)")
 
-    kbds = InlineKeyboardMarkup(
-        inline_keyboard=[]
+    image = InputMediaPhoto(
+        media=banner_media(banner),
+        caption=(f"<strong>Замовлення №{order.id}</strong> від {order.created.strftime('%d.%m.%Y %H:%M')}\n\n"
+                 + "\n".join(lines)
+                 + f"\n\nРазом: {round(order.total_price, 2)} грн."
+                 f"\n<strong>Замовлення {paginator.page} з {paginator.pages}</strong>"),
     )
-    if paginator.has_previous:
-        kbds.inline_keyboard.append([InlineKeyboardButton(text="⬅️ Попередня", callback_data=f"orders_page_{page - 1}")])
-    if paginator.has_next:
-        kbds.inline_keyboard.append([InlineKeyboardButton(text="➡️ Наступна", callback_data=f"orders_page_{page + 1}")])
-    kbds.inline_keyboard.append([InlineKeyboardButton(text="На головну", callback_data="main_menu")])
 
-    return None, message_text, kbds
+    pagination_btns = pages(paginator)
+    kbds = get_user_orders(
+        level=level,
+        page=paginator.page,
+        pagination_btns=pagination_btns,
+    )
+    return image, kbds
 
 
 # async def orders(session, level, user_id, product_id=None, page: int = 1):
@@ -209,7 +227,7 @@ async def get_menu_content(
     elif level == 3:
         return await cart(session, level, menu_name, page, user_id, product_id)
     elif level == 4:
-        return await my_orders(session, level, menu_name, user_id, page=0)
+        return await my_orders(session, level, menu_name, user_id, page=page)
 
     # Якщо нічого не знайдено, повертаємо None
     message_text = "Немає такої сторінки"
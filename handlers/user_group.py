@@ -1,43 +1,45 @@
-from string import punctuation
+import os
 
 from aiogram import F, Bot, types, Router
 from aiogram.filters import Command
 
+from sqlalchemy.ext.asyncio import AsyncSession
+
 from filters.chat_types import ChatTypeFilter
-from common.restricted_words import restricted_words
+from common.restricted_words import allowed_words, restricted_words
+from utils.admin_registry import admin_registry
+from utils.word_filter import WordFilter
 
 
-user_group_router = Router()
+user_group_router = Router(name="user_group_router")
 user_group_router.message.filter(ChatTypeFilter(["group", "supergroup"]))
 user_group_router.edited_message.filter(ChatTypeFilter(["group", "supergroup"]))
 
 
+# Примусово оновити список адмінів цієї групи (далі він оновлюється у фоні)
 @user_group_router.message(Command("admin"))
-async def get_admins(message: types.Message, bot: Bot):
-    chat_id = message.chat.id
-    admins_list = await bot.get_chat_administrators(chat_id)
-    #подивитись всі дані і свойства отриманих обєктів
-    #print(admins_list)
-    # Код нижче це генератор списка, як і цей x = [i for i in range(10)]
-    admins_list = [
-        member.user.id
-        for member in admins_list
-        if member.status == "creator" or member.status == "administrator"
-    ]
-    bot.my_admins_list = admins_list
+async def get_admins(message: types.Message, bot: Bot, session: AsyncSession):
+    admins_list = await admin_registry.refresh_chat(bot, session, message.chat.id)
     if message.from_user.id in admins_list:
         await message.delete()
-    #print(admins_list)
 
 
-def clean_text(text: str):
-    return text.translate(str.maketrans("", "", punctuation))
+# Список слів: таблиця restricted_word + необов'язковий файл RESTRICTED_WORDS_FILE
+# (по слову на рядок, "!слово" - виняток). Обидва перечитуються без перезапуску.
+word_filter = WordFilter(
+    [*restricted_words, *(f"!{word}" for word in allowed_words)],
+    path=os.getenv('RESTRICTED_WORDS_FILE'),
+    reload_interval=float(os.getenv('RESTRICTED_WORDS_RELOAD', 60)),
+)
 
 
 @user_group_router.edited_message()
 @user_group_router.message()
-async def cleaner(message: types.Message):
-    if restricted_words.intersection(clean_text(message.text.lower()).split()):
+async def cleaner(message: types.Message, session: AsyncSession):
+    # Сесія лінива - до БД звертаємось лише коли настав час перечитати список
+    await word_filter.refresh(session)
+    text = message.text or message.caption
+    if text and word_filter.find(text):
         await message.answer(
             f"{message.from_user.first_name}, дотримуйтесь порядку в чаті!"
         )
@@ -3,7 +3,6 @@ from aiogram.filters import CommandStart
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from database.get_menu_content import carts
 from database.orm_query import (
     orm_add_to_cart,
     orm_add_user,
@@ -19,7 +18,7 @@ from kbds.inline import MenuCallBack, get_callback_btns
 
 
 
-user_private_router = Router()
+user_private_router = Router(name="user_private_router")
 user_private_router.message.filter(ChatTypeFilter(["private"]))
 
 
@@ -43,6 +42,14 @@ async def add_to_cart(callback: types.CallbackQuery, callback_data: MenuCallBack
     await callback.answer("Продукт доданий в корзину.")
 
 
+def checkout_key(callback: types.CallbackQuery) -> str:
+    # Одне й те саме повідомлення з кошиком у незмінному вигляді = одне замовлення.
+    # Після будь-якого редагування повідомлення (новий екран) ключ уже інший.
+    message = callback.message
+    changed = getattr(message, "edit_date", None) or message.date
+    return f"{callback.from_user.id}:{message.message_id}:{int(changed.timestamp())}"
+
+
 async def my_orders(callback: types.CallbackQuery, callback_data: MenuCallBack, session: AsyncSession):
     user = callback.from_user
     await orm_add_user(
@@ -52,8 +59,15 @@ async def my_orders(callback: types.CallbackQuery, callback_data: MenuCallBack,
         last_name=user.last_name,
         phone=None,
     )
-    await orm_transfer_cart_to_order(session, user_id=user.id)
-    await answer("Замовлення успішно зроблено.")
+    order = await orm_transfer_cart_to_order(session, user_id=user.id, idempotency_key=checkout_key(callback))
+    if not order:
+        await callback.answer("Кошик порожній.")
+        return
+
+    await callback.answer(f"Замовлення №{order.id} успішно зроблено.", show_alert=True)
+    # Показуємо історію замовлень, нове - першим
+    media, reply_markup = await get_menu_content(session, level=4, menu_name="my_orders", page=1, user_id=user.id)
+    await callback.message.edit_media(media=media, reply_markup=reply_markup)
 
 
 @user_private_router.callback_query(MenuCallBack.filter())
@@ -63,7 +77,8 @@ async def user_menu(callback: types.CallbackQuery, callback_data: MenuCallBack,
         await add_to_cart(callback, callback_data, session)
         return
 
-    if callback_data.menu_name == "my_orders":
+    # Кнопка "Замовити" в кошику
+    if callback_data.menu_name == "order":
         await my_orders(callback, callback_data, session)
         return
 
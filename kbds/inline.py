@@ -59,7 +59,7 @@ def get_products_btns(
     category: int,
     page: int,
     pagination_btns: dict,
-    product_id: int,
+    product_id: int | None,
     sizes: tuple[int] = (2, 1)
 ):
     keyboard = InlineKeyboardBuilder()
@@ -68,8 +68,10 @@ def get_products_btns(
                 callback_data=MenuCallBack(level=level-1, menu_name='catalog').pack()))
     keyboard.add(InlineKeyboardButton(text='Кошик 🛒',
                 callback_data=MenuCallBack(level=3, menu_name='cart').pack()))
-    keyboard.add(InlineKeyboardButton(text='Додати в кошик 🧺',
-                callback_data=MenuCallBack(level=level, menu_name='add_to_cart', product_id=product_id).pack()))
+    # Порожня категорія - додавати в кошик нічого
+    if product_id is not None:
+        keyboard.add(InlineKeyboardButton(text='Додати в кошик 🧺',
+                    callback_data=MenuCallBack(level=level, menu_name='add_to_cart', product_id=product_id).pack()))
 
     keyboard.adjust(*sizes)
 
@@ -142,15 +144,30 @@ def get_user_cart(
 def get_user_orders(
     *,
     level: int,
-    product_id: int | None,
-    sizes: tuple[int] = (1)
+    page: int | None,
+    pagination_btns: dict | None,
+    sizes: tuple[int] = (2,)
 ):
     keyboard = InlineKeyboardBuilder()
     keyboard.add(
         InlineKeyboardButton(text='На головну 🏡',
                 callback_data=MenuCallBack(level=0, menu_name='main').pack()))
+    keyboard.add(
+        InlineKeyboardButton(text='Кошик 🛒',
+                callback_data=MenuCallBack(level=3, menu_name='cart').pack()))
 
-    return keyboard.adjust(*sizes).as_markup()
+    keyboard.adjust(*sizes)
+
+    row = []
+    for text, menu_name in (pagination_btns or {}).items():
+        if menu_name == "next":
+            row.append(InlineKeyboardButton(text=text,
+                    callback_data=MenuCallBack(level=level, menu_name='my_orders', page=page + 1).pack()))
+        elif menu_name == "previous":
+            row.append(InlineKeyboardButton(text=text,
+                    callback_data=MenuCallBack(level=level, menu_name='my_orders', page=page - 1).pack()))
+
+    return keyboard.row(*row).as_markup()
 
 
 def get_callback_btns(*, btns: dict[str, str], sizes: tuple[int] = (2,)):
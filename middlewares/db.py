@@ -3,12 +3,36 @@ from typing import Any, Awaitable, Callable, Dict
 from aiogram import BaseMiddleware
 from aiogram.types import Message, TelegramObject
 
-from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+
+# Сесія, яка створюється лише при першому зверненні до неї з хендлера.
+# Апдейти, що не працюють з БД (наприклад, cleaner у групах), сесію не відкривають.
+class LazySession:
+    def __init__(self, session_pool: async_sessionmaker):
+        self._session_pool = session_pool
+        self._session: AsyncSession | None = None
+
+    @property
+    def used(self) -> bool:
+        return self._session is not None
+
+    def __getattr__(self, name: str):
+        if self._session is None:
+            self._session = self._session_pool()
+        return getattr(self._session, name)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
 
 
 class DataBaseSession(BaseMiddleware):
     def __init__(self, session_pool: async_sessionmaker):
         self.session_pool = session_pool
+        # Скільки апдейтів всього пройшло і скільки з них реально звертались до БД
+        self.updates = 0
+        self.db_updates = 0
 
 
     async def __call__(
@@ -17,6 +41,16 @@ class DataBaseSession(BaseMiddleware):
         event: TelegramObject,
         data: Dict[str, Any],
     ) -> Any:
-        async with self.session_pool() as session:
-            data['session'] = session
-            return await handler(event, data)
\ No newline at end of file
+        session = LazySession(self.session_pool)
+        data['session'] = session
+        try:
+            return await handler(event, data)
+        finally:
+            self.updates += 1
+            if session.used:
+                self.db_updates += 1
+            # З'єднання повертається в пул одразу після хендлера
+            await session.close()
+
+    def stats(self) -> dict:
+        return {"updates": self.updates, "db_updates": self.db_updates}
@@ -0,0 +1,161 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+
+
+# Методи, на які діють ліміти Telegram на відправку повідомлень
+THROTTLED_PREFIXES = ("send", "copy", "forward", "edit")
+# Ліміт на чат стосується нових повідомлень; редагування (кліки по кнопкам меню)
+# обмежує лише глобальний бакет, щоб швидкі кліки не чекали в черзі чату
+CHAT_EXEMPT_PREFIXES = ("edit",)
+
+_bulk: ContextVar[bool] = ContextVar("bulk_sends", default=False)
+
+
+@contextmanager
+def bulk_sends():
+    # Масові відправки (перелік товарів для адміна, розсилки) йдуть з меншою
+    # пріоритетністю і не забирають увесь глобальний ліміт у відповідей користувачам:
+    #   with bulk_sends():
+    #       await message.answer_photo(...)
+    token = _bulk.set(True)
+    try:
+        yield
+    finally:
+        _bulk.reset(token)
+
+
+# Токен-бакет з резервуванням: кожен виклик одразу займає токен
+# і отримує, скільки йому чекати. Черга виходить FIFO без окремих воркерів.
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self) -> float:
+        self._refill()
+        self._tokens -= 1
+        if self._tokens >= 0:
+            return 0.0
+        return -self._tokens / self.rate
+
+    def pause(self, seconds: float):
+        # Після RetryAfter нічого не відправляємо в цей чат протягом seconds
+        self._refill()
+        self._tokens = min(self._tokens, 0) - seconds * self.rate
+
+    @property
+    def idle(self) -> bool:
+        self._refill()
+        return self._tokens >= self.capacity
+
+
+class FloodControl(BaseRequestMiddleware):
+    def __init__(
+        self,
+        global_rate: float = 30,
+        bulk_rate: float = 20,
+        chat_rate: float = 1,
+        group_rate: float = 20 / 60,
+        burst: int = 3,
+        max_retries: int = 3,
+    ):
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.bulk_bucket = TokenBucket(bulk_rate, bulk_rate)
+        self.chat_rate = chat_rate
+        self.group_rate = group_rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self._chat_buckets: dict[int | str, TokenBucket] = {}
+        # Метрики
+        self.waiting = 0
+        self.sent = 0
+        self.retries = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _chat_bucket(self, chat_id: int | str) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self._chat_buckets) > 10000:
+                # Прибираємо бакети чатів, які давно нічого не отримували
+                self._chat_buckets = {k: b for k, b in self._chat_buckets.items() if not b.idle}
+            # Групи (від'ємний chat_id) мають значно жорсткіший ліміт
+            is_group = isinstance(chat_id, str) or chat_id < 0
+            bucket = TokenBucket(self.group_rate if is_group else self.chat_rate, self.burst)
+            self._chat_buckets[chat_id] = bucket
+        return bucket
+
+    async def _wait_turn(self, chat_id: int | str | None):
+        started = time.monotonic()
+        self.waiting += 1
+        try:
+            # Спочатку чекаємо черги в своєму чаті, і лише потім займаємо глобальний ліміт,
+            # щоб довга черга одного чату не "з'їдала" його наперед
+            if chat_id is not None:
+                await self._sleep(self._chat_bucket(chat_id).reserve())
+            if _bulk.get():
+                await self._sleep(self.bulk_bucket.reserve())
+            await self._sleep(self.global_bucket.reserve())
+        finally:
+            self.waiting -= 1
+            waited = time.monotonic() - started
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+
+    @staticmethod
+    async def _sleep(delay: float):
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        if not method.__api_method__.startswith(THROTTLED_PREFIXES):
+            return await make_request(bot, method)
+
+        chat_id = getattr(method, "chat_id", None)
+        is_edit = method.__api_method__.startswith(CHAT_EXEMPT_PREFIXES)
+        for attempt in range(self.max_retries + 1):
+            await self._wait_turn(None if is_edit else chat_id)
+            try:
+                response = await make_request(bot, method)
+                self.sent += 1
+                return response
+            except TelegramRetryAfter as e:
+                if attempt == self.max_retries:
+                    raise
+                self.retries += 1
+                if is_edit:
+                    # Чекає лише це редагування; надсилання в чат і решта бота - ні
+                    await self._sleep(e.retry_after)
+                    continue
+                bucket = self._chat_bucket(chat_id) if chat_id is not None else self.global_bucket
+                bucket.pause(e.retry_after)
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self.waiting,
+            "sent": self.sent,
+            "retries": self.retries,
+            "total_wait_seconds": round(self.total_wait, 3),
+            "max_wait_seconds": round(self.max_wait, 3),
+            "chats": len(self._chat_buckets),
+        }
@@ -0,0 +1,196 @@
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import TelegramObject
+from aiohttp import web
+
+
+# Метрики у текстовому форматі Prometheus без сторонніх бібліотек:
+# - bot_handler_duration_seconds / bot_handler_errors_total / bot_handler_in_flight
+#   з мітками router, handler, level (MenuCallBack.level або "-");
+# - bot_api_request_duration_seconds / bot_api_errors_total з міткою method;
+# - знімки stats() (пул БД, планувальник, FSM, flood control) як gauge.
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: Labels, extra: Labels = ()) -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in labels + extra]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def render(self, name: str, labels: Labels) -> list[str]:
+        lines, total = [], 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            lines.append(f"{name}_bucket{_labels(labels, (('le', str(bound)),))} {total}")
+        lines.append(f"{name}_bucket{_labels(labels, (('le', '+Inf'),))} {self.count}")
+        lines.append(f"{name}_sum{_labels(labels)} {self.sum:.6f}")
+        lines.append(f"{name}_count{_labels(labels)} {self.count}")
+        return lines
+
+
+class Metrics:
+    def __init__(self):
+        self._histograms: dict[str, dict[Labels, Histogram]] = {}
+        self._counters: dict[str, dict[Labels, float]] = {}
+        self._gauges: dict[str, dict[Labels, float]] = {}
+        self._help: dict[str, str] = {}
+        self._collectors: list[Callable[[], dict]] = []
+
+    def describe(self, name: str, text: str):
+        self._help[name] = text
+
+    def observe(self, name: str, value: float, **labels: str):
+        series = self._histograms.setdefault(name, {})
+        key = tuple(labels.items())
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = Histogram()
+        histogram.observe(value)
+
+    def inc(self, name: str, value: float = 1, **labels: str):
+        series = self._counters.setdefault(name, {})
+        key = tuple(labels.items())
+        series[key] = series.get(key, 0) + value
+
+    def gauge_add(self, name: str, value: float, **labels: str):
+        series = self._gauges.setdefault(name, {})
+        key = tuple(labels.items())
+        series[key] = series.get(key, 0) + value
+
+    def collector(self, stats: Callable[[], dict]):
+        # stats() -> {"scheduler": {"pending": 0, ...}, ...} стає bot_scheduler_pending
+        self._collectors.append(stats)
+
+    def _collected(self) -> dict[str, float]:
+        values = {}
+        for stats in self._collectors:
+            for section, fields in stats().items():
+                for field, value in fields.items():
+                    # Нечислові поля (наприклад, назва класу пулу) пропускаємо
+                    if isinstance(value, (int, float)) and not isinstance(value, bool):
+                        values[f"bot_{section}_{field}"] = value
+        return values
+
+    def render(self) -> str:
+        lines = []
+
+        def header(name: str, kind: str):
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        for name, series in sorted(self._histograms.items()):
+            header(name, "histogram")
+            for labels, histogram in series.items():
+                lines.extend(histogram.render(name, labels))
+        for name, series in sorted(self._counters.items()):
+            header(name, "counter")
+            lines.extend(f"{name}{_labels(labels)} {value:g}" for labels, value in series.items())
+        for name, series in sorted(self._gauges.items()):
+            header(name, "gauge")
+            lines.extend(f"{name}{_labels(labels)} {value:g}" for labels, value in series.items())
+        for name, value in sorted(self._collected().items()):
+            header(name, "gauge")
+            lines.append(f"{name} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+metrics.describe("bot_handler_duration_seconds", "Час роботи хендлера")
+metrics.describe("bot_handler_errors_total", "Винятки в хендлерах")
+metrics.describe("bot_handler_in_flight", "Хендлери, що виконуються зараз")
+metrics.describe("bot_api_request_duration_seconds", "Час виклику Bot API (без очікування в flood control)")
+metrics.describe("bot_api_errors_total", "Помилки викликів Bot API")
+
+
+# Inner-middleware для dp.message / dp.callback_query / ...: спрацьовує, коли хендлер
+# уже знайдено, тож у data є handler, event_router і результат фільтра callback_data
+class HandlerMetrics(BaseMiddleware):
+    def __init__(self, registry: Metrics = metrics):
+        self.metrics = registry
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        callback_data = data.get("callback_data")
+        labels = {
+            "router": data["event_router"].name,
+            "handler": data["handler"].callback.__name__,
+            "level": str(getattr(callback_data, "level", "-")),
+        }
+        self.metrics.gauge_add("bot_handler_in_flight", 1, **labels)
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            self.metrics.inc("bot_handler_errors_total", **labels)
+            raise
+        finally:
+            self.metrics.observe("bot_handler_duration_seconds", time.perf_counter() - started, **labels)
+            self.metrics.gauge_add("bot_handler_in_flight", -1, **labels)
+
+
+# Middleware сесії бота. Реєструється після FloodControl, тому міряє лише сам виклик API
+class BotApiMetrics(BaseRequestMiddleware):
+    def __init__(self, registry: Metrics = metrics):
+        self.metrics = registry
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        except Exception as e:
+            self.metrics.inc("bot_api_errors_total", method=method.__api_method__, error=type(e).__name__)
+            raise
+        finally:
+            self.metrics.observe(
+                "bot_api_request_duration_seconds", time.perf_counter() - started, method=method.__api_method__
+            )
+
+
+async def serve_metrics(registry: Metrics, host: str, port: int) -> web.AppRunner:
+    async def handle(request: web.Request):
+        return web.Response(text=registry.render(), content_type="text/plain", charset="utf-8",
+                            headers={"X-Content-Type-Options": "nosniff"})
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host=host, port=port).start()
+    return runner
@@ -0,0 +1,116 @@
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import CallbackQuery, TelegramObject
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+
+# Облік SQL-запитів у межах одного апдейту:
+# - кількість запитів і сумарний час у БД - в один структурований (JSON) рядок логу (DEBUG);
+# - запит довший за slow_query_ms - окреме попередження з хендлером, callback data і SQL;
+# - той самий за формою запит більше n_plus_one разів за апдейт - ймовірний N+1.
+# Хуки рушія (track_queries) пишуть у стан поточного апдейту через ContextVar:
+# asyncio-задача апдейту і greenlet SQLAlchemy бачать один і той самий контекст.
+
+_current: ContextVar["UpdateQueries | None"] = ContextVar("update_queries", default=None)
+
+# IN (?, ?, ?) і VALUES (...), (...) з різною кількістю елементів - одна й та сама форма
+_IN_LIST = re.compile(r"\(\s*(?:\?|%s|\$\d+|:\w+)(?:\s*,\s*(?:\?|%s|\$\d+|:\w+))*\s*\)")
+_SPACES = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    return _IN_LIST.sub("(?)", _SPACES.sub(" ", statement).strip())
+
+
+class UpdateQueries:
+    def __init__(self, handler: str, callback_data: str | None):
+        self.handler = handler
+        self.callback_data = callback_data
+        self.count = 0
+        self.db_time = 0.0
+        self.shapes: Counter[str] = Counter()
+
+
+def track_queries(engine: AsyncEngine, slow_query_ms: float = 100):
+    sync_engine = engine.sync_engine
+
+    # Час старту зберігається в контексті виконання запиту, а не в з'єднанні:
+    # якщо запит упав, after_cursor_execute не викликається, і контекст просто зникає
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if _current.get() is not None and context is not None:
+            context.query_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        queries = _current.get()
+        started = getattr(context, "query_started", None)
+        if queries is None or started is None:
+            return
+        elapsed = time.perf_counter() - started
+        queries.count += 1
+        queries.db_time += elapsed
+        queries.shapes[statement_shape(statement)] += 1
+        if elapsed * 1000 >= slow_query_ms:
+            logger.warning(
+                "Повільний запит %.1f мс: handler=%s callback_data=%s\n%s",
+                elapsed * 1000, queries.handler, queries.callback_data, statement,
+            )
+
+
+# Inner-middleware для dp.message / dp.callback_query / ... (як HandlerMetrics):
+# рахує лише запити, виконані хендлером апдейту
+class QueryTracker(BaseMiddleware):
+    def __init__(self, n_plus_one: int = 5):
+        self.n_plus_one = n_plus_one
+        self.suspects = 0
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        queries = UpdateQueries(
+            handler=data["handler"].callback.__name__,
+            callback_data=event.data if isinstance(event, CallbackQuery) else None,
+        )
+        token = _current.set(queries)
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            _current.reset(token)
+            self._report(queries, time.perf_counter() - started, data)
+
+    def _report(self, queries: UpdateQueries, elapsed: float, data: Dict[str, Any]):
+        repeated = {shape: n for shape, n in queries.shapes.items() if n > self.n_plus_one}
+        for shape, n in repeated.items():
+            self.suspects += 1
+            logger.warning(
+                "Ймовірний N+1: %d однакових запитів за апдейт, handler=%s callback_data=%s\n%s",
+                n, queries.handler, queries.callback_data, shape,
+            )
+        # Підсумок на кожен апдейт - лише для відладки; повільні запити і N+1 - завжди
+        if queries.count and logger.isEnabledFor(logging.DEBUG):
+            user = data.get("event_from_user")
+            logger.debug(json.dumps({
+                "event": "update_queries",
+                "handler": queries.handler,
+                "callback_data": queries.callback_data,
+                "user_id": user.id if user else None,
+                "queries": queries.count,
+                "db_ms": round(queries.db_time * 1000, 2),
+                "handler_ms": round(elapsed * 1000, 2),
+                "max_repeats": max(queries.shapes.values()),
+            }, ensure_ascii=False))
@@ -0,0 +1,91 @@
+import asyncio
+from contextlib import nullcontext
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.types import TelegramObject, Update, User
+
+
+# Планувальник апдейтів (outer-middleware для dp.update, працює до DataBaseSession):
+# - апдейти одного користувача обробляються строго по черзі;
+# - різні користувачі обробляються паралельно, але не більше max_concurrency одночасно;
+# - якщо в черзі вже max_pending апдейтів, нові відкидаються,
+#   а на callback відповідаємо коротким "зайнято".
+class UpdateScheduler(BaseMiddleware):
+    def __init__(
+        self,
+        max_concurrency: int = 50,
+        max_pending: int = 1000,
+        busy_text: str = "Бот зараз перевантажений, спробуйте за мить 🙏",
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_pending = max_pending
+        self.busy_text = busy_text
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._user_locks: dict[int, asyncio.Lock] = {}
+        self._user_refs: dict[int, int] = {}
+        self.pending = 0
+        self.running = 0
+        self.processed = 0
+        self.shed = 0
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        if self.pending + self.running >= self.max_pending:
+            self.shed += 1
+            await self._answer_busy(event, data['bot'])
+            return None
+
+        user: User | None = data.get('event_from_user')
+        lock = self._acquire_user_lock(user.id) if user else nullcontext()
+        self.pending += 1
+        started = False
+        try:
+            async with lock, self._slots:
+                self.pending -= 1
+                self.running += 1
+                started = True
+                try:
+                    return await handler(event, data)
+                finally:
+                    self.running -= 1
+                    self.processed += 1
+        finally:
+            if not started:
+                self.pending -= 1
+            if user:
+                self._release_user_lock(user.id)
+
+    def _acquire_user_lock(self, user_id: int) -> asyncio.Lock:
+        # Замок живе, поки в користувача є апдейти в черзі
+        lock = self._user_locks.get(user_id)
+        if lock is None:
+            lock = self._user_locks[user_id] = asyncio.Lock()
+        self._user_refs[user_id] = self._user_refs.get(user_id, 0) + 1
+        return lock
+
+    def _release_user_lock(self, user_id: int):
+        self._user_refs[user_id] -= 1
+        if not self._user_refs[user_id]:
+            del self._user_refs[user_id]
+            del self._user_locks[user_id]
+
+    async def _answer_busy(self, event: TelegramObject, bot: Bot):
+        if isinstance(event, Update) and event.callback_query:
+            try:
+                await bot.answer_callback_query(event.callback_query.id, text=self.busy_text)
+            except Exception:
+                pass
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.pending,
+            "running": self.running,
+            "processed": self.processed,
+            "shed": self.shed,
+            "users": len(self._user_locks),
+        }
@@ -0,0 +1,40 @@
+import os
+
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+os.environ.setdefault("TOKEN", "42:TEST")
+os.environ.setdefault("DB_LITE", "sqlite+aiosqlite:///:memory:")
+
+from database.engine import make_engine
+from database.models import Base, Category, Product
+
+
+@pytest_asyncio.fixture
+async def session_maker(tmp_path):
+    # Окрема файлова БД на кожен тест, щоб паралельні сесії бачили одні й ті самі дані
+    engine = make_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def session(session_maker):
+    async with session_maker() as session:
+        yield session
+
+
+@pytest_asyncio.fixture
+async def catalog(session):
+    # Дві категорії та кілька продуктів у першій
+    fruits, berries = Category(name="Фрукти"), Category(name="Ягоди")
+    session.add_all([fruits, berries])
+    await session.flush()
+    session.add_all([
+        Product(name=f"Продукт {i}", price=10 + i, image=f"file_{i}", category_id=fruits.id)
+        for i in range(1, 6)
+    ])
+    await session.commit()
+    return fruits, berries
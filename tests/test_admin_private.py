@@ -0,0 +1,55 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from database.models import Product
+from handlers.admin_private import starring_at_product
+
+
+@pytest.mark.asyncio
+async def test_catalog_listing_is_sent_as_media_group_pages(session, catalog):
+    fruits, _ = catalog
+    session.add_all([
+        Product(name=f"Додатковий {i}", price=1, image=f"extra_{i}", category_id=fruits.id)
+        for i in range(7)
+    ])
+    await session.commit()
+
+    callback = MagicMock()
+    callback.answer = AsyncMock()
+    callback.message.answer = AsyncMock()
+    callback.message.answer_media_group = AsyncMock()
+
+    callback.data = f"category_{fruits.id}"
+    await starring_at_product(callback, session)
+    media = callback.message.answer_media_group.await_args.kwargs["media"]
+    assert len(media) == 10 and media[0].caption.startswith("1. ")
+    markup = callback.message.answer.await_args.kwargs["reply_markup"]
+    buttons = {b.text: b.callback_data for row in markup.inline_keyboard for b in row}
+    assert buttons["🗑 1"] == "delete_1" and buttons["✏️ 10"] == "change_10"
+    assert buttons["Слід. ▶"] == f"category_{fruits.id}_2"
+
+    callback.data = f"category_{fruits.id}_2"
+    await starring_at_product(callback, session)
+    media = callback.message.answer_media_group.await_args.kwargs["media"]
+    assert len(media) == 2 and media[0].caption.startswith("11. ")
+
+
+@pytest.mark.asyncio
+async def test_single_product_page_is_sent_as_photo(session, catalog):
+    _, berries = catalog
+    session.add(Product(name="Малина", price=5, image="raspberry", category_id=berries.id))
+    await session.commit()
+
+    callback = MagicMock()
+    callback.answer = AsyncMock()
+    callback.message.answer = AsyncMock()
+    callback.message.answer_photo = AsyncMock()
+    callback.message.answer_media_group = AsyncMock()
+
+    callback.data = f"category_{berries.id}"
+    await starring_at_product(callback, session)
+    callback.message.answer_media_group.assert_not_awaited()
+    kwargs = callback.message.answer_photo.await_args.kwargs
+    assert kwargs["photo"] == "raspberry" and kwargs["caption"].startswith("1. ")
+    assert callback.message.answer.await_args.args[0].startswith("Товари 1-1 з 1")
@@ -0,0 +1,74 @@
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from database.orm_query import orm_replace_chat_admins
+from utils.admin_registry import AdminRegistry, utcnow
+
+
+def member(user_id: int, status: str):
+    return SimpleNamespace(user=SimpleNamespace(id=user_id), status=status)
+
+
+@pytest.mark.asyncio
+async def test_refresh_persists_and_cold_start_loads_from_db(session):
+    bot = AsyncMock()
+    bot.get_chat_administrators.return_value = [
+        member(1, "creator"), member(2, "administrator"), member(3, "member"),
+    ]
+    registry = AdminRegistry(admin_chats={-100})
+    await registry.refresh_chat(bot, session, chat_id=-100)
+
+    assert registry.is_admin(1) and registry.is_admin(2, chat_id=-100)
+    assert not registry.is_admin(3) and not registry.is_admin(1, chat_id=-200)
+
+    # Інший процес / перезапуск: жодного виклику API, дані з БД
+    other = AdminRegistry()
+    await other.load(session)
+    assert other.chat_admins(-100) == {1, 2}
+    bot.get_chat_administrators.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_load_picks_up_refresh_from_another_process(session):
+    bot = AsyncMock()
+    first, second = AdminRegistry(admin_chats={-100}), AdminRegistry(admin_chats={-100})
+
+    bot.get_chat_administrators.return_value = [member(1, "creator")]
+    await first.refresh_chat(bot, session, chat_id=-100)
+    await second.load(session)
+
+    bot.get_chat_administrators.return_value = [member(1, "creator"), member(5, "administrator")]
+    await first.refresh_chat(bot, session, chat_id=-100)
+    await second.load(session)
+    assert second.is_admin(5)
+
+
+@pytest.mark.asyncio
+async def test_only_configured_chats_grant_shop_admin(session):
+    bot = AsyncMock()
+    registry = AdminRegistry(admin_chats={-100})
+
+    bot.get_chat_administrators.return_value = [member(1, "creator")]
+    await registry.refresh_chat(bot, session, chat_id=-100)
+    # Хтось додав бота у свою групу
+    bot.get_chat_administrators.return_value = [member(7, "creator")]
+    await registry.refresh_chat(bot, session, chat_id=-999)
+
+    assert registry.is_admin(1)
+    assert registry.is_admin(7, chat_id=-999) and not registry.is_admin(7)
+
+
+@pytest.mark.asyncio
+async def test_load_drops_chats_removed_from_db(session):
+    bot = AsyncMock()
+    bot.get_chat_administrators.return_value = [member(1, "creator")]
+    writer, reader = AdminRegistry(admin_chats={-100}), AdminRegistry(admin_chats={-100})
+    await writer.refresh_chat(bot, session, chat_id=-100)
+    await reader.load(session)
+    assert reader.is_admin(1)
+
+    await orm_replace_chat_admins(session, -100, set(), utcnow())
+    await reader.load(session)
+    assert not reader.is_admin(1) and reader.chat_admins(-100) == set()
@@ -0,0 +1,119 @@
+import asyncio
+import multiprocessing
+
+import pytest
+
+from database.models import Banner
+from database.orm_query import catalog_cache, orm_change_banner_image, orm_get_banner
+from utils.cache import AsyncTTLCache
+
+
+@pytest.mark.asyncio
+async def test_single_flight_coalesces_concurrent_loads():
+    cache = AsyncTTLCache(ttl=60)
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "banner"
+
+    results = await asyncio.gather(*(cache.get_or_load(("banner", "main"), loader) for _ in range(500)))
+
+    assert results == ["banner"] * 500
+    assert calls == 1
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["coalesced"] == 499
+
+
+@pytest.mark.asyncio
+async def test_ttl_and_invalidation():
+    cache = AsyncTTLCache(ttl=0)
+    values = iter(range(10))
+
+    async def loader():
+        return next(values)
+
+    assert await cache.get_or_load(("categories",), loader) == 0
+    # ttl=0 - запис одразу застаріває
+    assert await cache.get_or_load(("categories",), loader) == 1
+
+    cache.ttl = 60
+    assert await cache.get_or_load(("categories",), loader) == 2
+    assert await cache.get_or_load(("categories",), loader) == 2
+    assert cache.hits == 1
+
+    cache.invalidate("categories")
+    assert await cache.get_or_load(("categories",), loader) == 3
+
+
+@pytest.mark.asyncio
+async def test_caller_after_invalidation_does_not_join_stale_load():
+    cache = AsyncTTLCache(ttl=60)
+    started, release = asyncio.Event(), asyncio.Event()
+    versions = iter(["old", "new"])
+
+    async def loader():
+        value = next(versions)
+        if value == "old":
+            started.set()
+            await release.wait()
+        return value
+
+    stale = asyncio.create_task(cache.get_or_load(("banner", "main"), loader))
+    await started.wait()
+    # Банер змінили, поки перше завантаження ще читало стару версію
+    cache.invalidate("banner")
+    fresh = await asyncio.wait_for(cache.get_or_load(("banner", "main"), loader), 1)
+    release.set()
+
+    assert fresh == "new" and await stale == "old"
+    assert await cache.get_or_load(("banner", "main"), loader) == "new"
+
+
+@pytest.mark.asyncio
+async def test_shared_version_invalidates_other_caches():
+    version = multiprocessing.get_context("spawn").Value("Q", 0)
+    first, second = AsyncTTLCache(ttl=60), AsyncTTLCache(ttl=60)
+    first.share(version)
+    second.share(version)
+
+    async def load(value):
+        return value
+
+    await first.get_or_load(("categories",), lambda: load("old"))
+    await second.get_or_load(("banner", "main"), lambda: load("old"))
+    await second.get_or_load(("categories",), lambda: load("old"))
+
+    # Інвалідація "banner" в одному кеші очищає інший повністю...
+    second.invalidate("banner")
+    assert await first.get_or_load(("categories",), lambda: load("new")) == "new"
+    # ...а свої записи з інших просторів імен лишає
+    assert await second.get_or_load(("categories",), lambda: load("new")) == "old"
+
+
+@pytest.mark.asyncio
+async def test_loader_error_is_not_cached():
+    cache = AsyncTTLCache(ttl=60)
+
+    async def failing():
+        raise RuntimeError("db down")
+
+    async def ok():
+        return "ok"
+
+    with pytest.raises(RuntimeError):
+        await cache.get_or_load(("banner", "main"), failing)
+    assert await cache.get_or_load(("banner", "main"), ok) == "ok"
+
+
+@pytest.mark.asyncio
+async def test_change_banner_image_invalidates_cache(session):
+    catalog_cache.invalidate()
+    session.add(Banner(name="main", description="Ласкаво просимо!"))
+    await session.commit()
+
+    assert (await orm_get_banner(session, "main")).image is None
+    await orm_change_banner_image(session, "main", "file_id")
+    assert (await orm_get_banner(session, "main")).image == "file_id"
@@ -0,0 +1,83 @@
+import asyncio
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event, select
+
+from database.models import Cart, User
+from database.orm_query import catalog_cache, orm_add_to_cart, orm_get_user_cart_page, orm_reduce_product_in_cart
+from handlers.menu_processing import get_menu_content
+
+
+@pytest.mark.asyncio
+async def test_cart_page_aggregates_in_db(session, catalog):
+    session.add(User(user_id=1))
+    session.add_all([
+        Cart(user_id=1, product_id=1, quantity=2),  # 11 x 2
+        Cart(user_id=1, product_id=3, quantity=1),  # 13 x 1
+        Cart(user_id=2, product_id=2, quantity=5),  # чужий кошик
+    ])
+    await session.commit()
+
+    paginator, total_price = await orm_get_user_cart_page(session, 1, page=2)
+    [cart] = paginator.get_page()
+    assert cart.product.name == "Продукт 3"
+    assert (paginator.page, paginator.pages) == (2, 2)
+    assert Decimal(total_price) == Decimal("35")
+
+
+@pytest.mark.asyncio
+async def test_empty_cart_page(session, catalog):
+    paginator, total_price = await orm_get_user_cart_page(session, 1)
+    assert paginator.len == 0 and paginator.get_page() == []
+    assert total_price == 0
+
+    # Банера "cart" немає - екран порожнього кошика все одно рендериться
+    catalog_cache.invalidate()
+    image, kbds = await get_menu_content(session, level=3, menu_name="cart", page=1, user_id=1)
+    assert image.caption == "<strong>Інформація недоступна</strong>" and kbds is not None
+
+
+@pytest.mark.asyncio
+async def test_concurrent_add_to_cart_keeps_single_row(session_maker, catalog):
+    async def add():
+        async with session_maker() as session:
+            await orm_add_to_cart(session, user_id=1, product_id=1)
+
+    await asyncio.gather(*(add() for _ in range(20)))
+
+    async with session_maker() as session:
+        carts = (await session.execute(select(Cart))).scalars().all()
+    assert [(c.user_id, c.product_id, c.quantity) for c in carts] == [(1, 1, 20)]
+
+
+@pytest.mark.asyncio
+async def test_reduce_product_in_cart(session, catalog):
+    await orm_add_to_cart(session, user_id=1, product_id=1)
+    await orm_add_to_cart(session, user_id=1, product_id=1)
+
+    assert await orm_reduce_product_in_cart(session, 1, 1) is True
+    assert await orm_reduce_product_in_cart(session, 1, 1) is False
+    assert await orm_reduce_product_in_cart(session, 1, 1) is None
+    assert (await session.execute(select(Cart))).first() is None
+
+
+@pytest.mark.asyncio
+async def test_reduce_does_not_delete_concurrently_increased_item(session, catalog):
+    await orm_add_to_cart(session, user_id=1, product_id=1)
+    engine = session.bind.sync_engine
+    raced = []
+
+    def add_one_before_delete(conn, cursor, statement, parameters, context, executemany):
+        # Інший запит додав товар між UPDATE і DELETE
+        if statement.startswith("DELETE FROM cart") and not raced:
+            raced.append(True)
+            conn.exec_driver_sql("UPDATE cart SET quantity = quantity + 1")
+
+    event.listen(engine, "before_cursor_execute", add_one_before_delete)
+    try:
+        assert await orm_reduce_product_in_cart(session, 1, 1) is True
+    finally:
+        event.remove(engine, "before_cursor_execute", add_one_before_delete)
+    assert raced
+    assert (await session.execute(select(Cart.quantity))).scalar() == 1
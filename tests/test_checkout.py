@@ -0,0 +1,191 @@
+import asyncio
+import os
+import sqlite3
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from database.engine import make_engine
+from database.models import Banner, Base, Cart, Category, OrderItems, Orders, Product, User
+from database.orm_query import orm_add_to_cart, orm_transfer_cart_to_order
+from handlers.user_private import checkout_key, my_orders
+from kbds.inline import MenuCallBack
+
+
+async def fill_cart(session, user_id, lines):
+    session.add(User(user_id=user_id))
+    await session.commit()
+    for product_id, quantity in lines:
+        for _ in range(quantity):
+            await orm_add_to_cart(session, user_id, product_id)
+
+
+async def count(session, model):
+    return (await session.execute(select(func.count()).select_from(model))).scalar()
+
+
+@pytest.mark.asyncio
+async def test_checkout_copies_cart_into_order(session, catalog):
+    await fill_cart(session, 1, [(1, 2), (3, 1)])
+
+    order = await orm_transfer_cart_to_order(session, 1, idempotency_key="k1")
+    # 2 * 11 + 1 * 13
+    assert float(order.total_price) == 35
+    items = (await session.execute(select(OrderItems).order_by(OrderItems.product_id))).scalars().all()
+    assert [(i.order_id, i.product_id, i.quantity, float(i.price), i.status) for i in items] == [
+        (order.id, 1, 2, 11, "pending"),
+        (order.id, 3, 1, 13, "pending"),
+    ]
+    assert await count(session, Cart) == 0
+
+    # Повтор з тим самим ключем - те саме замовлення; порожній кошик - None
+    assert (await orm_transfer_cart_to_order(session, 1, idempotency_key="k1")).id == order.id
+    assert await orm_transfer_cart_to_order(session, 1, idempotency_key="k2") is None
+    assert await count(session, Orders) == 1
+
+
+async def add_during_checkout(session_maker):
+    # Поки йде оформлення, користувач додає ще товари: кожна одиниця має опинитись
+    # або в замовленні, або в кошику, а сума замовлення - збігатися з його рядками
+    async with session_maker() as session:
+        await fill_cart(session, 1, [(1, 1)])
+        product_id = (await session.execute(select(Product.id).order_by(Product.id).offset(1))).scalar()
+
+    async def add():
+        async with session_maker() as s:
+            await orm_add_to_cart(s, 1, product_id)
+
+    async def checkout():
+        async with session_maker() as s:
+            return await orm_transfer_cart_to_order(s, 1, idempotency_key="k")
+
+    results = await asyncio.gather(*[add() for _ in range(10)], checkout(), *[add() for _ in range(10)])
+    order = results[10]
+
+    async with session_maker() as session:
+        items = (await session.execute(select(OrderItems).where(OrderItems.order_id == order.id))).scalars().all()
+        ordered = sum(i.quantity for i in items if i.product_id == product_id)
+        in_cart = (await session.execute(
+            select(func.coalesce(func.sum(Cart.quantity), 0)).where(Cart.product_id == product_id)
+        )).scalar()
+    assert ordered + in_cart == 20
+    assert float(order.total_price) == sum(float(i.price) * i.quantity for i in items)
+
+
+@pytest_asyncio.fixture
+async def postgres_session_maker():
+    # Окрема БД Postgres для перевірки блокувань: TEST_PG_URL=postgresql+asyncpg://...
+    url = os.getenv("TEST_PG_URL")
+    if not url:
+        pytest.skip("TEST_PG_URL не задано")
+    engine = make_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    session_maker = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_maker() as session:
+        fruits = Category(name="Фрукти")
+        session.add(fruits)
+        await session.flush()
+        session.add_all([Product(name=f"Продукт {i}", price=10 + i, image=f"file_{i}", category_id=fruits.id) for i in (1, 2)])
+        await session.commit()
+    yield session_maker
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_add_to_cart_during_checkout_sqlite(session_maker, catalog):
+    await add_during_checkout(session_maker)
+
+
+@pytest.mark.asyncio
+async def test_add_to_cart_during_checkout_postgres(postgres_session_maker):
+    await add_during_checkout(postgres_session_maker)
+
+
+@pytest.mark.asyncio
+async def test_hundreds_of_parallel_checkouts(session_maker, session, catalog):
+    users = range(1000, 1200)
+    for user_id in users:
+        await fill_cart(session, user_id, [(1, 1), (2, 2)])
+
+    async def checkout(user_id, key):
+        async with session_maker() as s:
+            order = await orm_transfer_cart_to_order(s, user_id, idempotency_key=key)
+            return user_id, order.id if order else None
+
+    # Кожен користувач "натискає" двічі з одним ключем і ще раз - з іншим
+    calls = [checkout(u, f"{u}:a") for u in users] * 2 + [checkout(u, f"{u}:b") for u in users]
+    results = await asyncio.gather(*calls)
+
+    orders = {}
+    for user_id, order_id in results:
+        if order_id is not None:
+            orders.setdefault(user_id, set()).add(order_id)
+    assert len(orders) == 200 and all(len(ids) == 1 for ids in orders.values())
+
+    assert await count(session, Orders) == 200
+    assert await count(session, OrderItems) == 400
+    assert await count(session, Cart) == 0
+    totals = (await session.execute(select(func.sum(Orders.total_price)))).scalar()
+    # 11 + 2 * 12 на кожного
+    assert float(totals) == 200 * 35
+
+
+@pytest.mark.asyncio
+async def test_double_tap_on_order_button_creates_one_order(session, catalog):
+    await fill_cart(session, 7, [(2, 1)])
+    session.add(Banner(name="my_orders", image="banner", description="Ваші замовлення:"))
+    await session.commit()
+
+    callback = MagicMock()
+    callback.from_user.id = 7
+    callback.from_user.first_name, callback.from_user.last_name = "Ім'я", None
+    callback.message.message_id = 55
+    callback.message.date = datetime(2024, 1, 1)
+    callback.message.edit_date = datetime(2024, 1, 1, 0, 5)
+    callback.answer = AsyncMock()
+    callback.message.edit_media = AsyncMock()
+    assert checkout_key(callback) == f"7:55:{int(datetime(2024, 1, 1, 0, 5).timestamp())}"
+
+    data = MenuCallBack(level=4, menu_name="order")
+    await my_orders(callback, data, session)
+    await my_orders(callback, data, session)
+
+    first, second = callback.answer.await_args_list
+    assert first.args == second.args and "успішно" in first.args[0]
+    assert await count(session, Orders) == 1
+
+
+@pytest.mark.asyncio
+async def test_retry_waiting_on_lock_returns_order_of_first_tap(session_maker, session, catalog):
+    await fill_cart(session, 9, [(1, 1)])
+    engine = session_maker.kw["bind"]
+    tapped = []
+
+    # Перше натискання оформлює замовлення, поки друге чекає на блокування користувача
+    def first_tap(conn, cursor, statement, parameters, context, executemany):
+        if not tapped and statement.startswith("SELECT user.id"):
+            tapped.append(True)
+            with sqlite3.connect(engine.url.database) as other:
+                other.execute(
+                    "INSERT INTO orders (user_id, total_price, idempotency_key, created, updated)"
+                    " VALUES (9, 11, 'k', CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)"
+                )
+                other.execute("DELETE FROM cart WHERE user_id = 9")
+
+    event.listen(engine.sync_engine, "before_cursor_execute", first_tap)
+    try:
+        async with session_maker() as s:
+            order = await orm_transfer_cart_to_order(s, 9, idempotency_key="k")
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", first_tap)
+
+    assert tapped and order is not None and order.idempotency_key == "k"
+    assert await count(session, Orders) == 1
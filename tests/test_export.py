@@ -0,0 +1,89 @@
+import csv
+import gzip
+import os
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from aiogram.filters import CommandObject
+
+from database.models import OrderItems, Orders, Product, User
+from database.orm_query import ORDER_EXPORT_COLUMNS, PRODUCT_EXPORT_COLUMNS, orm_stream_orders, orm_stream_products
+from handlers.admin_private import export_data
+from utils.export import export_to_temp_file, parse_date_range
+
+
+def read_csv_gz(path):
+    with gzip.open(path, "rt", encoding="utf-8-sig", newline="") as file:
+        return list(csv.reader(file))
+
+
+def test_parse_date_range():
+    assert parse_date_range([]) == (None, None)
+    assert parse_date_range(["2024-03-01"]) == (datetime(2024, 3, 1), None)
+    assert parse_date_range(["2024-03-01", "2024-03-31"]) == (datetime(2024, 3, 1), datetime(2024, 4, 1))
+    for args in (["01.03.2024"], ["2024-03-02", "2024-03-01"], ["2024-03-01"] * 3):
+        with pytest.raises(ValueError):
+            parse_date_range(args)
+
+
+@pytest.mark.asyncio
+async def test_products_are_streamed_in_batches(session, catalog):
+    fruits, _ = catalog
+    session.add_all([
+        Product(name=f"Масовий {i}", price=i % 100 + 1, image=f"bulk_{i}", category_id=fruits.id)
+        for i in range(2500)
+    ])
+    await session.commit()
+
+    path, rows = await export_to_temp_file(await orm_stream_products(session), PRODUCT_EXPORT_COLUMNS)
+    try:
+        table = read_csv_gz(path)
+    finally:
+        os.remove(path)
+    assert rows == 2505
+    assert table[0] == list(PRODUCT_EXPORT_COLUMNS)
+    assert table[1] == ["1", "Продукт 1", "11.00", "Фрукти", "file_1"]
+    assert len(table) == 2506
+
+
+@pytest.mark.asyncio
+async def test_orders_export_by_date_range(session, catalog):
+    session.add(User(user_id=7))
+    for day, product_ids in ((1, [1, 2]), (15, [3]), (31, [4, 5])):
+        order = Orders(user_id=7, total_price=10 * len(product_ids), created=datetime(2024, 3, day, 12))
+        order.items = [OrderItems(product_id=p, quantity=1, price=10) for p in product_ids]
+        session.add(order)
+    await session.commit()
+
+    date_from, date_to = parse_date_range(["2024-03-15", "2024-03-31"])
+    path, rows = await export_to_temp_file(await orm_stream_orders(session, date_from, date_to), ORDER_EXPORT_COLUMNS)
+    try:
+        table = read_csv_gz(path)
+    finally:
+        os.remove(path)
+    assert rows == 3
+    assert [(row[0], row[4], row[5]) for row in table[1:]] == [
+        ("2", "3", "Продукт 3"), ("3", "4", "Продукт 4"), ("3", "5", "Продукт 5"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_export_command_sends_document_and_removes_file(session, catalog):
+    message = MagicMock()
+    message.answer = AsyncMock()
+    sent = {}
+
+    async def answer_document(document, caption):
+        sent.update(path=document.path, filename=document.filename, caption=caption, rows=read_csv_gz(document.path))
+
+    message.answer_document = answer_document
+
+    await export_data(message, CommandObject(command="export", args="products"), session)
+    assert sent["filename"].startswith("products_") and sent["filename"].endswith(".csv.gz")
+    assert sent["caption"] == "Рядків: 5" and len(sent["rows"]) == 6
+    assert not os.path.exists(sent["path"])
+
+    message.answer.reset_mock()
+    await export_data(message, CommandObject(command="export", args="orders 2024-13-01"), session)
+    assert "РРРР-ММ-ДД" in message.answer.await_args.args[0]
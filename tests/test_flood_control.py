@@ -0,0 +1,90 @@
+import asyncio
+import time
+
+import pytest
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import AnswerCallbackQuery, EditMessageMedia, SendMessage
+
+from middlewares.flood_control import FloodControl, TokenBucket, bulk_sends
+
+
+def test_token_bucket_reservations():
+    bucket = TokenBucket(rate=10, capacity=2)
+    assert bucket.reserve() == 0 and bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.01)
+    assert bucket.reserve() == pytest.approx(0.2, abs=0.01)
+
+
+@pytest.mark.asyncio
+async def test_per_chat_rate_is_enforced():
+    flood_control = FloodControl(chat_rate=20, burst=1)
+    sent = []
+
+    async def make_request(bot, method):
+        sent.append(time.monotonic())
+        return "ok"
+
+    with bulk_sends():
+        await asyncio.gather(*(
+            flood_control(make_request, None, SendMessage(chat_id=1, text=str(i))) for i in range(5)
+        ))
+
+    # 1 одразу, решта - з інтервалом 1/20 с
+    assert sent[-1] - sent[0] >= 4 / 20 * 0.9
+    assert flood_control.stats()["sent"] == 5
+    assert flood_control.stats()["queue_depth"] == 0
+
+
+@pytest.mark.asyncio
+async def test_retry_after_is_honored():
+    flood_control = FloodControl()
+    calls = []
+
+    async def make_request(bot, method):
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            raise TelegramRetryAfter(method=method, message="Flood control exceeded", retry_after=0.1)
+        return "ok"
+
+    assert await flood_control(make_request, None, SendMessage(chat_id=1, text="hi")) == "ok"
+    assert calls[1] - calls[0] >= 0.09
+    assert flood_control.retries == 1
+
+
+@pytest.mark.asyncio
+async def test_non_send_methods_are_not_throttled():
+    flood_control = FloodControl(global_rate=1)
+
+    async def make_request(bot, method):
+        return "ok"
+
+    for _ in range(5):
+        await flood_control(make_request, None, AnswerCallbackQuery(callback_query_id="1"))
+    assert flood_control.stats()["total_wait_seconds"] == 0
+
+
+@pytest.mark.asyncio
+async def test_edits_skip_per_chat_bucket():
+    flood_control = FloodControl(chat_rate=1, burst=1)
+
+    async def make_request(bot, method):
+        return "ok"
+
+    # Повідомлення займає весь ліміт чату, але редагування меню в тому ж чаті не чекають
+    await flood_control(make_request, None, SendMessage(chat_id=1, text="hi"))
+    started = time.monotonic()
+    for i in range(5):
+        await flood_control(make_request, None, EditMessageMedia(
+            chat_id=1, message_id=1, media={"type": "photo", "media": f"file_{i}"},
+        ))
+    assert time.monotonic() - started < 0.1
+    assert flood_control.stats()["sent"] == 6
+
+    # Глобальний ліміт на редагування діє
+    flood_control = FloodControl(global_rate=10, chat_rate=1, burst=1)
+    started = time.monotonic()
+    for _ in range(12):
+        await flood_control(make_request, None, EditMessageMedia(
+            chat_id=1, message_id=1, media={"type": "photo", "media": "file"},
+        ))
+    assert time.monotonic() - started >= 0.15
@@ -0,0 +1,117 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+
+from database.fsm_storage import DataBaseStorage
+from database.orm_query import orm_get_fsm_state, orm_get_product
+from handlers.admin_private import AddProduct, add_image, add_name, change_product_callback
+
+
+def key(user_id):
+    return StorageKey(bot_id=42, chat_id=user_id, user_id=user_id)
+
+
+@pytest.mark.asyncio
+async def test_writes_are_batched_and_survive_restart(session_maker):
+    storage = DataBaseStorage(session_maker, flush_interval=0.05)
+    for user_id in range(1, 21):
+        await storage.set_state(key(user_id), AddProduct.name)
+        await storage.update_data(key(user_id), {"name": f"Товар {user_id}"})
+    assert await storage.get_state(key(5)) == AddProduct.name.state
+
+    await asyncio.sleep(0.2)
+    assert storage.stats()["dirty"] == 0
+    # 40 змін - одна пачка в БД
+    assert storage.flushes == 1
+
+    restarted = DataBaseStorage(session_maker)
+    assert await restarted.get_state(key(7)) == AddProduct.name.state
+    assert await restarted.get_data(key(7)) == {"name": "Товар 7"}
+
+    # Очищений стан видаляє запис із таблиці
+    await restarted.set_state(key(7), None)
+    await restarted.set_data(key(7), {})
+    await restarted.close()
+    async with session_maker() as session:
+        assert await orm_get_fsm_state(session, restarted.key_builder.build(key(7))) is None
+        assert await orm_get_fsm_state(session, restarted.key_builder.build(key(8))) is not None
+
+
+@pytest.mark.asyncio
+async def test_reads_are_served_from_local_cache(session_maker):
+    storage = DataBaseStorage(session_maker, flush_interval=60)
+    assert await storage.get_state(key(1)) is None
+    assert await storage.get_state(key(1)) is None
+    await storage.set_state(key(1), AddProduct.price)
+    assert await storage.get_state(key(1)) == AddProduct.price.state
+    assert storage.reads == 1
+
+    await storage.close()
+    assert storage.stats()["dirty"] == 0
+
+
+@pytest.mark.asyncio
+async def test_group_messages_do_not_read_storage(session_maker):
+    storage = DataBaseStorage(session_maker, flush_interval=60)
+    # Повідомлення в групі від різних учасників, кожен пише кілька разів
+    for _ in range(3):
+        for user_id in range(1, 51):
+            assert await storage.get_state(StorageKey(bot_id=42, chat_id=-100500, user_id=user_id)) is None
+    assert storage.reads == 0 and storage.stats()["cached"] == 0
+
+    # Приватні чати читаються як і раніше: один раз на ключ
+    await storage.get_state(key(1))
+    await storage.get_state(key(1))
+    assert storage.reads == 1
+
+
+@pytest.mark.asyncio
+async def test_product_for_change_is_kept_per_admin(session, session_maker, catalog):
+    storage = DataBaseStorage(session_maker, flush_interval=60)
+    first = FSMContext(storage, key(1))
+    second = FSMContext(storage, key(2))
+
+    callback = MagicMock()
+    callback.answer = AsyncMock()
+    callback.message.answer = AsyncMock()
+    callback.data = "change_1"
+    await change_product_callback(callback, first, session)
+
+    # Другий адмін тим часом додає новий товар: "." для нього - просто назва, а не "залишити як було"
+    await second.set_state(AddProduct.name)
+    message = MagicMock(text=".")
+    message.answer = AsyncMock()
+    await add_name(message, first, session)
+    await add_name(message, second, session)
+    assert (await first.get_data())["name"] == "Продукт 1"
+    assert await second.get_data() == {"name": "."}
+
+    await first.update_data(category=str(catalog[0].id), price=".")
+    await first.set_state(AddProduct.image)
+    await first.update_data(price="99")
+    message.photo = None
+    await add_image(message, first, session)
+    assert await first.get_state() is None
+    await storage.close()
+
+    async with session_maker() as fresh:
+        product = await orm_get_product(fresh, 1)
+    assert (product.name, float(product.price), product.image) == ("Продукт 1", 99, "file_1")
+
+
+@pytest.mark.asyncio
+async def test_change_of_deleted_product_is_answered(session, session_maker, catalog):
+    storage = DataBaseStorage(session_maker, flush_interval=60)
+    state = FSMContext(storage, key(1))
+    callback = MagicMock(data="change_999")
+    callback.answer = AsyncMock()
+    callback.message.answer = AsyncMock()
+
+    await change_product_callback(callback, state, session)
+
+    callback.answer.assert_awaited_once_with("Товар не знайдено", show_alert=True)
+    assert await state.get_state() is None and await state.get_data() == {}
+    await storage.close()
@@ -0,0 +1,55 @@
+import io
+import os
+
+import pytest
+from PIL import Image
+
+from utils.image_pipeline import ImagePipeline, optimize_image, optimize_to_cache
+
+
+def photo(size) -> Image.Image:
+    # Шум і градієнт - щоб стиснення було схоже на справжнє фото
+    return Image.merge("RGB", [
+        Image.effect_noise(size, 40), Image.linear_gradient("L").resize(size), Image.effect_noise(size, 20),
+    ])
+
+
+def png(size, mode="RGB") -> bytes:
+    output = io.BytesIO()
+    photo(size).convert(mode).save(output, "PNG")
+    return output.getvalue()
+
+
+def test_large_png_is_resized_and_recompressed():
+    source = png((3000, 1500), "RGBA")
+    result = Image.open(io.BytesIO(optimize_image(source, max_side=1280, quality=80)))
+    assert result.format == "JPEG" and result.mode == "RGB"
+    assert result.size == (1280, 640)
+
+
+def test_small_jpeg_is_kept_when_recompression_does_not_help():
+    output = io.BytesIO()
+    photo((200, 100)).save(output, "JPEG", quality=30)
+    assert optimize_image(output.getvalue(), quality=95) == output.getvalue()
+
+
+def test_variants_are_cached_by_content_and_parameters(tmp_path):
+    source = tmp_path / "banner.png"
+    source.write_bytes(png((2000, 2000)))
+
+    first = optimize_to_cache(str(source), str(tmp_path / "cache"), 1280, 85)
+    mtime = os.path.getmtime(first)
+    assert optimize_to_cache(source.read_bytes(), str(tmp_path / "cache"), 1280, 85) == first
+    assert os.path.getmtime(first) == mtime
+    assert optimize_to_cache(str(source), str(tmp_path / "cache"), 640, 85) != first
+    assert os.path.getsize(first) < source.stat().st_size
+
+
+@pytest.mark.asyncio
+async def test_pipeline_runs_in_process_pool(tmp_path):
+    pipeline = ImagePipeline(cache_dir=tmp_path, max_side=512, workers=1)
+    try:
+        data = await pipeline.optimize_bytes(png((1024, 768)))
+    finally:
+        pipeline.close()
+    assert Image.open(io.BytesIO(data)).size == (512, 384)
@@ -0,0 +1,126 @@
+import pytest
+from aiogram.types import FSInputFile
+from PIL import Image
+from sqlalchemy import select
+
+from benchmarks.fake_bot import fake_bot
+from database.models import Banner, MediaCache
+from database.orm_query import catalog_cache, orm_change_banner_image
+from handlers.menu_processing import get_menu_content
+from utils.image_pipeline import ImagePipeline
+from utils import media_sync
+from utils.media_sync import BANNERS_DIR, DEFAULT_BANNER, DefaultBanner, sync_banners
+
+
+@pytest.mark.asyncio
+async def test_banners_are_uploaded_once_per_content(session_maker, session, tmp_path):
+    session.add_all([Banner(name=name) for name in ("main", "about", "order", "orders", "payment")])
+    await session.commit()
+    catalog_cache.invalidate()
+
+    (tmp_path / "about.png").write_bytes(b"about")
+    (tmp_path / "order.png").write_bytes(b"same")
+    (tmp_path / "orders.png").write_bytes(b"same")
+    (tmp_path / "default.png").write_bytes(b"default")
+    (tmp_path / "notes.txt").write_bytes(b"not an image")
+
+    bot = fake_bot()
+    stats = await sync_banners(bot, session_maker, chat_id=-100, directory=tmp_path, default="default.png")
+    assert stats == {"files": 4, "uploaded": 3, "banners_changed": 5}
+    assert bot.session.calls["SendPhoto"] == 3
+
+    async def images():
+        async with session_maker() as s:
+            return dict((await s.execute(select(Banner.name, Banner.image))).all())
+
+    first = await images()
+    assert first["order"] == first["orders"] != first["about"]
+    # Сторінки без свого файлу отримують банер за замовчуванням
+    assert first["main"] == first["payment"] != first["about"]
+
+    # Повторний старт: нічого не вантажиться і не змінюється
+    assert await sync_banners(bot, session_maker, chat_id=-100, directory=tmp_path, default="default.png") == {
+        "files": 4, "uploaded": 0, "banners_changed": 0,
+    }
+
+    # Змінений файл вантажиться знову; банер, заданий адміном, не перезаписується
+    async with session_maker() as s:
+        await orm_change_banner_image(s, "order", "admin_photo")
+    (tmp_path / "about.png").write_bytes(b"about v2")
+    (tmp_path / "order.png").write_bytes(b"order v2")
+    stats = await sync_banners(bot, session_maker, chat_id=-100, directory=tmp_path, default="default.png")
+    assert stats == {"files": 4, "uploaded": 2, "banners_changed": 1}
+
+    second = await images()
+    assert second["order"] == "admin_photo"
+    assert second["about"] != first["about"]
+    async with session_maker() as s:
+        assert len((await s.execute(select(MediaCache))).all()) == 5
+
+
+@pytest.mark.asyncio
+async def test_changed_pipeline_settings_upload_banners_again(session_maker, session, tmp_path):
+    session.add(Banner(name="about"))
+    await session.commit()
+    Image.new("RGB", (300, 200), "orange").save(tmp_path / "about.png")
+
+    bot = fake_bot()
+
+    async def sync(quality):
+        pipeline = ImagePipeline(cache_dir=tmp_path / "cache", quality=quality, workers=1)
+        try:
+            return await sync_banners(bot, session_maker, chat_id=-100, directory=tmp_path, default=None,
+                                      pipeline=pipeline)
+        finally:
+            pipeline.close()
+
+    assert (await sync(85))["uploaded"] == 1
+    assert (await sync(85))["uploaded"] == 0
+    # Нова якість - новий вміст, а отже і новий file_id
+    assert (await sync(40))["uploaded"] == 1
+
+
+@pytest.mark.asyncio
+async def test_menu_without_synced_banner_shows_default_file(session, catalog):
+    session.add_all([Banner(name="main", description="Головна"), Banner(name="catalog", image="file_catalog")])
+    await session.commit()
+    catalog_cache.invalidate()
+
+    image, _ = await get_menu_content(session, level=0, menu_name="main")
+    assert isinstance(image.media, FSInputFile) and image.media.path == BANNERS_DIR / DEFAULT_BANNER
+    assert image.caption == "Головна"
+
+    image, kbds = await get_menu_content(session, level=1, menu_name="catalog")
+    assert image.media == "file_catalog" and kbds is not None
+    # Банера сторінки немає зовсім - теж не падаємо
+    image, _ = await get_menu_content(session, level=1, menu_name="no_such_page")
+    assert isinstance(image.media, FSInputFile) and image.caption == "Інформація недоступна"
+
+
+@pytest.mark.asyncio
+async def test_default_banner_is_uploaded_once(session, catalog, tmp_path, monkeypatch):
+    session.add(Banner(name="main", description="Головна"))
+    await session.commit()
+    catalog_cache.invalidate()
+
+    Image.new("RGB", (3000, 2000), "orange").save(tmp_path / "default.png")
+    default_banner = DefaultBanner(tmp_path / "default.png")
+    pipeline = ImagePipeline(cache_dir=tmp_path / "cache", workers=1)
+    try:
+        await default_banner.prepare(pipeline)
+    finally:
+        pipeline.close()
+    assert default_banner.path != tmp_path / "default.png"
+    monkeypatch.setattr(media_sync, "default_banner", default_banner)
+
+    bot = fake_bot()
+    bot.session.middleware(default_banner)
+    bot.session.keep_requests = True
+    for _ in range(2):
+        image, _ = await get_menu_content(session, level=0, menu_name="main")
+        await bot.send_photo(1, image.media, caption=image.caption)
+
+    # Стиснутий файл вантажиться лише вперше, далі - file_id з відповіді
+    first, second = bot.session.requests
+    assert isinstance(first.photo, FSInputFile) and first.photo.path == default_banner.path
+    assert second.photo == default_banner.file_id == "photo_1"
@@ -0,0 +1,69 @@
+import pytest
+from aiogram import Dispatcher, F, Router
+from aiogram.types import Update
+from aiohttp import ClientSession
+
+from benchmarks.fake_bot import callback_update, fake_bot, message_update
+from kbds.inline import MenuCallBack
+from middlewares.metrics import BotApiMetrics, HandlerMetrics, Metrics, serve_metrics
+
+
+@pytest.mark.asyncio
+async def test_handler_and_bot_api_metrics():
+    registry = Metrics()
+    registry.collector(lambda: {"db_pool": {"pool": "QueuePool", "checkedout": 2}})
+
+    dp = Dispatcher()
+    router = Router(name="user_private_router")
+    dp.include_router(router)
+    dp.message.middleware(HandlerMetrics(registry))
+    dp.callback_query.middleware(HandlerMetrics(registry))
+
+    @router.message(F.text == "/start")
+    async def start_cmd(message):
+        await message.answer("hi")
+
+    @router.message()
+    async def broken(message):
+        raise ValueError
+
+    @router.callback_query(MenuCallBack.filter())
+    async def user_menu(callback, callback_data):
+        pass
+
+    bot = fake_bot()
+    bot.session.middleware(BotApiMetrics(registry))
+
+    async def feed(raw):
+        await dp.feed_update(bot, Update.model_validate(raw, context={"bot": bot}))
+
+    await feed(message_update(1, 10, "/start"))
+    await feed(callback_update(2, 10, MenuCallBack(level=2, menu_name="catalog").pack()))
+    with pytest.raises(ValueError):
+        await feed(message_update(3, 10, "oops"))
+
+    text = registry.render()
+    assert ('bot_handler_duration_seconds_count{router="user_private_router",handler="start_cmd",level="-"} 1'
+            in text)
+    assert ('bot_handler_duration_seconds_bucket{router="user_private_router",handler="user_menu",level="2",le="+Inf"} 1'
+            in text)
+    assert 'bot_handler_errors_total{router="user_private_router",handler="broken",level="-"} 1' in text
+    assert 'bot_handler_in_flight{router="user_private_router",handler="start_cmd",level="-"} 0' in text
+    assert 'bot_api_request_duration_seconds_count{method="sendMessage"} 1' in text
+    assert "# TYPE bot_db_pool_checkedout gauge\nbot_db_pool_checkedout 2" in text
+    assert "bot_db_pool_pool" not in text
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint():
+    registry = Metrics()
+    registry.inc("bot_things_total", kind='a "b"')
+    runner = await serve_metrics(registry, "127.0.0.1", 0)
+    port = runner.addresses[0][1]
+    try:
+        async with ClientSession() as client:
+            async with client.get(f"http://127.0.0.1:{port}/metrics") as response:
+                assert response.status == 200
+                assert 'bot_things_total{kind="a \\"b\\""} 1' in await response.text()
+    finally:
+        await runner.cleanup()
@@ -0,0 +1,92 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+from aiogram.types import CallbackQuery, Update, User
+from sqlalchemy import text
+
+from middlewares.db import DataBaseSession
+from middlewares.scheduler import UpdateScheduler
+
+
+@pytest.mark.asyncio
+async def test_session_is_opened_only_when_used(session_maker):
+    opened = []
+
+    def pool():
+        opened.append(session_maker())
+        return opened[-1]
+
+    middleware = DataBaseSession(session_pool=pool)
+
+    async def cleaner(event, data):
+        return "skip"
+
+    async def catalog(event, data):
+        return (await data["session"].execute(text("select 1"))).scalar()
+
+    assert await middleware(cleaner, object(), {}) == "skip"
+    assert opened == []
+
+    assert await middleware(catalog, object(), {}) == 1
+    assert len(opened) == 1
+    assert middleware.stats() == {"updates": 2, "db_updates": 1}
+
+
+def callback_update(update_id: int, user_id: int) -> Update:
+    return Update(
+        update_id=update_id,
+        callback_query=CallbackQuery(
+            id=str(update_id),
+            from_user=User(id=user_id, is_bot=False, first_name="Test"),
+            chat_instance="1",
+            data="menu:3:cart",
+        ),
+    )
+
+
+@pytest.mark.asyncio
+async def test_scheduler_orders_per_user_and_bounds_concurrency():
+    scheduler = UpdateScheduler(max_concurrency=2)
+    order, running, peak = [], 0, 0
+
+    async def handler(event, data):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        order.append((data["event_from_user"].id, event.update_id))
+        running -= 1
+
+    updates = [callback_update(i, user_id=i % 3) for i in range(12)]
+    await asyncio.gather(*(
+        scheduler(handler, update, {"event_from_user": update.callback_query.from_user, "bot": None})
+        for update in updates
+    ))
+
+    assert peak == 2
+    for user_id in range(3):
+        assert [u for uid, u in order if uid == user_id] == list(range(user_id, 12, 3))
+    assert scheduler.stats() == {"pending": 0, "running": 0, "processed": 12, "shed": 0, "users": 0}
+
+
+@pytest.mark.asyncio
+async def test_scheduler_sheds_load_when_saturated():
+    scheduler = UpdateScheduler(max_concurrency=1, max_pending=1)
+    release = asyncio.Event()
+    bot = AsyncMock()
+
+    async def handler(event, data):
+        await release.wait()
+
+    first = callback_update(1, user_id=1)
+    task = asyncio.create_task(scheduler(handler, first, {"event_from_user": first.callback_query.from_user, "bot": bot}))
+    await asyncio.sleep(0)
+
+    second = callback_update(2, user_id=2)
+    assert await scheduler(handler, second, {"event_from_user": second.callback_query.from_user, "bot": bot}) is None
+    bot.answer_callback_query.assert_awaited_once_with("2", text=scheduler.busy_text)
+
+    release.set()
+    await task
+    assert scheduler.shed == 1
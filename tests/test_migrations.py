@@ -0,0 +1,56 @@
+import pytest
+from sqlalchemy import event, inspect, select, text
+
+from database.engine import make_engine
+from database.migrate import migrate
+from database.models import Cart, SchemaVersion
+
+
+def indexes(conn, table):
+    return {index["name"] for index in inspect(conn).get_indexes(table)}
+
+
+@pytest.mark.asyncio
+async def test_fresh_database_is_migrated_once(tmp_path):
+    engine = make_engine(f"sqlite+aiosqlite:///{tmp_path / 'fresh.db'}")
+    assert await migrate(engine) == [1, 2, 3, 4, 5, 6]
+
+    statements = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    # Швидкий шлях: схема актуальна - жодного DDL
+    assert await migrate(engine) == []
+    assert not any(s.lstrip().upper().startswith(("CREATE", "ALTER")) for s in statements)
+
+    async with engine.connect() as conn:
+        assert {"ix_orders_user_created"} <= await conn.run_sync(indexes, "orders")
+        assert {"ix_product_category", "ix_product_category_name"} <= await conn.run_sync(indexes, "product")
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_legacy_database_is_upgraded(tmp_path):
+    engine = make_engine(f"sqlite+aiosqlite:///{tmp_path / 'legacy.db'}")
+    # Схема, як її створював старий create_all: без унікальності кошика, ключа замовлення та індексів
+    async with engine.begin() as conn:
+        await conn.execute(text(
+            "CREATE TABLE cart (id INTEGER PRIMARY KEY, user_id BIGINT NOT NULL, product_id INTEGER NOT NULL, "
+            "quantity INTEGER NOT NULL, created DATETIME, updated DATETIME)"
+        ))
+        await conn.execute(text(
+            "CREATE TABLE orders (id INTEGER PRIMARY KEY, user_id BIGINT, total_price NUMERIC(10, 2) NOT NULL, "
+            "created DATETIME, updated DATETIME)"
+        ))
+        await conn.execute(text(
+            "INSERT INTO cart (user_id, product_id, quantity) VALUES (1, 1, 2), (1, 1, 3), (1, 2, 1), (2, 1, 1)"
+        ))
+
+    assert await migrate(engine) == [1, 2, 3, 4, 5, 6]
+
+    async with engine.connect() as conn:
+        rows = (await conn.execute(select(Cart.user_id, Cart.product_id, Cart.quantity).order_by(Cart.id))).all()
+        assert rows == [(1, 1, 5), (1, 2, 1), (2, 1, 1)]
+        assert {"uq_cart_user_product"} <= await conn.run_sync(indexes, "cart")
+        assert {"uq_orders_idempotency_key", "ix_orders_user_created"} <= await conn.run_sync(indexes, "orders")
+        versions = (await conn.execute(select(SchemaVersion.version))).scalars().all()
+        assert versions == [1, 2, 3, 4, 5, 6]
+    await engine.dispose()
@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event
+
+from handlers.menu_processing import my_orders
+from database.models import Banner, OrderItems, Orders, User
+from database.orm_query import catalog_cache, orm_get_user_orders
+
+
+@pytest.fixture
+def queries(session):
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = session.bind.sync_engine
+    event.listen(engine, "before_cursor_execute", count)
+    yield statements
+    event.remove(engine, "before_cursor_execute", count)
+
+
+@pytest_asyncio.fixture
+async def history(session, catalog):
+    # Постійний покупець із 300 замовленнями по 3 товари
+    catalog_cache.invalidate()
+    session.add_all([User(user_id=5), Banner(name="my_orders", image="banner", description="Ваші замовлення:")])
+    started = datetime(2024, 1, 1)
+    orders = [Orders(user_id=5, total_price=36, created=started + timedelta(hours=i)) for i in range(300)]
+    session.add_all(orders)
+    await session.flush()
+    session.add_all([
+        OrderItems(order_id=order.id, product_id=product_id, quantity=1, price=10 + product_id)
+        for order in orders
+        for product_id in (1, 2, 3)
+    ])
+    await session.commit()
+    session.expunge_all()
+    return orders
+
+
+@pytest.mark.asyncio
+async def test_history_pages_in_sql_newest_first(session, history, queries):
+    paginator = await orm_get_user_orders(session, 5, page=1, per_page=10)
+    assert (paginator.len, paginator.pages) == (300, 30)
+    assert [o.created for o in paginator.get_page()][:2] == [datetime(2024, 1, 13, 11), datetime(2024, 1, 13, 10)]
+    assert [item.product.name for item in paginator.get_page()[0].items] == ["Продукт 1", "Продукт 2", "Продукт 3"]
+    # COUNT, сторінка замовлень, рядки з назвами товарів - незалежно від кількості замовлень
+    assert len(queries) == 3
+
+
+@pytest.mark.asyncio
+async def test_history_screen_renders_one_order_per_page(session, history, queries):
+    image, kbds = await my_orders(session, level=4, menu_name="my_orders", user_id=5, page=300)
+    assert image.caption.startswith(f"<strong>Замовлення №{history[0].id}</strong> від 01.01.2024 00:00")
+    assert "Продукт 2 x 1 = 12.00 грн." in image.caption
+    assert "Замовлення 300 з 300" in image.caption
+    buttons = {b.text: b.callback_data for row in kbds.inline_keyboard for b in row}
+    assert buttons["◀ Попер."] == "menu:4:my_orders::299:"
+    assert "Слід. ▶" not in buttons
+
+    queries.clear()
+    await my_orders(session, level=4, menu_name="my_orders", user_id=5, page=150)
+    assert len(queries) == 3
+
+    image, kbds = await my_orders(session, level=4, menu_name="my_orders", user_id=6, page=1)
+    assert "немає замовлень" in image.caption
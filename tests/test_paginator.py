@@ -0,0 +1,46 @@
+import pytest
+
+from database.models import Banner
+from database.orm_query import catalog_cache, orm_get_products_page
+from handlers.menu_processing import get_menu_content
+from utils.paginator import Paginator
+
+
+@pytest.mark.asyncio
+async def test_query_paginator_matches_list_paginator(session, catalog):
+    fruits, _ = catalog
+    for page in range(1, 6):
+        paginator = await orm_get_products_page(session, fruits.id, page=page)
+        [product] = paginator.get_page()
+        assert product.name == f"Продукт {page}"
+        assert (paginator.page, paginator.pages) == (page, 5)
+
+        reference = Paginator(list(range(5)), page=page)
+        assert paginator.has_next() == reference.has_next()
+        assert paginator.has_previous() == reference.has_previous()
+
+
+@pytest.mark.asyncio
+async def test_query_paginator_clamps_page(session, catalog):
+    fruits, berries = catalog
+    paginator = await orm_get_products_page(session, fruits.id, page=2, per_page=3)
+    assert [p.name for p in paginator.get_page()] == ["Продукт 4", "Продукт 5"]
+
+    # Сторінки вже немає (наприклад, товар видалили) - показуємо останню
+    paginator = await orm_get_products_page(session, fruits.id, page=10)
+    assert paginator.page == 5
+
+    paginator = await orm_get_products_page(session, berries.id)
+    assert paginator.get_page() == [] and paginator.pages == 0
+
+
+@pytest.mark.asyncio
+async def test_empty_category_shows_banner_instead_of_product(session, catalog):
+    _, berries = catalog
+    session.add(Banner(name="catalog", image="file_catalog"))
+    await session.commit()
+    catalog_cache.invalidate()
+
+    image, kbds = await get_menu_content(session, level=2, menu_name="catalog", category=berries.id, page=1)
+    assert image.media == "file_catalog" and "немає товарів" in image.caption
+    assert [button.text for row in kbds.inline_keyboard for button in row] == ["Назад", "Кошик 🛒"]
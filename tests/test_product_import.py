@@ -0,0 +1,96 @@
+import pytest
+from sqlalchemy import select
+
+from database.models import Product
+from database.orm_query import catalog_cache
+from utils.product_import import ImportReport, import_products, iter_lines, iter_records
+
+
+async def chunks(data: bytes, size: int = 7):
+    # Дрібні шматки рвуть і рядки, і багатобайтові символи UTF-8
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+async def records(text: str, fmt: str):
+    return [record async for record in iter_records(iter_lines(chunks(text.encode("utf-8-sig"))), fmt)]
+
+
+@pytest.mark.asyncio
+async def test_csv_and_jsonl_are_parsed_as_stream():
+    csv_text = 'name;price;category;image\r\nЯблуко;12,5;Фрукти;file_1\r\n"Груша\nвелика";3;1;file_2\r\n\r\nзайве;1\r\n'
+    assert await records(csv_text, "csv") == [
+        (2, {"name": "Яблуко", "price": "12,5", "category": "Фрукти", "image": "file_1"}),
+        (3, {"name": "Груша\nвелика", "price": "3", "category": "1", "image": "file_2"}),
+        (6, "очікувалось 4 колонок, а не 2"),
+    ]
+
+    jsonl_text = '{"name": "Слива", "price": 4}\n\n[1]\n{bad\n'
+    parsed = await records(jsonl_text, "jsonl")
+    assert parsed[0] == (1, {"name": "Слива", "price": 4})
+    assert parsed[1] == (3, "очікувався об'єкт JSON")
+    assert parsed[2][0] == 4 and parsed[2][1].startswith("некоректний JSON")
+
+    with pytest.raises(ValueError, match="image"):
+        await records("name,price,category\n", "csv")
+
+
+@pytest.mark.asyncio
+async def test_import_upserts_in_batches_and_reports_errors(session, catalog):
+    fruits, berries = catalog
+    rows = ["name,price,category,image"]
+    rows += [f"Новий {i},{i}.99,Ягоди,file_new_{i}" for i in range(1, 13)]
+    rows += [
+        "Продукт 1,99,фрукти,file_changed",  # оновлення наявного товару (категорія без урахування регістру)
+        "Продукт 1,20000,Фрукти,file_x",      # ціна поза Numeric(6, 2)
+        "Без категорії,5,Овочі,file_y",
+        ",5,Фрукти,file_z",
+    ]
+    batches = []
+
+    async def progress(report):
+        batches.append((report.inserted, report.updated))
+
+    catalog_cache.invalidate()
+    report = await import_products(session, iter_records(iter_lines(chunks("\n".join(rows).encode())), "csv"),
+                                   batch_size=5, progress=progress)
+
+    assert (report.rows, report.inserted, report.updated, report.failed) == (16, 12, 1, 3)
+    assert batches == [(5, 0), (10, 0), (12, 1)]
+    assert [line for line, _ in report.errors] == [15, 16, 17]
+    assert "невідома категорія" in report.errors[1][1]
+    assert report.errors_csv().decode("utf-8-sig").splitlines()[0] == "line,error"
+
+    changed = (await session.execute(select(Product).where(Product.name == "Продукт 1"))).scalars().all()
+    assert [(p.price, p.image, p.category_id) for p in changed] == [(99, "file_changed", fruits.id)]
+    assert len((await session.execute(select(Product).where(Product.category_id == berries.id))).all()) == 12
+
+    # Повторний імпорт того самого файлу нічого не дублює
+    again = await import_products(session, iter_records(iter_lines(chunks("\n".join(rows).encode())), "csv"))
+    assert (again.inserted, again.updated) == (0, 13)
+
+
+@pytest.mark.asyncio
+async def test_each_batch_commits_and_network_calls_run_outside_transaction(session_maker, session, catalog):
+    in_transaction = []
+
+    async def progress(report):
+        in_transaction.append(session.in_transaction())
+
+    async def broken_download():
+        yield b"name,price,category,image\n"
+        for i in range(1, 5):
+            yield f"Новий {i},{i},Ягоди,file_{i}\n".encode()
+        in_transaction.append(session.in_transaction())
+        raise ConnectionError("обрив з'єднання")
+
+    report = ImportReport()
+    with pytest.raises(ConnectionError):
+        await import_products(session, iter_records(iter_lines(broken_download()), "csv"),
+                              batch_size=2, progress=progress, report=report)
+
+    assert in_transaction == [False, False, False]
+    assert report.inserted == 4
+    # Пачки, записані до обриву, збережено
+    async with session_maker() as other:
+        assert len((await other.execute(select(Product).where(Product.name.like("Новий%")))).all()) == 4
@@ -0,0 +1,78 @@
+import re
+
+import pytest
+from sqlalchemy import event
+
+from database import orm_query
+from database.models import Base, Banner, User
+
+# Таблиці, які читаються повністю навмисно (маленькі довідники, кешуються в пам'яті)
+FULL_READS = {"banner", "category", "restricted_word", "chat_admin", "schema_version"}
+
+CALLS = [
+    ("orm_get_banner", lambda s: orm_query.orm_get_banner(s, "main")),
+    ("orm_get_products", lambda s: orm_query.orm_get_products(s, 1)),
+    ("orm_get_products_page", lambda s: orm_query.orm_get_products_page(s, 1, page=2, per_page=2)),
+    ("orm_get_product", lambda s: orm_query.orm_get_product(s, 1)),
+    ("orm_update_product", lambda s: orm_query.orm_update_product(s, 1, {"name": "Х", "price": 1, "image": "i", "category": 1})),
+    ("orm_add_user", lambda s: orm_query.orm_add_user(s, 2)),
+    ("orm_add_to_cart", lambda s: orm_query.orm_add_to_cart(s, 1, 2)),
+    ("orm_get_user_cart", lambda s: orm_query.orm_get_user_cart(s, 1)),
+    ("orm_get_user_cart_page", lambda s: orm_query.orm_get_user_cart_page(s, 1, page=1)),
+    ("orm_reduce_product_in_cart", lambda s: orm_query.orm_reduce_product_in_cart(s, 1, 2)),
+    ("orm_delete_from_cart", lambda s: orm_query.orm_delete_from_cart(s, 1, 3)),
+    ("orm_transfer_cart_to_order", lambda s: orm_query.orm_transfer_cart_to_order(s, 1, idempotency_key="k")),
+    ("orm_get_order_by_key", lambda s: orm_query.orm_get_order_by_key(s, "k")),
+    ("orm_get_order", lambda s: orm_query.orm_get_order(s, 1)),
+    ("orm_get_user_orders", lambda s: orm_query.orm_get_user_orders(s, 1, page=1)),
+    ("orm_get_fsm_state", lambda s: orm_query.orm_get_fsm_state(s, "fsm:1:1:1:default")),
+    ("orm_delete_product", lambda s: orm_query.orm_delete_product(s, 5)),
+    ("orm_upsert_products", lambda s: orm_query.orm_upsert_products(s, [
+        {"name": "Продукт 1", "price": 1, "image": "i", "category_id": 1},
+        {"name": "Новий", "price": 1, "image": "i", "category_id": 1},
+    ])),
+]
+
+
+@pytest.mark.asyncio
+async def test_hot_path_queries_use_indexes(session, catalog):
+    orm_query.catalog_cache.invalidate()
+    orm_query.known_users.discard(2)
+    session.add_all([User(user_id=1), Banner(name="main", image="b")])
+    await session.commit()
+    for product_id in (1, 2, 3):
+        await orm_query.orm_add_to_cart(session, 1, product_id)
+
+    tables = set(Base.metadata.tables)
+    engine = session.bind.sync_engine
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        # executemany - план той самий для кожного набору параметрів
+        statements.append((statement, parameters[0] if executemany else parameters))
+
+    problems = []
+    for name, call in CALLS:
+        statements.clear()
+        event.listen(engine, "before_cursor_execute", capture)
+        try:
+            await call(session)
+        finally:
+            event.remove(engine, "before_cursor_execute", capture)
+        assert statements, name
+
+        for statement, parameters in statements:
+            plan = await explain(session, statement, parameters)
+            for row in plan:
+                # "SCAN product" - повний перебір; псевдоніми виду product_1 теж рахуються
+                scan = re.match(r"SCAN (\w+?)(?:_\d+)?\b", row)
+                if scan and scan.group(1) in tables and scan.group(1) not in FULL_READS:
+                    problems.append(f"{name}: {row} <- {statement.split()[0]} ...")
+
+    assert not problems, "\n".join(problems)
+
+
+async def explain(session, statement, parameters):
+    connection = await session.connection()
+    result = await connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+    return [row[-1] for row in result]
@@ -0,0 +1,74 @@
+import json
+import logging
+
+import pytest
+from aiogram import Dispatcher
+from aiogram.types import Update
+from sqlalchemy import select, text
+from sqlalchemy.exc import OperationalError
+
+from benchmarks.fake_bot import callback_update, fake_bot
+from database.models import Product
+from middlewares.query_tracker import QueryTracker, statement_shape, track_queries
+
+
+def test_statement_shape_ignores_list_lengths():
+    assert (statement_shape("SELECT *\n  FROM product WHERE id IN (?, ?, ?)")
+            == statement_shape("SELECT * FROM product WHERE id IN (?)")
+            == "SELECT * FROM product WHERE id IN (?)")
+
+
+@pytest.mark.asyncio
+async def test_n_plus_one_slow_queries_and_update_summary(session_maker, catalog, caplog):
+    track_queries(session_maker.kw["bind"], slow_query_ms=0)
+    tracker = QueryTracker(n_plus_one=3)
+
+    dp = Dispatcher()
+    dp.callback_query.middleware(tracker)
+
+    @dp.callback_query()
+    async def cart(callback):
+        async with session_maker() as session:
+            # Запит, що впав, не рахується і не ламає облік наступних
+            with pytest.raises(OperationalError):
+                await session.execute(text("SELECT * FROM no_such_table"))
+            await session.rollback()
+            ids = (await session.scalars(select(Product.id))).all()
+            for product_id in ids:
+                await session.get(Product, product_id)
+
+    bot = fake_bot()
+    with caplog.at_level(logging.DEBUG, logger="middlewares.query_tracker"):
+        await dp.feed_update(bot, Update.model_validate(callback_update(1, 10, "menu:3:cart"), context={"bot": bot}))
+        # Поза апдейтом запити не рахуються
+        async with session_maker() as session:
+            await session.scalars(select(Product.id))
+
+    messages = [record.getMessage() for record in caplog.records]
+    assert tracker.suspects == 1
+    assert any(m.startswith("Ймовірний N+1: 5 однакових запитів") and "handler=cart" in m for m in messages)
+    assert sum(m.startswith("Повільний запит") for m in messages) == 6
+    summary = json.loads(next(m for m in messages if m.startswith("{")))
+    assert summary["handler"] == "cart"
+    assert summary["callback_data"] == "menu:3:cart"
+    assert summary["user_id"] == 10
+    assert summary["queries"] == 6
+    assert summary["max_repeats"] == 5
+
+
+@pytest.mark.asyncio
+async def test_update_summary_is_debug_only(session_maker, catalog, caplog):
+    track_queries(session_maker.kw["bind"])
+    dp = Dispatcher()
+    dp.callback_query.middleware(QueryTracker())
+
+    @dp.callback_query()
+    async def menu(callback):
+        async with session_maker() as session:
+            await session.scalars(select(Product.id))
+
+    bot = fake_bot()
+    with caplog.at_level(logging.INFO, logger="middlewares.query_tracker"):
+        await dp.feed_update(bot, Update.model_validate(callback_update(1, 10, "menu:0:main"), context={"bot": bot}))
+
+    assert not [record for record in caplog.records if record.getMessage().startswith("{")]
@@ -0,0 +1,41 @@
+import pytest
+from aiogram import Dispatcher, Router
+from aiogram.types import Update
+
+from benchmarks.fake_bot import callback_update, fake_bot, message_update
+from benchmarks.replay import HandlerLabel, current_labels, percentile, update_level
+from kbds.inline import MenuCallBack
+
+
+def test_percentile_nearest_rank():
+    values = [i / 1000 for i in range(1, 101)]
+    assert percentile(values, 0.5) == pytest.approx(0.051)
+    assert percentile(values, 0.99) == pytest.approx(0.099)
+    assert percentile([0.2], 0.95) == 0.2
+
+
+def test_update_level():
+    bot = fake_bot()
+    menu = callback_update(1, 10, MenuCallBack(level=3, menu_name="cart", page=1).pack())
+    assert update_level(Update.model_validate(menu, context={"bot": bot})) == "3"
+    assert update_level(Update.model_validate(callback_update(2, 10, "delete_5"), context={"bot": bot})) == "-"
+    assert update_level(Update.model_validate(message_update(3, 10, "/start"), context={"bot": bot})) == "-"
+
+
+@pytest.mark.asyncio
+async def test_handler_label_records_matched_handler():
+    dp = Dispatcher()
+    router = Router()
+    dp.include_router(router)
+
+    @router.message()
+    async def echo(message):
+        pass
+
+    router.message.middleware(HandlerLabel())
+    bot = fake_bot()
+
+    labels = {"handler": "-"}
+    current_labels.set(labels)
+    await dp.feed_update(bot, Update.model_validate(message_update(1, 10, "hi"), context={"bot": bot}))
+    assert labels == {"handler": "echo"}
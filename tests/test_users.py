@@ -0,0 +1,35 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func, select
+
+from database.models import Cart, User
+from database.orm_query import known_users, orm_add_user, orm_warm_known_users
+
+
+@pytest.mark.asyncio
+async def test_add_user_is_idempotent_and_cached(session):
+    known_users.discard(1)
+    await orm_add_user(session, user_id=1, first_name="Ivan")
+    assert 1 in known_users
+
+    # Промах кешу для існуючого користувача не створює дубль
+    known_users.discard(1)
+    await orm_add_user(session, user_id=1, first_name="Ivan")
+    count = await session.scalar(select(func.count()).select_from(User))
+    assert count == 1
+
+
+@pytest.mark.asyncio
+async def test_warm_known_users_prefers_recent_activity(session, catalog):
+    old = datetime(2024, 1, 1)
+    session.add_all([User(user_id=i, created=old, updated=old) for i in range(1, 4)])
+    session.add(Cart(user_id=2, product_id=1, quantity=1, updated=datetime(2024, 6, 1)))
+    await session.commit()
+
+    for user_id in range(1, 4):
+        known_users.discard(user_id)
+    await orm_warm_known_users(session, limit=1)
+
+    assert 2 in known_users
+    assert 1 not in known_users and 3 not in known_users
@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+from aiogram import Bot, Dispatcher
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from utils.webhook import BoundedRequestHandler
+
+
+def make_update(update_id: int) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": 1, "type": "private"},
+            "from": {"id": 1, "is_bot": False, "first_name": "Test"},
+            "text": "hi",
+        },
+    }
+
+
+@pytest.mark.asyncio
+async def test_bounded_webhook_handler():
+    release = asyncio.Event()
+    handled = []
+    dp = Dispatcher()
+
+    @dp.message()
+    async def slow_handler(message):
+        handled.append(message.message_id)
+        await release.wait()
+
+    handler = BoundedRequestHandler(dispatcher=dp, bot=Bot("42:TEST"), max_in_flight=2, secret_token="s3cret")
+    app = web.Application()
+    handler.register(app, path="/webhook")
+    headers = {"X-Telegram-Bot-Api-Secret-Token": "s3cret"}
+
+    async with TestClient(TestServer(app)) as client:
+        response = await client.post("/webhook", json=make_update(1))
+        assert response.status == 401
+
+        for update_id in (1, 2):
+            response = await client.post("/webhook", json=make_update(update_id), headers=headers)
+            assert response.status == 200
+
+        # Третій апдейт чекає на вільний слот
+        third = asyncio.create_task(client.post("/webhook", json=make_update(3), headers=headers))
+        await asyncio.sleep(0.05)
+        assert not third.done() and handler.in_flight == 2
+
+        release.set()
+        assert (await third).status == 200
+        await asyncio.sleep(0.05)
+        assert sorted(handled) == [1, 2, 3]
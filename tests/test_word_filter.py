@@ -0,0 +1,50 @@
+import os
+
+import pytest
+
+from database.orm_query import orm_add_restricted_words
+from utils.word_filter import WordFilter
+
+
+@pytest.mark.parametrize("text", ["Ти свиня", "с.в.и.н.я!", "cвиииня", "СВИНКА", "0лені", "хр1н"])
+def test_obfuscated_words_are_caught(text):
+    assert WordFilter(["свиня", "олень", "хрін"]).find(text)
+
+
+@pytest.mark.parametrize("text", ["Привіт усім", "Олена, свинина по акції!", "", "12345"])
+def test_clean_and_allowed_texts_pass(text):
+    assert WordFilter(["свиня", "олень", "!олена", "!свинина"]).find(text) is None
+
+
+@pytest.mark.parametrize("text", ["солені огірки", "свинець", "свинарник", "посвиня"])
+def test_short_stems_match_only_at_word_start(text):
+    assert WordFilter(["свиня", "олень"]).find(text) is None
+
+
+@pytest.mark.parametrize("text", ["Привіт, Олено", "Оленка прийшла", "дякую Олені", "свинини немає"])
+def test_exceptions_cover_inflected_forms(text):
+    assert WordFilter(["свиня", "олень", "!олена", "!свинина"]).find(text) is None
+
+
+@pytest.mark.parametrize("text", ["бовдурище", "бовдури", "ти олень", "ОЛЕНЬ!"])
+def test_inflected_blocked_words_are_caught(text):
+    assert WordFilter(["олень", "бовдур", "!олена"]).find(text)
+
+
+@pytest.mark.asyncio
+async def test_hot_reload_from_file_and_db(tmp_path, session):
+    path = tmp_path / "words.txt"
+    path.write_text("бовдур\n", encoding="utf-8")
+    word_filter = WordFilter(["свиня"], path=str(path), reload_interval=3600)
+    assert word_filter.find("ну ти бовдур") and word_filter.find("свиня")
+
+    path.write_text("телепень\n", encoding="utf-8")
+    os.utime(path, (1, 1))
+    await orm_add_restricted_words(session, ["олень"])
+    # Без force перевірки не частіше, ніж раз на reload_interval
+    await word_filter.refresh(session)
+    await word_filter.refresh(session)
+    assert word_filter.find("телепень") and word_filter.find("бовдур") is None
+
+    # Після читання БД початковий список замінюється вмістом таблиці
+    assert word_filter.find("олень") and word_filter.find("свиня") is None
@@ -0,0 +1,111 @@
+import asyncio
+import multiprocessing
+import queue
+
+import pytest
+from aiogram import Dispatcher
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from benchmarks.fake_bot import callback_update, fake_bot, message_update
+from database import orm_query
+from database.engine import make_engine
+from database.models import Banner
+from utils.cache import AsyncTTLCache
+from utils.workers import Supervisor, serve_worker, shard_for, update_user_id
+
+
+def test_updates_of_one_user_go_to_one_worker():
+    assert update_user_id(message_update(1, 777, "/start")) == 777
+    assert update_user_id(callback_update(2, 777, "menu:1:catalog")) == 777
+    assert update_user_id({"update_id": 5, "poll": {"id": "p"}}) == 5
+
+    assert {shard_for(message_update(i, 777, "hi"), 4) for i in range(10)} == {777 % 4}
+    assert {shard_for(message_update(1, user_id, "hi"), 4) for user_id in range(100)} == {0, 1, 2, 3}
+
+
+@pytest.mark.asyncio
+async def test_worker_feeds_updates_and_reports_health():
+    dp = Dispatcher()
+    seen = []
+    startup = []
+
+    @dp.startup()
+    async def on_startup(worker):
+        startup.append(worker)
+
+    @dp.message()
+    async def echo(message):
+        seen.append((message.from_user.id, message.text))
+
+    inbox, outbox = queue.Queue(), queue.Queue()
+    for i, text in enumerate(["один", "два", "три"]):
+        inbox.put(message_update(i, 10, text))
+    inbox.put(None)
+
+    await serve_worker(3, inbox, outbox, dp, fake_bot(), stats=lambda: {"extra": 1})
+
+    assert startup == [3]
+    assert seen == [(10, "один"), (10, "два"), (10, "три")]
+    reports = []
+    while not outbox.empty():
+        reports.append(outbox.get())
+    index, status, stats = reports[-1]
+    assert (index, status) == (3, "stopped")
+    assert stats["processed"] == 3 and stats["failed"] == 0 and stats["extra"] == 1
+
+
+@pytest.mark.asyncio
+async def test_stop_does_not_block_event_loop_on_full_inbox():
+    supervisor = Supervisor(target=print, workers=1, queue_size=1)
+    supervisor._inboxes[0].put_nowait(message_update(1, 10, "hi"))
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    task = asyncio.create_task(ticker())
+    try:
+        # Воркер не запущений і чергу не розбере - stop() чекає timeout, але не блокує loop
+        await supervisor.stop(timeout=0.3)
+    finally:
+        task.cancel()
+    assert ticks >= 10
+
+
+def _change_banner_in_worker(cache_version, db_url):
+    # Інший воркер: свій процес, свій catalog_cache, спільний лише cache_version
+    async def change():
+        engine = make_engine(db_url)
+        orm_query.catalog_cache.share(cache_version)
+        async with async_sessionmaker(bind=engine, class_=AsyncSession)() as session:
+            await orm_query.orm_change_banner_image(session, "main", "new_file_id")
+        await engine.dispose()
+
+    asyncio.run(change())
+
+
+@pytest.mark.asyncio
+async def test_catalog_edit_in_one_worker_is_visible_in_another(session, monkeypatch):
+    session.add(Banner(name="main", image="old_file_id"))
+    await session.commit()
+
+    context = multiprocessing.get_context("spawn")
+    cache_version = context.Value("Q", 0)
+    cache = AsyncTTLCache(ttl=300)
+    cache.share(cache_version)
+    monkeypatch.setattr(orm_query, "catalog_cache", cache)
+    assert (await orm_query.orm_get_banner(session, "main")).image == "old_file_id"
+
+    worker = context.Process(
+        target=_change_banner_in_worker,
+        args=(cache_version, session.bind.url.render_as_string(hide_password=False)),
+    )
+    worker.start()
+    await asyncio.get_running_loop().run_in_executor(None, worker.join, 60)
+    assert worker.exitcode == 0
+
+    # TTL ще не минув, але кеш цього процесу бачить інвалідацію з іншого
+    assert (await orm_query.orm_get_banner(session, "main")).image == "new_file_id"
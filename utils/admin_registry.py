@@ -0,0 +1,122 @@
+import asyncio
+import logging
+import os
+import random
+from datetime import datetime, timedelta, timezone
+
+from aiogram import Bot
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from database.orm_query import orm_get_chat_admins, orm_replace_chat_admins
+
+logger = logging.getLogger(__name__)
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+# Реєстр адмінів груп: chat_id -> множина user_id.
+# Перевірка в фільтрі - лише пошук у множині, без запитів до Telegram.
+# Списки зберігаються в таблиці chat_admin: звідти реєстр швидко стартує
+# і через неї ж ділиться даними між кількома процесами бота.
+# Права адміна магазину (приватний чат) дають лише групи з admin_chats:
+# бот можуть додати в будь-яку групу, і її адміни не повинні ставати адмінами магазину.
+class AdminRegistry:
+    def __init__(
+        self,
+        ttl: float = 600,
+        jitter: float = 0.2,
+        sync_interval: float = 30,
+        admin_chats: frozenset[int] = frozenset(),
+    ):
+        self.ttl = ttl
+        self.jitter = jitter
+        self.sync_interval = sync_interval
+        self.admin_chats = frozenset(admin_chats)
+        self._chats: dict[int, frozenset[int]] = {}
+        self._refreshed: dict[int, datetime] = {}
+        self._due: dict[int, datetime] = {}
+        self._admins: frozenset[int] = frozenset()
+
+    def is_admin(self, user_id: int, chat_id: int | None = None) -> bool:
+        # Без chat_id - чи є користувач адміном хоча б однієї з груп admin_chats (для приватного чату з ботом)
+        if chat_id is None:
+            return user_id in self._admins
+        return user_id in self._chats.get(chat_id, ())
+
+    def chat_admins(self, chat_id: int) -> frozenset[int]:
+        return self._chats.get(chat_id, frozenset())
+
+    def _set_chat(self, chat_id: int, user_ids, refreshed: datetime):
+        self._chats[chat_id] = frozenset(user_ids)
+        self._refreshed[chat_id] = refreshed
+        # Джиттер розводить у часі оновлення різних чатів і різних процесів
+        ttl = self.ttl * random.uniform(1 - self.jitter, 1 + self.jitter)
+        self._due[chat_id] = refreshed + timedelta(seconds=ttl)
+        self._update_admins()
+
+    def _drop_chat(self, chat_id: int):
+        self._chats.pop(chat_id, None)
+        self._refreshed.pop(chat_id, None)
+        self._due.pop(chat_id, None)
+        self._update_admins()
+
+    def _update_admins(self):
+        self._admins = frozenset().union(
+            *(user_ids for chat_id, user_ids in self._chats.items() if chat_id in self.admin_chats)
+        )
+
+    async def load(self, session: AsyncSession):
+        # Підтягуємо те, що вже записали інші процеси (або ми самі до перезапуску)
+        chats: dict[int, tuple[set[int], datetime]] = {}
+        for chat_id, user_id, updated in await orm_get_chat_admins(session):
+            user_ids, refreshed = chats.setdefault(chat_id, (set(), updated))
+            user_ids.add(user_id)
+            chats[chat_id] = (user_ids, max(refreshed, updated))
+        for chat_id, (user_ids, refreshed) in chats.items():
+            if refreshed != self._refreshed.get(chat_id):
+                self._set_chat(chat_id, user_ids, refreshed)
+        # Рядків чату в БД більше немає (видалені іншим процесом або вручну) - забуваємо і ми
+        for chat_id in self._chats.keys() - chats.keys():
+            self._drop_chat(chat_id)
+
+    async def refresh_chat(self, bot: Bot, session: AsyncSession, chat_id: int) -> frozenset[int]:
+        members = await bot.get_chat_administrators(chat_id)
+        user_ids = {
+            member.user.id
+            for member in members
+            if member.status == "creator" or member.status == "administrator"
+        }
+        refreshed = utcnow()
+        await orm_replace_chat_admins(session, chat_id, user_ids, refreshed)
+        self._set_chat(chat_id, user_ids, refreshed)
+        return self._chats[chat_id]
+
+    async def run(self, bot: Bot, session_pool: async_sessionmaker):
+        # Фонове оновлення: раз на sync_interval читаємо БД і оновлюємо з Telegram
+        # лише ті чати, в яких минув ttl (з урахуванням оновлень від інших процесів),
+        # і групи з admin_chats, яких ще немає в БД (ніхто не викликав у них /admin)
+        while True:
+            try:
+                async with session_pool() as session:
+                    await self.load(session)
+                    now = utcnow()
+                    stale = [c for c, due in self._due.items() if due <= now]
+                    for chat_id in stale + sorted(self.admin_chats - self._due.keys()):
+                        try:
+                            await self.refresh_chat(bot, session, chat_id)
+                        except Exception as e:
+                            logger.warning("Не вдалося оновити адмінів чату %s: %s", chat_id, e)
+                            # Не повторюємо одразу - чекаємо ще один ttl
+                            self._due[chat_id] = now + timedelta(seconds=self.ttl)
+            except Exception:
+                logger.exception("Помилка синхронізації адмінів")
+            await asyncio.sleep(self.sync_interval)
+
+
+#from .env file:
+# ADMIN_CHAT_IDS=-100...,-100...   (групи, адміни яких керують магазином; порожній - нікого)
+admin_registry = AdminRegistry(
+    admin_chats=frozenset(int(chat_id) for chat_id in os.getenv('ADMIN_CHAT_IDS', '').split(',') if chat_id.strip()),
+)
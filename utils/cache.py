@@ -0,0 +1,144 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+
+# Асинхронний read-through кеш з TTL, явною інвалідацією та single-flight:
+# поки один запит вантажить значення з БД, інші з тим самим ключем чекають
+# на його результат, а не йдуть у БД самі.
+class AsyncTTLCache:
+    def __init__(self, ttl: float = 300.0, maxsize: int = 1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: dict[Hashable, tuple[float, Any]] = {}
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+        # Номер покоління: інвалідація під час завантаження не дає
+        # записати в кеш застарілий результат
+        self._generation = 0
+        # Спільний між процесами лічильник інвалідацій (див. share)
+        self._shared = None
+        self._shared_seen = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def share(self, version):
+        # version - multiprocessing.Value, спільний для всіх воркерів (BOT_WORKERS > 1).
+        # Інвалідація в будь-якому процесі збільшує його, а решта процесів,
+        # помітивши зміну, очищають свій кеш повністю перед наступним читанням
+        self._shared = version
+        self._shared_seen = version.value
+
+    def _sync_shared(self):
+        if self._shared is not None and self._shared.value != self._shared_seen:
+            self._shared_seen = self._shared.value
+            self._invalidate_local()
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]):
+        self._sync_shared()
+        while True:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.hits += 1
+                return entry[1]
+
+            future = self._inflight.get(key)
+            if future is None:
+                break
+
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # Завантаження скасували разом із задачею-лідером - пробуємо самі
+                if future.cancelled():
+                    continue
+                raise
+
+        self.misses += 1
+        generation = self._generation
+        future = asyncio.get_running_loop().create_future()
+        # Щоб не було "Future exception was never retrieved", коли ніхто не чекав
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[key] = future
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+        self._sync_shared()
+        if generation == self._generation:
+            self._set(key, value)
+        future.set_result(value)
+        return value
+
+    def _set(self, key: Hashable, value: Any):
+        if key not in self._data and len(self._data) >= self.maxsize:
+            # Викидаємо найстаріший запис (dict зберігає порядок вставки)
+            self._data.pop(next(iter(self._data)))
+        self._data[key] = (time.monotonic() + self.ttl, value)
+
+    def invalidate(self, *namespaces: str):
+        # Ключі - кортежі, перший елемент яких є простором імен ("banner", "categories", ...).
+        # Без аргументів очищає весь кеш.
+        # Незавершені завантаження теж забуваємо: той, хто прийде після інвалідації,
+        # має піти в БД сам, а не чекати на результат, прочитаний до неї.
+        if self._shared is not None:
+            with self._shared.get_lock():
+                # Інвалідації інших процесів, яких ми ще не бачили, теж застосовуємо
+                if self._shared.value != self._shared_seen:
+                    namespaces = ()
+                self._shared.value += 1
+                self._shared_seen = self._shared.value
+        self._invalidate_local(*namespaces)
+
+    def _invalidate_local(self, *namespaces: str):
+        self._generation += 1
+        if not namespaces:
+            self._data.clear()
+            self._inflight.clear()
+            return
+        for store in (self._data, self._inflight):
+            for key in [k for k in store if isinstance(k, tuple) and k[0] in namespaces]:
+                del store[key]
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "size": len(self._data),
+        }
+
+
+# Обмежена множина з витісненням найдавніше використаних елементів (LRU)
+class LRUSet:
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._data: OrderedDict[Hashable, None] = OrderedDict()
+
+    def __contains__(self, item: Hashable) -> bool:
+        if item in self._data:
+            self._data.move_to_end(item)
+            return True
+        return False
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def add(self, item: Hashable):
+        self._data[item] = None
+        self._data.move_to_end(item)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def discard(self, item: Hashable):
+        self._data.pop(item, None)
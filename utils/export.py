@@ -0,0 +1,66 @@
+import asyncio
+import csv
+import gzip
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+from sqlalchemy.ext.asyncio import AsyncResult
+
+
+# Експорт у CSV, стиснутий gzip. Пачки рядків приходять з серверного курсора
+# (orm_stream_products / orm_stream_orders), а форматування і стиснення
+# кожної пачки виконується в потоці, поки event loop уже читає наступну.
+# У пам'яті щонайбільше дві пачки, незалежно від розміру таблиці.
+
+# Bot API приймає від бота документи до 50 МБ
+MAX_DOCUMENT_SIZE = 50 * 1024 * 1024
+
+
+async def write_csv_gz(result: AsyncResult, header: tuple[str, ...], path: str) -> int:
+    file = await asyncio.to_thread(gzip.open, path, "wt", encoding="utf-8-sig", newline="")
+    writer = csv.writer(file)
+    rows = 0
+    pending: asyncio.Future | None = None
+    try:
+        await asyncio.to_thread(writer.writerow, header)
+        async for batch in result.partitions():
+            if pending:
+                await pending
+            rows += len(batch)
+            pending = asyncio.ensure_future(asyncio.to_thread(writer.writerows, batch))
+        if pending:
+            await pending
+    finally:
+        # Файл закриваємо лише після того, як потік дописав останню пачку
+        if pending and not pending.done():
+            await asyncio.wait([pending])
+        await asyncio.to_thread(file.close)
+        await result.close()
+    return rows
+
+
+async def export_to_temp_file(result: AsyncResult, header: tuple[str, ...]) -> tuple[str, int]:
+    # Файл видаляє той, хто його відправив
+    fd, path = tempfile.mkstemp(prefix="export_", suffix=".csv.gz")
+    os.close(fd)
+    try:
+        return path, await write_csv_gz(result, header, path)
+    except BaseException:
+        os.remove(path)
+        raise
+
+
+def parse_date_range(args: list[str]) -> tuple[datetime | None, datetime | None]:
+    # [] - усі, [з] - від дати, [з, по] - обидві дати включно; формат РРРР-ММ-ДД
+    if len(args) > 2:
+        raise ValueError("Вкажіть не більше двох дат")
+    try:
+        dates = [datetime.strptime(arg, "%Y-%m-%d") for arg in args]
+    except ValueError:
+        raise ValueError("Дати мають бути у форматі РРРР-ММ-ДД")
+    date_from = dates[0] if dates else None
+    date_to = dates[1] + timedelta(days=1) if len(dates) == 2 else None
+    if date_from and date_to and date_from >= date_to:
+        raise ValueError("Початкова дата пізніша за кінцеву")
+    return date_from, date_to
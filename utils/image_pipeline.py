@@ -0,0 +1,103 @@
+import asyncio
+import hashlib
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from PIL import Image, ImageOps
+
+
+# Підготовка зображень для Banner.image і Product.image перед завантаженням у Telegram:
+# зменшення до розміру, в якому Telegram їх показує (1280 px по довшій стороні),
+# і перестиснення в JPEG з заданою якістю. Результат кешується на диску
+# за хешем вмісту і параметрами, тож один і той самий файл обробляється один раз.
+# Кодування займає CPU на сотні мілісекунд, тому виконується в пулі процесів.
+#from .env file:
+# IMAGE_CACHE_DIR=.image_cache
+# IMAGE_MAX_SIDE=1280
+# IMAGE_QUALITY=85
+# IMAGE_WORKERS=2
+
+def optimize_image(data: bytes, max_side: int = 1280, quality: int = 85) -> bytes:
+    image = Image.open(io.BytesIO(data))
+    # Невеликий JPEG, який вже стиснутий краще, лишаємо як є
+    keep_original = image.format == "JPEG" and max(image.size) <= max_side
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ("RGBA", "LA", "P"):
+        # Прозорість JPEG не підтримує - підкладаємо білий фон
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image, mask=image.getchannel("A"))
+        image = background
+    elif image.mode != "RGB":
+        image = image.convert("RGB")
+    image.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+
+    output = io.BytesIO()
+    image.save(output, "JPEG", quality=quality, optimize=True, progressive=True)
+    if keep_original and len(data) <= output.tell():
+        return data
+    return output.getvalue()
+
+
+def optimize_to_cache(source: bytes | str, cache_dir: str, max_side: int, quality: int) -> str:
+    # Виконується в процесі пулу: source - шлях до файлу або його вміст
+    if isinstance(source, str):
+        source = Path(source).read_bytes()
+    content_hash = hashlib.sha256(source).hexdigest()
+    path = Path(cache_dir) / f"{content_hash}_{max_side}_q{quality}.jpg"
+    if path.exists():
+        return str(path)
+
+    data = optimize_image(source, max_side, quality)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Атомарний запис: паралельний виклик не прочитає недописаний файл
+    temp = path.with_suffix(f".{os.getpid()}.tmp")
+    temp.write_bytes(data)
+    os.replace(temp, path)
+    return str(path)
+
+
+class ImagePipeline:
+    def __init__(self, cache_dir: str | Path, max_side: int = 1280, quality: int = 85, workers: int = 2):
+        self.cache_dir = str(cache_dir)
+        self.max_side = max_side
+        self.quality = quality
+        self.workers = workers
+        self._pool: ProcessPoolExecutor | None = None
+
+    def _executor(self) -> ProcessPoolExecutor:
+        # Пул створюється при першому зображенні; spawn - як і у воркерів бота
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    async def _run(self, source: bytes | str) -> Path:
+        loop = asyncio.get_running_loop()
+        path = await loop.run_in_executor(
+            self._executor(), optimize_to_cache, source, self.cache_dir, self.max_side, self.quality
+        )
+        return Path(path)
+
+    async def optimize_file(self, path: str | Path) -> Path:
+        # Файл читає процес пулу, в event loop лише шлях до результату
+        return await self._run(str(path))
+
+    async def optimize_bytes(self, data: bytes) -> bytes:
+        path = await self._run(data)
+        return await asyncio.to_thread(path.read_bytes)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+image_pipeline = ImagePipeline(
+    cache_dir=os.getenv('IMAGE_CACHE_DIR', '.image_cache'),
+    max_side=int(os.getenv('IMAGE_MAX_SIDE', 1280)),
+    quality=int(os.getenv('IMAGE_QUALITY', 85)),
+    workers=int(os.getenv('IMAGE_WORKERS', 2)),
+)
@@ -0,0 +1,153 @@
+import asyncio
+import hashlib
+import logging
+from pathlib import Path
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import EditMessageMedia, Response, SendPhoto, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import FSInputFile, InputFile
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from database.orm_query import (
+    orm_get_info_pages,
+    orm_get_media_cache,
+    orm_save_media,
+    orm_set_synced_banner_images,
+)
+from database.models import Banner
+from utils.image_pipeline import ImagePipeline
+
+logger = logging.getLogger(__name__)
+
+
+# Синхронізація банерів з папки banners/ при старті:
+# кожен файл проходить через ImagePipeline і хешується те, що піде в Telegram
+# (чат MEDIA_CHAT_ID). Вантажиться лише вміст, якого ще немає в media_cache,
+# а отриманий file_id зберігається за хешем. Зміна IMAGE_MAX_SIDE / IMAGE_QUALITY
+# дає інший вміст, тож банери перевантажуються з новими параметрами.
+# Однакові файли (order.png, orders.png, ...) вантажаться один раз, незмінені - ніколи.
+# Файл <сторінка>.png стає банером сторінки; сторінки без свого файлу
+# отримують DEFAULT_BANNER, щоб меню ніколи не рендерилось з media=None.
+
+BANNERS_DIR = Path(__file__).resolve().parent.parent / "banners"
+DEFAULT_BANNER = "baner novogod.png"
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".webp"}
+
+
+def file_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Без синхронізації (MEDIA_CHAT_ID не задано) у банера може не бути file_id -
+# тоді меню показує DEFAULT_BANNER. Файл вантажиться в Telegram лише перший раз
+# (після ImagePipeline, див. prepare), а file_id з відповіді запам'ятовує
+# middleware сесії бота - далі всі меню використовують його.
+class DefaultBanner(BaseRequestMiddleware):
+    def __init__(self, path: Path):
+        self.path = path
+        self.file_id: str | None = None
+
+    async def prepare(self, pipeline: ImagePipeline | None):
+        if pipeline is None:
+            return
+        try:
+            self.path = await pipeline.optimize_file(self.path)
+        except Exception as e:
+            logger.warning("Не вдалося підготувати банер за замовчуванням: %s", e)
+
+    def media(self) -> str | InputFile:
+        return self.file_id or FSInputFile(self.path)
+
+    def _uploaded(self, method: TelegramMethod) -> bool:
+        if isinstance(method, SendPhoto):
+            media = method.photo
+        elif isinstance(method, EditMessageMedia):
+            media = method.media.media
+        else:
+            return False
+        return isinstance(media, FSInputFile) and Path(media.path) == Path(self.path)
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        result = await make_request(bot, method)
+        # Редагування inline-повідомлення повертає True - тоді file_id дізнаємось наступного разу
+        photo = getattr(result, "photo", None)
+        if photo and self.file_id is None and self._uploaded(method):
+            self.file_id = photo[-1].file_id
+        return result
+
+
+default_banner = DefaultBanner(BANNERS_DIR / DEFAULT_BANNER)
+
+
+def banner_media(banner: Banner | None) -> str | InputFile:
+    if banner is not None and banner.image:
+        return banner.image
+    return default_banner.media()
+
+
+async def upload_photo(bot: Bot, chat_id: int | str, path: Path) -> str:
+    message = await bot.send_photo(chat_id, FSInputFile(path), disable_notification=True)
+    return message.photo[-1].file_id
+
+
+async def sync_banners(
+    bot: Bot,
+    session_pool: async_sessionmaker,
+    chat_id: int | str,
+    directory: Path = BANNERS_DIR,
+    default: str | None = DEFAULT_BANNER,
+    pipeline: ImagePipeline | None = None,
+) -> dict:
+    files = sorted(path for path in directory.iterdir() if path.suffix.lower() in IMAGE_SUFFIXES)
+    uploads = {}
+    for path in files:
+        try:
+            # Готова копія береться з кешу пайплайна, тож повторний старт нічого не перекодовує
+            uploads[path] = await pipeline.optimize_file(path) if pipeline else path
+        except Exception as e:
+            logger.warning("Не вдалося підготувати банер %s: %s", path.name, e)
+    # ~3 МБ на файл - хешуємо в потоці, щоб не блокувати event loop
+    hashes = {path: await asyncio.to_thread(file_hash, upload) for path, upload in uploads.items()}
+
+    async with session_pool() as session:
+        file_ids = await orm_get_media_cache(session, set(hashes.values()))
+        pages = [page.name for page in await orm_get_info_pages(session)]
+
+    uploaded = 0
+    for path, content_hash in hashes.items():
+        if content_hash in file_ids:
+            continue
+        try:
+            file_ids[content_hash] = await upload_photo(bot, chat_id, uploads[path])
+        except Exception as e:
+            logger.warning("Не вдалося завантажити банер %s: %s", path.name, e)
+            continue
+        uploaded += 1
+        async with session_pool() as session:
+            await orm_save_media(session, content_hash, file_ids[content_hash], path.name)
+
+    by_name = {path.stem: file_ids[h] for path, h in hashes.items() if h in file_ids}
+    default_id = next((file_ids.get(h) for path, h in hashes.items() if path.name == default), None)
+    images = {}
+    for page in pages:
+        file_id = by_name.get(page) or default_id
+        if file_id:
+            images[page] = file_id
+
+    async with session_pool() as session:
+        changed = await orm_set_synced_banner_images(session, images)
+
+    stats = {"files": len(files), "uploaded": uploaded, "banners_changed": changed}
+    logger.info("Синхронізація банерів: %s", stats)
+    return stats
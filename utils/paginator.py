@@ -1,5 +1,9 @@
 import math
 
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
 
 # Простий пагінатор
 class Paginator:
@@ -40,4 +44,42 @@ class Paginator:
         if self.page > 1:
             self.page -= 1
             return self.__get_slice()
-        raise IndexError(f'Попередня сторінка не існує. Використовуйте has_previous(), щоб перевірити раніше.')
\ No newline at end of file
+        raise IndexError(f'Попередня сторінка не існує. Використовуйте has_previous(), щоб перевірити раніше.')
+
+
+# Пагінатор поверх SQL-запиту: рахує COUNT і вибирає лише поточну сторінку
+# (LIMIT/OFFSET), не завантажуючи весь список в пам'ять.
+# API сумісний з Paginator: page, pages, has_next(), has_previous(), get_page()
+class QueryPaginator:
+    def __init__(self, items: list | tuple, count: int, page: int=1, per_page: int=1):
+        self.array = items
+        self.per_page = per_page
+        self.page = page
+        self.len = count
+        self.pages = math.ceil(self.len / self.per_page)
+
+    @classmethod
+    async def from_query(cls, session: AsyncSession, query: Select, page: int=1, per_page: int=1):
+        # Запит має бути впорядкований, інакше сторінки "стрибатимуть"
+        count_query = select(func.count()).select_from(query.order_by(None).subquery())
+        count = (await session.execute(count_query)).scalar_one()
+
+        # Якщо записи видалили і сторінки більше немає - показуємо останню
+        pages = math.ceil(count / per_page)
+        page = max(1, min(page, pages))
+
+        result = await session.execute(query.limit(per_page).offset((page - 1) * per_page))
+        return cls(result.scalars().all(), count, page=page, per_page=per_page)
+
+    def get_page(self):
+        return self.array
+
+    def has_next(self):
+        if self.page < self.pages:
+            return self.page + 1
+        return False
+
+    def has_previous(self):
+        if self.page > 1:
+            return self.page - 1
+        return False
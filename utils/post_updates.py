@@ -0,0 +1,49 @@
+# Відправляє записані апдейти (JSON Lines, по одному Update на рядок) на локальний вебхук.
+# Приклад:
+#   python -m utils.post_updates updates.jsonl --url http://127.0.0.1:8080/webhook --secret $WEBHOOK_SECRET
+import argparse
+import asyncio
+import json
+import time
+
+from aiohttp import ClientSession
+
+
+def read_updates(path: str):
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+            update = json.loads(line)
+            # Підтримуємо і "голий" Update, і запис виду {"update": {...}}
+            yield update.get("update", update)
+
+
+async def post_updates(path: str, url: str, secret: str | None = None, concurrency: int = 10):
+    headers = {"X-Telegram-Bot-Api-Secret-Token": secret} if secret else {}
+    semaphore = asyncio.Semaphore(concurrency)
+    statuses: dict[int, int] = {}
+
+    async def post(client: ClientSession, update: dict):
+        async with semaphore:
+            async with client.post(url, json=update, headers=headers) as response:
+                statuses[response.status] = statuses.get(response.status, 0) + 1
+
+    started = time.perf_counter()
+    async with ClientSession() as client:
+        await asyncio.gather(*(post(client, update) for update in read_updates(path)))
+    elapsed = time.perf_counter() - started
+
+    total = sum(statuses.values())
+    print(f"Надіслано {total} апдейтів за {elapsed:.2f} с ({total / elapsed:.1f}/с), статуси: {statuses}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="POST записаних апдейтів на вебхук бота")
+    parser.add_argument("path", help="файл JSON Lines з апдейтами")
+    parser.add_argument("--url", default="http://127.0.0.1:8080/webhook")
+    parser.add_argument("--secret", default=None)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(post_updates(args.path, args.url, args.secret, args.concurrency))
@@ -0,0 +1,210 @@
+import codecs
+import csv
+import io
+import json
+from decimal import Decimal, InvalidOperation
+from typing import AsyncIterator, Awaitable, Callable
+
+from aiogram import Bot
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.orm_query import invalidate_catalog_cache, orm_get_categories, orm_upsert_products
+
+
+# Масовий імпорт товарів з документа CSV або JSON Lines.
+# Файл читається потоком (шматками з Bot API), рядки перевіряються по одному,
+# валідні записуються пачками по batch_size - кожна пачка своєю короткою транзакцією,
+# невалідні потрапляють у звіт з номером рядка. Завантаження файлу і повідомлення
+# про прогрес ідуть поза транзакцією, тож блокування запису SQLite не тримається
+# на час мережевих викликів. Якщо імпорт перервався, вже записані пачки лишаються.
+#
+# CSV - заголовок і рядки, розділювач "," або ";":
+#   name,price,category,image
+#   Маргарита,215.50,Піца,AgACAgIAAxkBAAI...
+# JSON Lines - по об'єкту на рядок з тими самими полями:
+#   {"name": "Маргарита", "price": 215.5, "category": "Піца", "image": "https://..."}
+# category - назва або id категорії, image - file_id фото або URL.
+# Через ImagePipeline зображення імпорту не проходять: file_id - це фото, яке Telegram
+# уже стиснув сам, а URL Telegram завантажує і стискає так само при першому показі.
+
+FIELDS = ("name", "price", "category", "image")
+
+# Product.price - Numeric(6, 2), назва і зображення - String(150)
+MAX_PRICE = Decimal("9999.99")
+MAX_LENGTH = 150
+
+# Скільки помилок зберігати для звіту (решта лише рахуються)
+MAX_ERRORS = 1000
+
+
+class ImportReport:
+    def __init__(self):
+        self.rows = 0
+        self.inserted = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors: list[tuple[int, str]] = []
+
+    def error(self, line: int, text: str):
+        self.failed += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append((line, text))
+
+    def summary(self) -> str:
+        return (
+            f"Оброблено рядків: {self.rows}\n"
+            f"Додано: {self.inserted}, оновлено: {self.updated}, з помилками: {self.failed}"
+        )
+
+    def errors_csv(self) -> bytes:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(("line", "error"))
+        writer.writerows(self.errors)
+        if self.failed > len(self.errors):
+            writer.writerow(("", f"... і ще {self.failed - len(self.errors)}"))
+        return buffer.getvalue().encode("utf-8-sig")
+
+
+async def document_chunks(bot: Bot, file_id: str, chunk_size: int = 65536) -> AsyncIterator[bytes]:
+    file = await bot.get_file(file_id)
+    url = bot.session.api.file_url(bot.token, file.file_path)
+    async for chunk in bot.session.stream_content(url=url, chunk_size=chunk_size):
+        yield chunk
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    # Інкрементальний декодер: UTF-8 символ може розірватися між шматками; BOM з Excel відкидається
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    tail = ""
+    async for chunk in chunks:
+        *lines, tail = (tail + decoder.decode(chunk)).split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    tail += decoder.decode(b"", final=True)
+    if tail:
+        yield tail.rstrip("\r")
+
+
+async def iter_records(lines: AsyncIterator[str], fmt: str) -> AsyncIterator[tuple[int, dict | str]]:
+    # (номер рядка, запис) або (номер рядка, текст помилки розбору)
+    line_no = 0
+    if fmt == "jsonl":
+        async for line in lines:
+            line_no += 1
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield line_no, f"некоректний JSON: {e}"
+                continue
+            yield line_no, record if isinstance(record, dict) else "очікувався об'єкт JSON"
+        return
+
+    header, delimiter, buffer, start = None, ",", [], 0
+    async for line in lines:
+        line_no += 1
+        if not buffer:
+            start = line_no
+        buffer.append(line)
+        text = "\n".join(buffer)
+        # Непарна кількість лапок - поле в лапках продовжується на наступному рядку
+        if text.count('"') % 2:
+            continue
+        buffer = []
+        if not text.strip():
+            continue
+
+        if header is None:
+            delimiter = ";" if text.count(";") > text.count(",") else ","
+            header = [name.strip().lower() for name in next(csv.reader([text], delimiter=delimiter))]
+            missing = [name for name in FIELDS if name not in header]
+            if missing:
+                raise ValueError(f"У заголовку CSV немає колонок: {', '.join(missing)}")
+            continue
+
+        values = next(csv.reader([text], delimiter=delimiter))
+        if len(values) != len(header):
+            yield start, f"очікувалось {len(header)} колонок, а не {len(values)}"
+            continue
+        yield start, dict(zip(header, values))
+
+    if buffer:
+        yield start, "незакриті лапки"
+
+
+def validate_product(record: dict, categories: dict[str, int]) -> dict:
+    name = str(record.get("name") or "").strip()
+    if not name or len(name) > MAX_LENGTH:
+        raise ValueError(f"назва має бути від 1 до {MAX_LENGTH} символів")
+
+    try:
+        price = Decimal(str(record.get("price", "")).strip().replace(",", "."))
+    except InvalidOperation:
+        raise ValueError(f"некоректна ціна: {record.get('price')!r}")
+    if not price.is_finite() or not 0 < price <= MAX_PRICE:
+        raise ValueError(f"ціна має бути від 0 до {MAX_PRICE}")
+
+    category = str(record.get("category") or "").strip()
+    category_id = categories.get(category.casefold())
+    if category_id is None:
+        raise ValueError(f"невідома категорія: {category!r}")
+
+    image = str(record.get("image") or "").strip()
+    if not image or len(image) > MAX_LENGTH:
+        raise ValueError(f"image (file_id або URL) має бути від 1 до {MAX_LENGTH} символів")
+
+    return {"name": name, "price": price.quantize(Decimal("0.01")), "image": image, "category_id": category_id}
+
+
+async def import_products(
+    session: AsyncSession,
+    records: AsyncIterator[tuple[int, dict | str]],
+    batch_size: int = 500,
+    progress: Callable[[ImportReport], Awaitable[None]] | None = None,
+    report: ImportReport | None = None,
+) -> ImportReport:
+    # report можна передати свій, щоб після винятку знати, скільки вже записано
+    report = report if report is not None else ImportReport()
+    categories = {}
+    for category in await orm_get_categories(session):
+        categories[category.name.casefold()] = category.id
+        categories[str(category.id)] = category.id
+    # Закриваємо транзакцію читання до першого звернення до Bot API
+    await session.commit()
+
+    batch: list[dict] = []
+
+    async def flush():
+        try:
+            inserted, updated = await orm_upsert_products(session, batch)
+            await session.commit()
+        except BaseException:
+            await session.rollback()
+            raise
+        report.inserted += inserted
+        report.updated += updated
+        batch.clear()
+        if progress:
+            await progress(report)
+
+    try:
+        async for line_no, record in records:
+            report.rows += 1
+            try:
+                if isinstance(record, str):
+                    raise ValueError(record)
+                batch.append(validate_product(record, categories))
+            except ValueError as e:
+                report.error(line_no, str(e))
+                continue
+            if len(batch) >= batch_size:
+                await flush()
+        if batch:
+            await flush()
+    finally:
+        # Один раз на весь імпорт (або на перервану частину), а не на кожен товар
+        if report.inserted or report.updated:
+            invalidate_catalog_cache()
+    return report
@@ -0,0 +1,192 @@
+import os
+import re
+import time
+from functools import lru_cache
+from typing import Iterable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.orm_query import orm_get_restricted_words
+
+
+# Символи, якими маскують літери: латиниця, схожа на кирилицю, цифри та знаки
+CONFUSABLES = str.maketrans({
+    "a": "а", "b": "в", "c": "с", "e": "е", "i": "і", "k": "к", "m": "м", "h": "н",
+    "o": "о", "p": "р", "t": "т", "x": "х", "y": "у",
+    "0": "о", "1": "і", "3": "з", "4": "ч", "6": "б", "@": "а",
+})
+_HAS_CONFUSABLES = re.compile(r"[a-z0-9@]")
+
+# Закінчення, які відкидаємо, щоб отримати основу слова (свиня -> свин, олені -> олен)
+ENDINGS = frozenset(
+    ["ями", "ами", "ові", "ого", "ому", "ими", "іми", "ий", "ій", "ів", "ом", "ою", "ею",
+     "ям", "ах", "ях", "а", "я", "о", "е", "є", "і", "ї", "и", "у", "ю", "ь", "й"]
+)
+MIN_STEM = 3
+SHORT_STEM = 4
+
+# Усе, крім літер і пробілів: "с.в.и.н.я" -> "свиня"
+_NOT_LETTERS = re.compile(r"[^\w\s]+|[\d_]+")
+_REPEATS = re.compile(r"(\w)\1+")
+
+
+def normalize(text: str) -> str:
+    # "С.в.и.н.я", "cвиня", "0лень" -> "свиня", "свиня", "олень".
+    # Повтори літер ("свиииня") стискає окремо _squeeze
+    text = text.lower()
+    # Більшість повідомлень кирилицею - translate для них зайвий і повільний
+    if _HAS_CONFUSABLES.search(text):
+        text = text.translate(CONFUSABLES)
+    return _NOT_LETTERS.sub("", text)
+
+
+def _squeeze(word: str) -> str:
+    # "свиииня" -> "свиня"
+    return _REPEATS.sub(r"\1", word)
+
+
+@lru_cache(maxsize=65536)
+def _stem_token(word: str) -> str:
+    # word вже нормалізований і стиснутий; слова в чатах повторюються, тож основи кешуємо
+    # Найдовше закінчення - три літери: перевіряємо хвости від довшого до коротшого
+    for length in (3, 2, 1):
+        if len(word) - length >= MIN_STEM and word[-length:] in ENDINGS:
+            return word[:-length]
+    return word
+
+
+def stem(word: str) -> str:
+    return _stem_token(_squeeze(normalize(word).strip()))
+
+
+def parse_words(words: Iterable[str]) -> tuple[set[str], set[str]]:
+    # Рядок "!слово" - виняток: слова з тією ж основою не вважаються порушенням
+    # ("!олена" пропускає "Олено", "Оленка", хоча основа "олен" заборонена)
+    blocked, allowed = set(), set()
+    for word in words:
+        word = word.strip()
+        if not word or word.startswith("#"):
+            continue
+        if word.startswith("!"):
+            allowed.add(stem(word[1:]))
+        else:
+            blocked.add(stem(word))
+    blocked.discard("")
+    allowed.discard("")
+    return blocked, allowed
+
+
+# Набір основ, які порівнюються лише з початком слова. Короткі основи ("свин")
+# пропускають не більше однієї літери після себе ("свинка", але не "свинець"),
+# довші ("бовдур") - будь-яке продовження ("бовдурище")
+class StemSet:
+    def __init__(self, stems: Iterable[str]):
+        stems = set(stems)
+        self._short = {s for s in stems if len(s) <= SHORT_STEM}
+        self._long = stems - self._short
+        self._lengths = sorted({len(s) for s in self._long})
+
+    def match(self, word_stem: str) -> str | None:
+        if word_stem in self._short:
+            return word_stem
+        if word_stem[:-1] in self._short:
+            return word_stem[:-1]
+        for length in self._lengths:
+            if length > len(word_stem):
+                break
+            if word_stem[:length] in self._long:
+                return word_stem[:length]
+        return None
+
+
+def _prefix_pattern(words: Iterable[str]) -> str:
+    # Регулярний вираз-префіксне дерево: re перебирає гілки по одній літері,
+    # а не кожне з тисяч слів окремо. Досить збігу з будь-якою основою як префіксом
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        if "" in node:
+            return ""
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items())]
+        return branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
+    return build(trie) if trie else "(?!)"
+
+
+class WordFilter:
+    def __init__(self, words: Iterable[str] = (), path: str | None = None, reload_interval: float = 60):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._seed = list(words)
+        self._file_words: list[str] = []
+        self._file_mtime: float | None = None
+        self._db_words: list[str] | None = None
+        self._checked: float | None = None
+        self._blocked: set[str] = set()
+        self._allowed: set[str] = set()
+        self._exact: dict[str, str] = {}
+        self._blocked_stems = StemSet(())
+        self._allowed_stems = StemSet(())
+        self._candidates = re.compile("(?!)")
+        self._read_file()
+        self._rebuild()
+
+    @property
+    def words(self) -> set[str]:
+        return set(self._blocked)
+
+    def _read_file(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        mtime = os.path.getmtime(self.path)
+        if mtime == self._file_mtime:
+            return
+        with open(self.path, encoding="utf-8") as file:
+            self._file_words = file.read().splitlines()
+        self._file_mtime = mtime
+
+    def _rebuild(self):
+        # Початковий список - лише доки не прочитали БД (куди він і записується при створенні БД)
+        words = self._seed if self._db_words is None else self._db_words
+        words = [*words, *self._file_words]
+        self._blocked, self._allowed = parse_words(words)
+        # Саме заборонене слово ("олень") блокується, навіть якщо виняток має ту ж основу
+        self._exact = {
+            _squeeze(normalize(word).strip()): stem(word)
+            for word in map(str.strip, words)
+            if word and word[0] not in "!#"
+        }
+        self._blocked_stems = StemSet(self._blocked)
+        self._allowed_stems = StemSet(self._allowed)
+        # Слова, що починаються з забороненої основи; решту тексту обробляє сам re
+        self._candidates = re.compile(r"(?<!\w)(?=" + _prefix_pattern(self._blocked) + r")\w+")
+
+    async def refresh(self, session: AsyncSession | None = None, force: bool = False):
+        # Гаряче перезавантаження списку з файлу та БД не частіше, ніж раз на reload_interval
+        now = time.monotonic()
+        if not force and self._checked is not None and now - self._checked < self.reload_interval:
+            return
+        self._checked = now
+        self._read_file()
+        if session is not None:
+            self._db_words = await orm_get_restricted_words(session)
+        self._rebuild()
+
+    def find(self, text: str) -> str | None:
+        # Повертає першу знайдену заборонену основу або None
+        exact, blocked, allowed = self._exact, self._blocked_stems, self._allowed_stems
+        for candidate in self._candidates.finditer(_squeeze(normalize(text))):
+            token = candidate.group()
+            pattern = exact.get(token)
+            if pattern is None:
+                word_stem = _stem_token(token)
+                if allowed.match(word_stem) is None:
+                    pattern = blocked.match(word_stem)
+            if pattern is not None:
+                return pattern
+        return None
@@ -0,0 +1,284 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import queue
+import time
+from typing import Any, Callable
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from aiohttp import ClientSession, ClientTimeout, web
+
+logger = logging.getLogger(__name__)
+
+
+# Багатопроцесний режим (BOT_WORKERS > 1).
+#
+# Супервізор отримує апдейти (long polling або вебхук) і, не розбираючи їх,
+# кладе в чергу воркера за from_user.id. Усі апдейти одного користувача
+# потрапляють в один процес, тому порядок для користувача зберігається,
+# а локальні кеші (FSM, known_users) лишаються коректними.
+# Воркери - окремі процеси зі своїм event loop, Dispatcher і engine (з тих самих змінних оточення).
+# Раз на health_interval кожен воркер надсилає супервізору свою статистику.
+# Спільний лічильник cache_version (multiprocessing.Value) передається кожному воркеру:
+# через нього інвалідація кешу каталогу в одному процесі доходить до всіх інших.
+
+
+def update_user_id(update: dict) -> int:
+    # Апдейт - це update_id плюс рівно одна подія (message, callback_query, ...)
+    for name, event in update.items():
+        if name == "update_id" or not isinstance(event, dict):
+            continue
+        user = event.get("from") or event.get("user") or event.get("voter_chat") or {}
+        if "id" in user:
+            return user["id"]
+        chat = event.get("chat") or event.get("message", {}).get("chat") or {}
+        if "id" in chat:
+            return chat["id"]
+    # Подія без користувача (наприклад, poll) - розкидаємо за update_id
+    return update.get("update_id", 0)
+
+
+def shard_for(update: dict, workers: int) -> int:
+    return abs(update_user_id(update)) % workers
+
+
+############################ Воркер ##########################################
+
+async def serve_worker(
+    index: int,
+    inbox: multiprocessing.Queue,
+    outbox: multiprocessing.Queue,
+    dp: Dispatcher,
+    bot: Bot,
+    max_in_flight: int = 100,
+    health_interval: float = 5.0,
+    stats: Callable[[], dict] | None = None,
+):
+    loop = asyncio.get_running_loop()
+    slots = asyncio.Semaphore(max_in_flight)
+    tasks: set[asyncio.Task] = set()
+    counters = {"processed": 0, "failed": 0}
+    started = time.monotonic()
+
+    def report(status: str):
+        outbox.put((index, status, {
+            "pid": os.getpid(),
+            "uptime": round(time.monotonic() - started, 1),
+            "in_flight": len(tasks),
+            **counters,
+            **(stats() if stats else {}),
+        }))
+
+    async def process(raw: dict):
+        try:
+            await dp.feed_update(bot, Update.model_validate(raw, context={"bot": bot}))
+            counters["processed"] += 1
+        except Exception:
+            counters["failed"] += 1
+            logger.exception("Воркер %d: помилка обробки апдейту %s", index, raw.get("update_id"))
+        finally:
+            slots.release()
+
+    async def heartbeat():
+        while True:
+            report("ok")
+            await asyncio.sleep(health_interval)
+
+    dp["worker"] = index
+    await dp.emit_startup(bot=bot, **dp.workflow_data)
+    heartbeat_task = asyncio.create_task(heartbeat())
+    try:
+        while True:
+            # Не беремо з черги більше, ніж можемо обробити: решта чекає в черзі,
+            # а коли вона заповниться - супервізор пригальмує отримання апдейтів
+            await slots.acquire()
+            raw = await loop.run_in_executor(None, inbox.get)
+            if raw is None:
+                slots.release()
+                break
+            task = asyncio.create_task(process(raw))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        if tasks:
+            await asyncio.wait(tasks)
+    finally:
+        heartbeat_task.cancel()
+        await dp.emit_shutdown(bot=bot, **dp.workflow_data)
+        await bot.session.close()
+        report("stopped")
+
+
+########################## Супервізор ########################################
+
+class Supervisor:
+    def __init__(
+        self,
+        target: Callable[[int, multiprocessing.Queue, multiprocessing.Queue, Any], Any],
+        workers: int = 2,
+        queue_size: int = 1000,
+        health_interval: float = 5.0,
+        log_interval: float = 60.0,
+    ):
+        # target - функція рівня модуля (процеси запускаються через spawn),
+        # яка отримує (index, inbox, outbox, cache_version) і викликає serve_worker
+        self.target = target
+        self.workers = workers
+        self.health_interval = health_interval
+        self.log_interval = log_interval
+        self._context = multiprocessing.get_context("spawn")
+        self._inboxes = [self._context.Queue(maxsize=queue_size) for _ in range(workers)]
+        self._outbox = self._context.Queue()
+        self.cache_version = self._context.Value("Q", 0)
+        self._processes: list[multiprocessing.Process | None] = [None] * workers
+        self._health: list[dict] = [{} for _ in range(workers)]
+        self._last_seen: list[float] = [0.0] * workers
+        self.routed = [0] * workers
+        self.restarts = [0] * workers
+        self._monitor_task: asyncio.Task | None = None
+        self._stopping = False
+
+    def _spawn(self, index: int):
+        process = self._context.Process(
+            target=self.target,
+            args=(index, self._inboxes[index], self._outbox, self.cache_version),
+            name=f"bot-worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        self._processes[index] = process
+
+    def start(self):
+        for index in range(self.workers):
+            self._spawn(index)
+        self._monitor_task = asyncio.create_task(self._monitor())
+
+    async def dispatch(self, update: dict):
+        index = shard_for(update, self.workers)
+        inbox = self._inboxes[index]
+        try:
+            inbox.put_nowait(update)
+        except queue.Full:
+            # Воркер не встигає - чекаємо, не блокуючи event loop
+            await asyncio.get_running_loop().run_in_executor(None, inbox.put, update)
+        self.routed[index] += 1
+
+    async def _monitor(self):
+        loop = asyncio.get_running_loop()
+        logged = time.monotonic()
+        while not self._stopping:
+            try:
+                index, status, stats = await loop.run_in_executor(None, self._outbox.get, True, self.health_interval)
+                self._health[index] = {"status": status, **stats}
+                self._last_seen[index] = time.monotonic()
+            except queue.Empty:
+                pass
+
+            for index, process in enumerate(self._processes):
+                if not self._stopping and process is not None and not process.is_alive():
+                    logger.error("Воркер %d (pid %s) завершився з кодом %s, перезапускаємо",
+                                 index, process.pid, process.exitcode)
+                    self.restarts[index] += 1
+                    self._spawn(index)
+
+            if time.monotonic() - logged >= self.log_interval:
+                logged = time.monotonic()
+                for worker in self.health():
+                    logger.info(
+                        "Воркер %(worker)d: healthy=%(healthy)s routed=%(routed)d queued=%(queued)d restarts=%(restarts)d",
+                        worker,
+                    )
+
+    def health(self) -> list[dict]:
+        now = time.monotonic()
+        result = []
+        for index, process in enumerate(self._processes):
+            seen_ago = now - self._last_seen[index] if self._last_seen[index] else None
+            alive = process is not None and process.is_alive()
+            result.append({
+                "worker": index,
+                "alive": alive,
+                # Живий процес, який давно не звітував, вважаємо "завислим"
+                "healthy": alive and seen_ago is not None and seen_ago < 3 * self.health_interval,
+                "last_seen_ago": round(seen_ago, 1) if seen_ago is not None else None,
+                "routed": self.routed[index],
+                "restarts": self.restarts[index],
+                "queued": self._inboxes[index].qsize(),
+                **self._health[index],
+            })
+        return result
+
+    def processed(self) -> int:
+        return sum(health.get("processed", 0) for health in self._health)
+
+    async def _send_stop(self, inbox: multiprocessing.Queue, timeout: float):
+        try:
+            inbox.put_nowait(None)
+        except queue.Full:
+            # Черга повна - чекаємо місце поза event loop; воркер, що так і не звільнив її,
+            # завершиться через terminate() нижче
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, inbox.put, None, True, timeout)
+            except queue.Full:
+                logger.warning("Черга воркера повна, сигнал зупинки не доставлено")
+
+    async def stop(self, timeout: float = 30.0):
+        self._stopping = True
+        await asyncio.gather(*(self._send_stop(inbox, timeout) for inbox in self._inboxes))
+        loop = asyncio.get_running_loop()
+        for process in self._processes:
+            if process is None:
+                continue
+            await loop.run_in_executor(None, process.join, timeout)
+            if process.is_alive():
+                process.terminate()
+        if self._monitor_task:
+            await self._monitor_task
+
+    ############ Джерела апдейтів ############
+
+    async def poll(self, bot: Bot, allowed_updates: list[str] | None = None, timeout: int = 30):
+        # Сирий getUpdates: супервізору не потрібно розбирати апдейти в об'єкти aiogram
+        url = bot.session.api.api_url(token=bot.token, method="getUpdates")
+        offset = None
+        async with ClientSession(timeout=ClientTimeout(total=timeout + 10)) as client:
+            while True:
+                try:
+                    async with client.post(url, json={
+                        "offset": offset,
+                        "timeout": timeout,
+                        "allowed_updates": allowed_updates,
+                    }) as response:
+                        payload = await response.json()
+                except Exception as e:
+                    logger.warning("getUpdates: %s", e)
+                    await asyncio.sleep(1)
+                    continue
+
+                if not payload.get("ok"):
+                    logger.warning("getUpdates: %s", payload.get("description"))
+                    await asyncio.sleep(payload.get("parameters", {}).get("retry_after", 1))
+                    continue
+
+                for update in payload["result"]:
+                    await self.dispatch(update)
+                    offset = update["update_id"] + 1
+
+    def register_webhook(self, app: web.Application, path: str, secret: str | None = None):
+        async def handle(request: web.Request):
+            if secret and request.headers.get("X-Telegram-Bot-Api-Secret-Token") != secret:
+                return web.Response(status=401)
+            await self.dispatch(await request.json())
+            return web.json_response({})
+
+        async def health(request: web.Request):
+            workers = self.health()
+            return web.json_response(
+                {"workers": workers},
+                status=200 if all(worker["healthy"] for worker in workers) else 503,
+            )
+
+        app.router.add_post(path, handle)
+        app.router.add_get("/health", health)